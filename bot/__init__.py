@@ -0,0 +1,18 @@
+"""Bot de Telegram para la administración de alquileres: inquilinos, propiedades, pagos y servicios.
+
+Los submódulos se importan bajo demanda. ``bot.db`` y ``bot.billing`` no dependen de Flask
+ni de python-telegram-bot, así que pueden usarse desde herramientas offline.
+``bot.web`` expone la aplicación Flask que sirve Gunicorn (``gunicorn bot:app``).
+"""
+
+import time
+
+INICIO_ARRANQUE = time.perf_counter() # Marca de inicio para medir el tiempo de arranque del worker
+
+
+def __getattr__(name):
+    # Gunicorn carga 'bot:app'. La app Flask (y con ella Telegram) solo se importa cuando se pide.
+    if name == 'app':
+        from bot.web import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,26 @@
+"""Punto de entrada de línea de comandos: ``python -m bot`` (polling), ``python -m bot deploy`` o ``python -m bot reconciliar``."""
+
+import asyncio
+import logging
+import sys
+
+from telegram import Update
+
+from bot.db import crear_tablas, reconciliar_pyg
+from bot.shards import en_cada_shard
+from bot.web import application, ejecutar_despliegue
+
+logger = logging.getLogger(__name__)
+
+if len(sys.argv) > 1 and sys.argv[1] == 'deploy':
+    # Paso de despliegue: lo invoca gunicorn.conf.py una sola vez antes de levantar los workers.
+    # También se puede ejecutar a mano con: python -m bot deploy
+    asyncio.run(ejecutar_despliegue())
+elif len(sys.argv) > 1 and sys.argv[1] == 'reconciliar':
+    # Reconciliación del P&L por propiedad a pedido (también corre cada noche en los workers)
+    en_cada_shard(reconciliar_pyg)
+else:
+    # Ejecución local usando polling, útil para pruebas.
+    logger.info("Ejecutando bot localmente (polling)...")
+    en_cada_shard(crear_tablas)
+    application.run_polling(allowed_updates=Update.ALL_TYPES)
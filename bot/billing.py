@@ -0,0 +1,92 @@
+"""Motor de facturación: prorrateo mensual de servicios (luz, agua, gas e internet/TV) por inquilino.
+
+No depende de Flask ni de python-telegram-bot, así que puede importarse desde herramientas offline.
+"""
+
+from bot.db import (
+    obtener_facturas_por_medidor_y_mes,
+    obtener_facturas_por_propiedad_servicio_y_mes,
+    obtener_inquilinos_prorrateo_compartido_luz,
+    obtener_lectura_anterior_mes,
+    obtener_medidor_por_id,
+    obtener_total_personas_por_medidor,
+    obtener_total_personas_propiedad,
+    obtener_ultima_lectura,
+)
+from bot.formatting import escape_markdown_v2
+
+
+def _consultar(cache, funcion, *args):
+    """Llama a ``funcion(*args)``, reutilizando el resultado guardado en ``cache`` si se pasó uno."""
+    if cache is None:
+        return funcion(*args)
+    clave = (funcion.__name__, *args)
+    if clave not in cache:
+        cache[clave] = funcion(*args)
+    return cache[clave]
+
+def calcular_servicios_prorrateo(propiedad_id, num_personas_inquilino, medidor_luz_individual_id,
+                                 medidor_agua_main_id, medidor_gas_main_id, year, month, cache=None):
+    """Calcula el costo de los servicios prorrateados de un inquilino en un mes.
+
+    Retorna una tupla (total_servicios, detalle) donde detalle es el desglose en texto, una línea por servicio.
+    Con ``cache`` (un dict compartido entre inquilinos del mismo cobro) los datos de cada propiedad y
+    medidor principal se consultan una sola vez.
+    """
+    detalle = ""
+    total_servicios_prorrateo = 0.0
+
+    # Prorrateo de Luz (kWh-based if individual meter, else by people for shared light)
+    total_bill_luz_propiedad, total_kwh_propiedad = _consultar(cache, obtener_facturas_por_propiedad_servicio_y_mes, propiedad_id, 'luz', year, month)
+
+    costo_inquilino_luz = 0.0
+    if medidor_luz_individual_id: # Inquilino tiene medidor individual
+        current_reading = obtener_ultima_lectura(medidor_luz_individual_id)
+        previous_reading = obtener_lectura_anterior_mes(medidor_luz_individual_id, year, month)
+        tenant_kwh_consumed = current_reading - previous_reading
+
+        if total_kwh_propiedad > 0:
+            cost_per_kwh = total_bill_luz_propiedad / total_kwh_propiedad
+            costo_inquilino_luz = cost_per_kwh * tenant_kwh_consumed
+            detalle += f"  - Luz (Consumo: {tenant_kwh_consumed:.2f} kWh): {costo_inquilino_luz:.2f} Bs. (Tarifa: {cost_per_kwh:.2f} Bs/kWh)\n"
+        else:
+            detalle += f"  - Luz: No se pudo calcular (kWh total de facturas de propiedad 0).\n"
+    else: # Inquilino prorratea luz por personas (sin medidor individual)
+        total_personas_shared_luz = _consultar(cache, obtener_inquilinos_prorrateo_compartido_luz, propiedad_id)
+        if total_personas_shared_luz > 0:
+            costo_por_persona_luz = total_bill_luz_propiedad / total_personas_shared_luz
+            costo_inquilino_luz = costo_por_persona_luz * num_personas_inquilino
+            detalle += f"  - Luz (Compartida): {costo_inquilino_luz:.2f} Bs. (Total propiedad: {total_bill_luz_propiedad:.2f} Bs. / {total_personas_shared_luz} pers.)\n"
+        else:
+            detalle += "  - Luz: No se pudo calcular (no hay personas para prorrateo de luz compartida).\n"
+    total_servicios_prorrateo += costo_inquilino_luz
+
+    # Prorrateo de Agua y Gas (people-based, por medidor principal)
+    for tipo_servicio, nombre_servicio, medidor_main_id in (('agua', 'Agua', medidor_agua_main_id), ('gas', 'Gas', medidor_gas_main_id)):
+        if medidor_main_id:
+            medidor_info = _consultar(cache, obtener_medidor_por_id, medidor_main_id)
+            if medidor_info:
+                total_personas_medidor = _consultar(cache, obtener_total_personas_por_medidor, tipo_servicio, medidor_main_id) or 1
+
+                main_bill, _ = _consultar(cache, obtener_facturas_por_medidor_y_mes, medidor_main_id, year, month)
+                costo_por_persona = (main_bill / total_personas_medidor) if total_personas_medidor > 0 else 0
+                costo_inquilino = costo_por_persona * num_personas_inquilino
+                total_servicios_prorrateo += costo_inquilino
+                detalle += f"  - {nombre_servicio} ({escape_markdown_v2(medidor_info[2])}): {costo_inquilino:.2f} Bs. (Total medidor: {main_bill:.2f} Bs. / {total_personas_medidor} pers.)\n"
+        else:
+            detalle += f"  - {nombre_servicio}: Incluida en alquiler base (sin medidor principal asignado).\n"
+
+    # Prorrateo de Internet/TV (people-based, for the property)
+    total_internet_tv_bill_propiedad, _ = _consultar(cache, obtener_facturas_por_propiedad_servicio_y_mes, propiedad_id, 'internet_tv', year, month)
+
+    total_personas_propiedad = _consultar(cache, obtener_total_personas_propiedad, propiedad_id) or 1
+
+    if total_personas_propiedad > 0:
+        costo_por_persona_internet_tv = total_internet_tv_bill_propiedad / total_personas_propiedad
+        costo_inquilino_internet_tv = costo_por_persona_internet_tv * num_personas_inquilino
+        total_servicios_prorrateo += costo_inquilino_internet_tv
+        detalle += f"  - Internet/TV: {costo_inquilino_internet_tv:.2f} Bs. (Total propiedad: {total_internet_tv_bill_propiedad:.2f} Bs. / {total_personas_propiedad} pers.)\n"
+    else:
+        detalle += "  - Internet/TV: No se encontró medidor principal de Internet/TV para la propiedad o no aplica.\n"
+
+    return total_servicios_prorrateo, detalle
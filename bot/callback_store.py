@@ -0,0 +1,110 @@
+"""Datos de botones inline guardados en el servidor.
+
+Telegram limita el ``callback_data`` a 64 bytes y lo devuelve tal como lo manda el cliente.
+Los botones que necesitan datos llevan solo una clave corta y opaca; la acción y sus
+argumentos quedan en SQLite (compartida entre workers), con una caché LRU acotada en memoria.
+La tabla también está acotada: la purga nocturna borra lo viejo y, al insertar, se podan las
+filas más antiguas que excedan ``retencion``."""
+
+import collections
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from bot.db import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+DIAS_RETENCION = 90 # Los botones de notificaciones pueden usarse semanas después de enviados
+
+class AlmacenCallbacks:
+    """Clave corta -> (acción, argumentos), en SQLite con caché LRU en memoria."""
+
+    def __init__(self, ruta=DB_PATH, capacidad=1000, retencion=200000):
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self.retencion = retencion # Botones que guarda la tabla (compartida por todos los workers)
+        self._insertados = 0
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _conexion(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.ruta, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS datos_callback (
+                    clave TEXT PRIMARY KEY,
+                    datos TEXT NOT NULL,
+                    creado TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _recordar(self, clave, valor):
+        self._cache[clave] = valor
+        self._cache.move_to_end(clave)
+        if len(self._cache) > self.capacidad:
+            self._cache.popitem(last=False)
+
+    def guardar(self, accion, *argumentos):
+        """Guarda la acción y sus argumentos y devuelve la clave que va en el botón."""
+        clave = secrets.token_urlsafe(9)
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                conn.execute(
+                    "INSERT INTO datos_callback (clave, datos, creado) VALUES (?, ?, ?)",
+                    (clave, json.dumps([accion, list(argumentos)]), datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                )
+                self._insertados += 1
+                if self._insertados % self.capacidad == 0:
+                    # El rowid sigue el orden de inserción: se quedan los últimos ``retencion`` botones
+                    conn.execute(
+                        "DELETE FROM datos_callback WHERE rowid <= (SELECT MAX(rowid) FROM datos_callback) - ?",
+                        (self.retencion,),
+                    )
+            self._recordar(clave, (accion, list(argumentos)))
+        return clave
+
+    def obtener(self, clave):
+        """Devuelve (acción, argumentos) de la clave, o None si no existe o ya se purgó."""
+        with self._lock:
+            valor = self._cache.get(clave)
+            if valor is not None:
+                self._cache.move_to_end(clave)
+                return valor
+            fila = self._conexion().execute("SELECT datos FROM datos_callback WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                return None
+            accion, argumentos = json.loads(fila[0])
+            self._recordar(clave, (accion, argumentos))
+            return accion, argumentos
+
+    def purgar(self, dias=DIAS_RETENCION):
+        """Borra los datos de botones creados hace más de ``dias`` días.
+
+        Corre en un hilo aparte (tarea nocturna): usa su propia conexión y no retiene el lock que
+        usan ``guardar``/``obtener`` desde el bucle mientras borra."""
+        limite = (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._conexion() # Crea la tabla si todavía no existe
+        conn = sqlite3.connect(self.ruta)
+        try:
+            conn.execute("PRAGMA busy_timeout=5000")
+            with conn:
+                borrados = conn.execute("DELETE FROM datos_callback WHERE creado < ?", (limite,)).rowcount
+        finally:
+            conn.close()
+        with self._lock:
+            self._cache.clear()
+        logger.info("Datos de botones purgados: %s.", borrados)
+
+almacen_callbacks = AlmacenCallbacks()
@@ -0,0 +1,57 @@
+"""Configuración del bot leída de las variables de entorno y configuración de logging."""
+
+import logging
+import os
+import tempfile
+
+from bot.logs import configurar_logging
+from bot.shards import admins_de_shards
+
+# Configuración de logging (JSON por una cola, ver bot/logs.py)
+configurar_logging()
+logger = logging.getLogger(__name__)
+
+# --- Variables globales ---
+# Obtener el token del bot desde las variables de entorno
+TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
+if not TOKEN:
+    logger.error("TELEGRAM_BOT_TOKEN no está configurado en las variables de entorno.")
+    # En un entorno de producción como Render, esto debería causar un fallo.
+    # Para desarrollo local, podrías poner un token de prueba aquí.
+    exit(1)
+
+# Obtener los IDs de administrador desde las variables de entorno
+ADMIN_IDS_STR = os.environ.get("ADMIN_IDS")
+if not ADMIN_IDS_STR:
+    if not admins_de_shards():
+        logger.error("ADMIN_IDS no está configurado en las variables de entorno.")
+    ADMIN_IDS = [] # Valor por defecto si no está configurado
+else:
+    try:
+        ADMIN_IDS = [int(admin_id.strip()) for admin_id in ADMIN_IDS_STR.split(',')]
+    except ValueError:
+        logger.error("ADMIN_IDS contiene valores no numéricos. Asegúrate de que sean una lista de números separados por comas.")
+        ADMIN_IDS = []
+# En modo multi-propietario también son administradores los de cada shard (ver bot/shards.py); los avisos
+# de inquilinos van solo a los administradores de su shard (ver bot/handlers/tenant.py)
+ADMIN_IDS += [admin_id for admin_id in admins_de_shards() if admin_id not in ADMIN_IDS]
+
+# URL base de la Bot API; solo se cambia para apuntar a un stub local en pruebas de carga (ver tools/loadtest.py)
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL")
+
+# Cliente HTTP de la Bot API. Un HTTPXRequest propio trae un pool de una sola conexión: la respuesta
+# a un callback y la edición del menú se esperaban entre sí. Con la carga de tools/loadtest.py los
+# updates se procesan de a uno y no hubo diferencia entre 4 y 16 conexiones; 8 deja margen.
+TELEGRAM_POOL_CONEXIONES = int(os.environ.get("TELEGRAM_POOL_CONEXIONES", "8"))
+TELEGRAM_POOL_TIMEOUT = float(os.environ.get("TELEGRAM_POOL_TIMEOUT", "5")) # Segundos esperando una conexión libre
+TELEGRAM_KEEPALIVE = float(os.environ.get("TELEGRAM_KEEPALIVE", "60")) # Segundos que se conserva una conexión ociosa
+TELEGRAM_HTTP2 = os.environ.get("TELEGRAM_HTTP2", "0") not in ('', '0', 'false', 'no') # Requiere httpx[http2]
+# get_updates (solo en polling) usa su propio pool para que el long polling no ocupe las conexiones de los envíos
+TELEGRAM_POOL_GET_UPDATES = int(os.environ.get("TELEGRAM_POOL_GET_UPDATES", "1"))
+
+# Configuración para webhooks
+PORT = int(os.environ.get("PORT", "5000"))
+WEBHOOK_PATH = "/webhook" # Ruta donde el bot recibirá las actualizaciones
+# Archivo de bloqueo que garantiza que el paso de despliegue (tablas, comandos, webhook)
+# se ejecute una sola vez por instancia, aunque Gunicorn levante varios workers.
+DEPLOY_LOCK_PATH = os.environ.get("DEPLOY_LOCK_PATH", os.path.join(tempfile.gettempdir(), "velpra_bot_deploy.lock"))
@@ -0,0 +1,802 @@
+"""Acceso a la base de datos SQLite: creación de tablas y funciones de consulta."""
+
+import logging
+import sqlite3
+from datetime import datetime
+
+from bot import shards
+
+logger = logging.getLogger(__name__)
+
+# --- Base de datos ---
+# NOTA IMPORTANTE: SQLite en Render.com (o en la mayoría de los servicios gratuitos sin disco persistente)
+# NO MANTENDRÁ LOS DATOS entre reinicios del servicio. Esto significa que si el bot se duerme
+# y se reinicia, o si Render.com realiza mantenimiento, la base de datos 'inquilinos.db'
+# se reseteará. Para una aplicación de producción, se recomienda usar una base de datos
+# persistente como PostgreSQL (Render.com ofrece un nivel gratuito para PostgreSQL también).
+DB_PATH = shards.DB_PATH # Base central; con un solo propietario también guarda los datos
+# Conexión y cursor del shard del update en curso (ver bot.shards); sin SHARDS, los de DB_PATH
+conn = shards.ConexionEnrutada()
+cursor = shards.CursorEnrutado()
+
+def crear_tablas():
+    """Crea las tablas necesarias en la base de datos si no existen."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inquilinos (
+            chat_id INTEGER PRIMARY KEY,
+            nombre TEXT,
+            ci TEXT,
+            fecha_ingreso TEXT,
+            monto_alquiler REAL,
+            tipo_alquiler TEXT,
+            saldo REAL DEFAULT 0,
+            propiedad_id INTEGER,
+            medidor_asignado_luz_id INTEGER,
+            medidor_asignado_agua_id INTEGER,
+            medidor_asignado_gas_id INTEGER,
+            num_personas INTEGER DEFAULT 1,
+            FOREIGN KEY (propiedad_id) REFERENCES propiedades(id),
+            FOREIGN KEY (medidor_asignado_luz_id) REFERENCES medidores(id),
+            FOREIGN KEY (medidor_asignado_agua_id) REFERENCES medidores(id),
+            FOREIGN KEY (medidor_asignado_gas_id) REFERENCES medidores(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pagos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            fecha_pago TEXT,
+            monto_pagado REAL,
+            saldo_restante REAL,
+            comprobante TEXT,
+            confirmado INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quejas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            fecha TEXT,
+            texto TEXT,
+            resuelto INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS facturas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo_servicio TEXT,
+            fecha TEXT,
+            monto REAL,
+            propiedad_id INTEGER,
+            medidor_id INTEGER,
+            total_kwh REAL DEFAULT 0, -- Nueva columna para el total de kWh en facturas de luz
+            FOREIGN KEY (propiedad_id) REFERENCES propiedades(id),
+            FOREIGN KEY (medidor_id) REFERENCES medidores(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS propiedades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE,
+            direccion TEXT,
+            wifi_ssid TEXT,
+            wifi_password TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS medidores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            propiedad_id INTEGER,
+            nombre_medidor TEXT,
+            tipo_servicio TEXT NOT NULL,
+            FOREIGN KEY (propiedad_id) REFERENCES propiedades(id),
+            UNIQUE (propiedad_id, nombre_medidor)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lecturas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            medidor_id INTEGER,
+            fecha TEXT,
+            lectura REAL,
+            FOREIGN KEY (medidor_id) REFERENCES medidores(id)
+        )
+    ''')
+    # Historial de cargos (cobros mensuales) para calcular la antigüedad de la deuda
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cargos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            monto REAL NOT NULL,
+            concepto TEXT,
+            FOREIGN KEY (chat_id) REFERENCES inquilinos(chat_id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cargos_chat_fecha ON cargos(chat_id, fecha)")
+    # Columnas agregadas después de la creación original de las tablas
+    # Fecha en que el saldo del inquilino quedó en cero por última vez
+    agregar_columna_si_falta('inquilinos', 'fecha_ultimo_pago_completo TEXT')
+    # Propiedad y parte de alquiler de cada cargo, para el P&L por propiedad
+    agregar_columna_si_falta('cargos', 'propiedad_id INTEGER')
+    agregar_columna_si_falta('cargos', 'monto_alquiler REAL NOT NULL DEFAULT 0')
+    # Propiedad de cada pago al registrarlo (0 = sin propiedad): el resumen mensual no cambia si el inquilino se muda
+    agregar_columna_si_falta('pagos', 'propiedad_id INTEGER')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS pagos_propiedad AFTER INSERT ON pagos WHEN new.propiedad_id IS NULL BEGIN
+            UPDATE pagos SET propiedad_id = COALESCE((SELECT propiedad_id FROM inquilinos WHERE chat_id = new.chat_id), 0)
+            WHERE id = new.id;
+        END
+    ''')
+    # Los pagos anteriores a la columna se asignan una sola vez a la propiedad actual del inquilino
+    cursor.execute(
+        "UPDATE pagos SET propiedad_id = COALESCE((SELECT propiedad_id FROM inquilinos i WHERE i.chat_id = pagos.chat_id), 0) "
+        "WHERE propiedad_id IS NULL"
+    )
+    # Último período en que corrió cada tarea periódica (ver bot.tasks)
+    cursor.execute("CREATE TABLE IF NOT EXISTS tareas_programadas (nombre TEXT PRIMARY KEY, ultimo_periodo TEXT)")
+    crear_indice_quejas()
+    crear_indice_inquilinos()
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quejas_resuelto_fecha ON quejas(resuelto, fecha)")
+    # Versión de cada grupo de datos cacheados ('contabilidad', 'catalogo'): invalida las cachés en todos los workers
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versiones_cache (
+            clave TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Totales mensuales por propiedad para los reportes de varios meses (propiedad_id 0 = sin propiedad)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_mensual (
+            propiedad_id INTEGER NOT NULL,
+            mes TEXT NOT NULL,
+            ingresos REAL NOT NULL DEFAULT 0,
+            gastos REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (mes, propiedad_id)
+        )
+    ''')
+    # Índices para los resúmenes por período
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pagos_confirmado_fecha ON pagos(confirmado, fecha_pago)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_facturas_fecha ON facturas(fecha)")
+    reconstruir_resumen_mensual()
+    crear_contadores_pyg()
+    conn.commit()
+    # Carga inicial (o corrección) de los contadores del P&L a partir de las tablas de origen
+    reconciliar_pyg()
+
+# --- Funciones para interacciones con la DB ---
+
+def agregar_columna_si_falta(tabla, definicion):
+    """Agrega una columna a una tabla existente; no hace nada si ya existe."""
+    try:
+        cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {definicion}")
+    except sqlite3.OperationalError:
+        pass # La columna ya existe
+
+def agregar_inquilino(chat_id, nombre, ci):
+    """Agrega un nuevo inquilino a la base de datos."""
+    cursor.execute(
+        "INSERT OR IGNORE INTO inquilinos(chat_id, nombre, ci) VALUES (?, ?, ?)",
+        (chat_id, nombre, ci)
+    )
+    conn.commit()
+    shards.asignar(chat_id)
+    logger.info("Inquilino %s (%s) agregado/actualizado.", nombre, chat_id)
+
+def actualizar_datos_inquilino(chat_id, **kwargs):
+    """Actualiza los datos de un inquilino existente con campos específicos."""
+    updates = []
+    params = []
+    for key, value in kwargs.items():
+        if value is not None:
+            updates.append(f"{key} = ?")
+            params.append(value)
+
+    if updates:
+        query = f"UPDATE inquilinos SET {', '.join(updates)} WHERE chat_id = ?"
+        params.append(chat_id)
+        cursor.execute(query, tuple(params))
+        if kwargs.get('nombre') is not None:
+            incrementar_version_cache()
+        conn.commit()
+        logger.info("Datos de inquilino %s actualizados: %s", chat_id, kwargs)
+
+def obtener_inquilino(chat_id):
+    """Obtiene los datos de un inquilino por su chat_id."""
+    cursor.execute("SELECT * FROM inquilinos WHERE chat_id = ?", (chat_id,))
+    return cursor.fetchone()
+
+def obtener_inquilinos_por_propiedad(propiedad_id):
+    """Obtiene todos los inquilinos de una propiedad específica."""
+    cursor.execute("SELECT chat_id, nombre, num_personas FROM inquilinos WHERE propiedad_id = ?", (propiedad_id,))
+    return cursor.fetchall()
+
+def obtener_todos_los_inquilinos():
+    """Obtiene todos los inquilinos registrados."""
+    cursor.execute("SELECT chat_id, nombre FROM inquilinos")
+    return cursor.fetchall()
+
+def eliminar_inquilino_db(chat_id):
+    """Elimina un inquilino y sus registros asociados."""
+    try:
+        cursor.execute("DELETE FROM pagos WHERE chat_id = ?", (chat_id,))
+        cursor.execute("DELETE FROM quejas WHERE chat_id = ?", (chat_id,))
+        cursor.execute("DELETE FROM cargos WHERE chat_id = ?", (chat_id,))
+        cursor.execute("DELETE FROM inquilinos WHERE chat_id = ?", (chat_id,))
+        reconstruir_resumen_mensual()
+        incrementar_version_cache()
+        conn.commit()
+        shards.olvidar(chat_id)
+        logger.info("Inquilino con chat_id %s y sus registros eliminados.", chat_id)
+        return True
+    except Exception as e:
+        logger.error("Error al eliminar inquilino %s: %s", chat_id, e)
+        return False
+
+def registrar_pago(chat_id, monto_pagado, saldo_restante, comprobante, confirmado=0):
+    """Registra un pago y actualiza el saldo del inquilino."""
+    fecha_pago = datetime.now().strftime("%Y-%m-%d")
+    cursor.execute(
+        "INSERT INTO pagos(chat_id, fecha_pago, monto_pagado, saldo_restante, comprobante, confirmado) VALUES (?, ?, ?, ?, ?, ?)",
+        (chat_id, fecha_pago, monto_pagado, saldo_restante, comprobante, confirmado)
+    )
+    conn.commit()
+    logger.info("Pago de %s registrado para %s. Saldo pendiente de confirmación.", monto_pagado, chat_id)
+
+def confirmar_pago_db(pago_id, chat_id, monto_pagado, saldo_restante):
+    """Confirma un pago y actualiza el saldo del inquilino. Devuelve False si ya estaba confirmado."""
+    cursor.execute("UPDATE pagos SET confirmado = 1 WHERE id = ? AND confirmado = 0", (pago_id,))
+    if not cursor.rowcount:
+        # Doble toque u otro administrador: el saldo recibido puede estar desactualizado
+        logger.info("Pago %s ya estaba confirmado; no se modifica el saldo.", pago_id)
+        return False
+    # Suma el pago al total mensual de la propiedad registrada con el pago
+    cursor.execute('''
+        INSERT INTO resumen_mensual(propiedad_id, mes, ingresos)
+        SELECT COALESCE(propiedad_id, 0), substr(fecha_pago, 1, 7), monto_pagado
+        FROM pagos
+        WHERE id = ?
+        ON CONFLICT(mes, propiedad_id) DO UPDATE SET ingresos = ingresos + excluded.ingresos
+    ''', (pago_id,))
+    cursor.execute("UPDATE inquilinos SET saldo = ? WHERE chat_id = ?", (saldo_restante, chat_id))
+    if saldo_restante <= 0:
+        # Los cargos anteriores a esta fecha están saldados: el reporte de antigüedad no los revisa
+        cursor.execute(
+            "UPDATE inquilinos SET fecha_ultimo_pago_completo = ? WHERE chat_id = ?",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), chat_id)
+        )
+    incrementar_version_cache()
+    conn.commit()
+    logger.info("Pago %s confirmado para %s. Nuevo saldo: %s", pago_id, chat_id, saldo_restante)
+    return True
+
+def registrar_cargo(chat_id, monto, concepto, propiedad_id=None, monto_alquiler=0):
+    """Registra un cargo (cobro) al inquilino en el historial de cargos."""
+    cursor.execute(
+        "INSERT INTO cargos(chat_id, fecha, monto, concepto, propiedad_id, monto_alquiler) VALUES (?, ?, ?, ?, ?, ?)",
+        (chat_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), monto, concepto, propiedad_id, monto_alquiler)
+    )
+    conn.commit()
+
+def obtener_pagos_pendientes():
+    """Obtiene los pagos pendientes de confirmación."""
+    cursor.execute("SELECT p.id, p.chat_id, i.nombre, p.fecha_pago, p.monto_pagado, p.saldo_restante, p.comprobante FROM pagos p JOIN inquilinos i ON p.chat_id = i.chat_id WHERE p.confirmado = 0")
+    return cursor.fetchall()
+
+def registrar_queja(chat_id, texto):
+    """Registra una queja o sugerencia."""
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M")
+    cursor.execute(
+        "INSERT INTO quejas(chat_id, fecha, texto, resuelto) VALUES (?, ?, ?, 0)",
+        (chat_id, fecha, texto)
+    )
+    conn.commit()
+    logger.info("Queja registrada de %s: %s", chat_id, texto)
+
+def obtener_quejas_pendientes():
+    """Obtiene las quejas pendientes de resolución."""
+    cursor.execute("SELECT q.id, q.chat_id, i.nombre, q.fecha, q.texto FROM quejas q JOIN inquilinos i ON q.chat_id = i.chat_id WHERE q.resuelto = 0 ORDER BY q.fecha DESC")
+    return cursor.fetchall()
+
+def crear_indice_quejas():
+    """Crea el índice de texto completo (FTS5) de las quejas y los triggers que lo sincronizan."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'quejas_fts'")
+    existia = cursor.fetchone() is not None
+    # Tabla de contenido externo: el texto vive en 'quejas', el índice solo guarda los términos
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS quejas_fts USING fts5(
+            texto, content='quejas', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS quejas_fts_insert AFTER INSERT ON quejas BEGIN
+            INSERT INTO quejas_fts(rowid, texto) VALUES (new.id, new.texto);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS quejas_fts_delete AFTER DELETE ON quejas BEGIN
+            INSERT INTO quejas_fts(quejas_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS quejas_fts_update AFTER UPDATE OF texto ON quejas BEGIN
+            INSERT INTO quejas_fts(quejas_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+            INSERT INTO quejas_fts(rowid, texto) VALUES (new.id, new.texto);
+        END
+    ''')
+    if not existia:
+        # Indexa las quejas que ya estaban registradas
+        cursor.execute("INSERT INTO quejas_fts(quejas_fts) VALUES ('rebuild')")
+
+def _consulta_fts(terminos):
+    """Convierte el texto buscado en una consulta FTS5 segura: cada palabra como prefijo, todas requeridas."""
+    palabras = [palabra.replace('"', '') for palabra in terminos.split()]
+    return ' '.join(f'"{palabra}"*' for palabra in palabras if palabra)
+
+def buscar_quejas(terminos, propiedad_id=None, desde=None, hasta=None, resuelto=None, limite=10, offset=0):
+    """Busca quejas por texto, ordenadas por relevancia, con filtros opcionales de propiedad, fechas y estado."""
+    consulta = _consulta_fts(terminos)
+    if not consulta:
+        return []
+    condiciones = ["quejas_fts MATCH ?"]
+    params = [consulta]
+    if propiedad_id is not None:
+        condiciones.append("i.propiedad_id = ?")
+        params.append(propiedad_id)
+    if desde:
+        condiciones.append("q.fecha >= ?")
+        params.append(desde)
+    if hasta:
+        # 'hasta' es inclusivo: se compara con el día siguiente
+        condiciones.append("q.fecha < date(?, '+1 day')")
+        params.append(hasta)
+    if resuelto is not None:
+        condiciones.append("q.resuelto = ?")
+        params.append(1 if resuelto else 0)
+    params.extend([limite, offset])
+    cursor.execute(f'''
+        SELECT q.id, q.fecha, q.resuelto, COALESCE(i.nombre, 'ID: ' || q.chat_id), p.nombre,
+               snippet(quejas_fts, 0, '«', '»', '…', 12)
+        FROM quejas_fts
+        JOIN quejas q ON q.id = quejas_fts.rowid
+        LEFT JOIN inquilinos i ON i.chat_id = q.chat_id
+        LEFT JOIN propiedades p ON p.id = i.propiedad_id
+        WHERE {' AND '.join(condiciones)}
+        ORDER BY bm25(quejas_fts)
+        LIMIT ? OFFSET ?
+    ''', tuple(params))
+    return cursor.fetchall()
+
+def crear_indice_inquilinos():
+    """Crea la tabla de búsqueda de inquilinos (FTS5 con trigramas) y los triggers que la sincronizan."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'inquilinos_busqueda'")
+    existia = cursor.fetchone() is not None
+    # Trigramas: cualquier subcadena de 3+ caracteres del nombre, el CI o la propiedad usa el índice
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS inquilinos_busqueda USING fts5(
+            nombre, ci, propiedad, tokenize='trigram'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS inquilinos_busqueda_insert AFTER INSERT ON inquilinos BEGIN
+            INSERT INTO inquilinos_busqueda(rowid, nombre, ci, propiedad)
+            VALUES (new.chat_id, new.nombre, new.ci, (SELECT nombre FROM propiedades WHERE id = new.propiedad_id));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS inquilinos_busqueda_update AFTER UPDATE OF chat_id, nombre, ci, propiedad_id ON inquilinos BEGIN
+            DELETE FROM inquilinos_busqueda WHERE rowid = old.chat_id;
+            INSERT INTO inquilinos_busqueda(rowid, nombre, ci, propiedad)
+            VALUES (new.chat_id, new.nombre, new.ci, (SELECT nombre FROM propiedades WHERE id = new.propiedad_id));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS inquilinos_busqueda_delete AFTER DELETE ON inquilinos BEGIN
+            DELETE FROM inquilinos_busqueda WHERE rowid = old.chat_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS inquilinos_busqueda_propiedad AFTER UPDATE OF nombre ON propiedades BEGIN
+            UPDATE inquilinos_busqueda SET propiedad = new.nombre
+            WHERE rowid IN (SELECT chat_id FROM inquilinos WHERE propiedad_id = new.id);
+        END
+    ''')
+    # Búsquedas de 1 o 2 caracteres (sin trigramas): prefijo de nombre o CI por índice
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inquilinos_nombre ON inquilinos(nombre COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inquilinos_ci ON inquilinos(ci)")
+    if not existia:
+        # Indexa los inquilinos que ya estaban registrados
+        cursor.execute('''
+            INSERT INTO inquilinos_busqueda(rowid, nombre, ci, propiedad)
+            SELECT i.chat_id, i.nombre, i.ci, p.nombre FROM inquilinos i LEFT JOIN propiedades p ON p.id = i.propiedad_id
+        ''')
+
+def buscar_inquilinos(texto, limite=20):
+    """Busca inquilinos por prefijo o subcadena de nombre, CI o propiedad.
+
+    Devuelve (chat_id, nombre, ci, propiedad, saldo), primero los que empiezan por ``texto``."""
+    texto = texto.strip()
+    if len(texto) >= 3:
+        # Una frase entre comillas en una tabla de trigramas equivale a buscar la subcadena
+        cursor.execute('''
+            SELECT b.rowid, i.nombre, i.ci, b.propiedad, i.saldo
+            FROM inquilinos_busqueda b
+            JOIN inquilinos i ON i.chat_id = b.rowid
+            WHERE inquilinos_busqueda MATCH ?
+            ORDER BY (i.nombre LIKE ? OR i.ci LIKE ?) DESC, b.rank
+            LIMIT ?
+        ''', ('"' + texto.replace('"', '""') + '"', texto + '%', texto + '%', limite))
+    elif texto:
+        cursor.execute('''
+            SELECT i.chat_id, i.nombre, i.ci, p.nombre, i.saldo
+            FROM inquilinos i
+            LEFT JOIN propiedades p ON p.id = i.propiedad_id
+            WHERE (i.nombre COLLATE NOCASE >= ? AND i.nombre COLLATE NOCASE < ?)
+               OR (i.ci >= ? AND i.ci < ?)
+            ORDER BY i.nombre COLLATE NOCASE
+            LIMIT ?
+        ''', (texto, texto + '\uffff', texto, texto + '\uffff', limite))
+    else:
+        cursor.execute('''
+            SELECT i.chat_id, i.nombre, i.ci, p.nombre, i.saldo
+            FROM inquilinos i
+            LEFT JOIN propiedades p ON p.id = i.propiedad_id
+            ORDER BY i.nombre COLLATE NOCASE
+            LIMIT ?
+        ''', (limite,))
+    return cursor.fetchall()
+
+def obtener_inquilinos_para_seleccion(limite):
+    """Devuelve hasta ``limite`` inquilinos (chat_id, nombre, ci) ordenados por nombre, para teclados de selección."""
+    cursor.execute("SELECT chat_id, nombre, ci FROM inquilinos ORDER BY nombre COLLATE NOCASE LIMIT ?", (limite,))
+    return cursor.fetchall()
+
+def marcar_queja_resuelto(queja_id):
+    """Marca una queja como resuelta."""
+    cursor.execute("UPDATE quejas SET resuelto = 1 WHERE id = ?", (queja_id,))
+    conn.commit()
+    logger.info("Queja %s marcada como resuelta.", queja_id)
+
+def agregar_propiedad(nombre, direccion, wifi_ssid, wifi_password):
+    """Agrega una nueva propiedad a la base de datos."""
+    try:
+        cursor.execute(
+            "INSERT INTO propiedades(nombre, direccion, wifi_ssid, wifi_password) VALUES (?, ?, ?, ?)",
+            (nombre, direccion, wifi_ssid, wifi_password)
+        )
+        incrementar_version_cache('catalogo')
+        conn.commit()
+        logger.info("Propiedad '%s' agregada.", nombre)
+        return True
+    except sqlite3.IntegrityError:
+        logger.warning("Intento de agregar propiedad con nombre duplicado: %s", nombre)
+        return False
+    except Exception as e:
+        logger.error("Error al agregar propiedad '%s': %s", nombre, e)
+        return False
+
+def actualizar_datos_propiedad(propiedad_id, **kwargs):
+    """Actualiza los datos de una propiedad existente con campos específicos."""
+    updates = []
+    params = []
+    for key, value in kwargs.items():
+        if value is not None:
+            updates.append(f"{key} = ?")
+            params.append(value)
+
+    if updates:
+        query = f"UPDATE propiedades SET {', '.join(updates)} WHERE id = ?"
+        params.append(propiedad_id)
+        cursor.execute(query, tuple(params))
+        if kwargs.get('nombre') is not None:
+            incrementar_version_cache()
+        incrementar_version_cache('catalogo')
+        conn.commit()
+        logger.info("Datos de propiedad %s actualizados: %s", propiedad_id, kwargs)
+
+def obtener_propiedades():
+    """Obtiene todas las propiedades."""
+    cursor.execute("SELECT id, nombre, direccion, wifi_ssid, wifi_password FROM propiedades")
+    return cursor.fetchall()
+
+def obtener_propiedad_por_id(propiedad_id):
+    """Obtiene una propiedad por su ID."""
+    cursor.execute("SELECT id, nombre, direccion, wifi_ssid, wifi_password FROM propiedades WHERE id = ?", (propiedad_id,))
+    return cursor.fetchone()
+
+def eliminar_propiedad_db(propiedad_id):
+    """Elimina una propiedad y sus medidores asociados."""
+    try:
+        # Desvincular inquilinos de esta propiedad
+        cursor.execute("UPDATE inquilinos SET propiedad_id = NULL, medidor_asignado_luz_id = NULL, medidor_asignado_agua_id = NULL, medidor_asignado_gas_id = NULL WHERE propiedad_id = ?", (propiedad_id,))
+        # Eliminar lecturas de medidores de esta propiedad
+        cursor.execute("DELETE FROM lecturas WHERE medidor_id IN (SELECT id FROM medidores WHERE propiedad_id = ?)", (propiedad_id,))
+        # Eliminar medidores asociados a la propiedad
+        cursor.execute("DELETE FROM medidores WHERE propiedad_id = ?", (propiedad_id,))
+        # Eliminar facturas asociadas a la propiedad
+        cursor.execute("DELETE FROM facturas WHERE propiedad_id = ?", (propiedad_id,))
+        reconstruir_resumen_mensual()
+        incrementar_version_cache()
+        incrementar_version_cache('catalogo')
+        conn.commit()
+        logger.info("Propiedad con ID %s y sus datos asociados eliminados.", propiedad_id)
+        return True
+    except Exception as e:
+        logger.error("Error al eliminar propiedad %s: %s", propiedad_id, e)
+        return False
+
+def agregar_medidor(propiedad_id, nombre_medidor, tipo_servicio):
+    """Agrega un nuevo medidor a una propiedad."""
+    try:
+        cursor.execute(
+            "INSERT INTO medidores(propiedad_id, nombre_medidor, tipo_servicio) VALUES (?, ?, ?)",
+            (propiedad_id, nombre_medidor, tipo_servicio)
+        )
+        incrementar_version_cache('catalogo')
+        conn.commit()
+        logger.info("Medidor '%s' (%s) agregado a propiedad %s.", nombre_medidor, tipo_servicio, propiedad_id)
+        return True
+    except sqlite3.IntegrityError:
+        logger.warning("Intento de agregar medidor con nombre duplicado en propiedad %s: %s", propiedad_id, nombre_medidor)
+        return False
+    except Exception as e:
+        logger.error("Error al agregar medidor '%s' a propiedad %s: %s", nombre_medidor, propiedad_id, e)
+        return False
+
+def obtener_medidores_por_propiedad(propiedad_id, tipo_servicio=None):
+    """Obtiene los medidores de una propiedad específica, opcionalmente filtrado por tipo de servicio."""
+    if tipo_servicio:
+        cursor.execute("SELECT id, nombre_medidor, tipo_servicio FROM medidores WHERE propiedad_id = ? AND tipo_servicio = ?", (propiedad_id, tipo_servicio))
+    else:
+        cursor.execute("SELECT id, nombre_medidor, tipo_servicio FROM medidores WHERE propiedad_id = ?", (propiedad_id,))
+    return cursor.fetchall()
+
+def obtener_medidores_agrupados():
+    """Obtiene todos los medidores en una sola consulta, agrupados por propiedad: {propiedad_id: [(id, nombre, tipo), ...]}."""
+    cursor.execute("SELECT propiedad_id, id, nombre_medidor, tipo_servicio FROM medidores ORDER BY propiedad_id, id")
+    agrupados = {}
+    for propiedad_id, medidor_id, nombre_medidor, tipo_servicio in cursor.fetchall():
+        agrupados.setdefault(propiedad_id, []).append((medidor_id, nombre_medidor, tipo_servicio))
+    return agrupados
+
+def obtener_medidor_por_id(medidor_id):
+    """Obtiene un medidor por su ID."""
+    cursor.execute("SELECT id, propiedad_id, nombre_medidor, tipo_servicio FROM medidores WHERE id = ?", (medidor_id,))
+    return cursor.fetchone()
+
+def registrar_lectura_db(medidor_id, lectura):
+    """Registra una lectura para un medidor específico."""
+    fecha = datetime.now().strftime("%Y-%m-%d")
+    cursor.execute(
+        "INSERT INTO lecturas(medidor_id, fecha, lectura) VALUES (?, ?, ?)",
+        (medidor_id, fecha, lectura)
+    )
+    conn.commit()
+    logger.info("Lectura %s registrada para medidor %s en fecha %s.", lectura, medidor_id, fecha)
+
+def obtener_ultima_lectura(medidor_id):
+    """Obtiene la última lectura registrada para un medidor."""
+    cursor.execute("SELECT lectura FROM lecturas WHERE medidor_id = ? ORDER BY fecha DESC LIMIT 1", (medidor_id,))
+    result = cursor.fetchone()
+    return result[0] if result else 0.0
+
+def obtener_lectura_anterior_mes(medidor_id, year, month):
+    """Obtiene la lectura más cercana al inicio del mes anterior para un medidor."""
+    # Calcular el mes anterior
+    if month == 1:
+        prev_month = 12
+        prev_year = year - 1
+    else:
+        prev_month = month - 1
+        prev_year = year
+
+    # Obtener la última lectura del mes anterior
+    cursor.execute(
+        "SELECT lectura FROM lecturas WHERE medidor_id = ? AND strftime('%Y-%m', fecha) = ? ORDER BY fecha DESC LIMIT 1",
+        (medidor_id, f"{prev_year:04d}-{prev_month:02d}")
+    )
+    result = cursor.fetchone()
+    return result[0] if result else 0.0 # Retorna 0 si no hay lectura del mes anterior
+
+def registrar_factura_db(tipo_servicio, monto, propiedad_id, medidor_id=None, total_kwh=0):
+    """Registra una factura para una propiedad y opcionalmente un medidor."""
+    fecha = datetime.now().strftime("%Y-%m-%d")
+    cursor.execute(
+        "INSERT INTO facturas(tipo_servicio, fecha, monto, propiedad_id, medidor_id, total_kwh) VALUES (?, ?, ?, ?, ?, ?)",
+        (tipo_servicio, fecha, monto, propiedad_id, medidor_id, total_kwh)
+    )
+    cursor.execute(
+        "INSERT INTO resumen_mensual(propiedad_id, mes, gastos) VALUES (?, ?, ?) "
+        "ON CONFLICT(mes, propiedad_id) DO UPDATE SET gastos = gastos + excluded.gastos",
+        (propiedad_id or 0, fecha[:7], monto)
+    )
+    incrementar_version_cache()
+    conn.commit()
+    logger.info("Factura de %s por %s registrada para propiedad %s, medidor %s, kWh: %s.", tipo_servicio, monto, propiedad_id, medidor_id, total_kwh)
+
+def obtener_facturas_por_medidor_y_mes(medidor_id, year, month):
+    """Obtiene la suma de las facturas y el total de kWh para un medidor específico en un mes dado."""
+    cursor.execute(
+        "SELECT SUM(monto), SUM(total_kwh) FROM facturas WHERE medidor_id = ? AND strftime('%Y-%m', fecha) = ?",
+        (medidor_id, f"{year:04d}-{month:02d}")
+    )
+    result = cursor.fetchone()
+    return (result[0] if result and result[0] is not None else 0.0,
+            result[1] if result and result[1] is not None else 0.0)
+
+def obtener_facturas_por_propiedad_servicio_y_mes(propiedad_id, tipo_servicio, year, month):
+    """Obtiene la suma de las facturas y el total de kWh para una propiedad y tipo de servicio en un mes dado."""
+    cursor.execute(
+        "SELECT SUM(monto), SUM(total_kwh) FROM facturas WHERE propiedad_id = ? AND tipo_servicio = ? AND strftime('%Y-%m', fecha) = ?",
+        (propiedad_id, tipo_servicio, f"{year:04d}-{month:02d}")
+    )
+    result = cursor.fetchone()
+    return (result[0] if result and result[0] is not None else 0.0,
+            result[1] if result and result[1] is not None else 0.0)
+
+def obtener_inquilinos_prorrateo_compartido_luz(propiedad_id):
+    """Obtiene el total de personas de inquilinos que prorratean luz sin medidor individual en una propiedad."""
+    cursor.execute("SELECT SUM(num_personas) FROM inquilinos WHERE propiedad_id = ? AND tipo_alquiler = 'prorrateo' AND medidor_asignado_luz_id IS NULL", (propiedad_id,))
+    result = cursor.fetchone()
+    return result[0] if result and result[0] is not None else 0
+
+def obtener_total_personas_por_medidor(tipo_servicio, medidor_id):
+    """Obtiene el total de personas de los inquilinos asignados a un medidor (agua o gas)."""
+    cursor.execute(f"SELECT SUM(num_personas) FROM inquilinos WHERE medidor_asignado_{tipo_servicio}_id = ?", (medidor_id,))
+    return cursor.fetchone()[0]
+
+def obtener_total_personas_propiedad(propiedad_id):
+    """Obtiene el total de personas de todos los inquilinos de una propiedad."""
+    cursor.execute("SELECT SUM(num_personas) FROM inquilinos WHERE propiedad_id = ?", (propiedad_id,))
+    return cursor.fetchone()[0]
+
+def incrementar_version_cache(clave='contabilidad'):
+    """Incrementa la versión de un grupo de datos cacheados. El commit lo hace quien llama."""
+    cursor.execute(
+        "INSERT INTO versiones_cache(clave, version) VALUES (?, 1) ON CONFLICT(clave) DO UPDATE SET version = version + 1",
+        (clave,)
+    )
+
+def obtener_version_cache(clave='contabilidad'):
+    """Obtiene la versión actual de un grupo de datos cacheados."""
+    cursor.execute("SELECT version FROM versiones_cache WHERE clave = ?", (clave,))
+    result = cursor.fetchone()
+    return result[0] if result else 0
+
+def reconstruir_resumen_mensual():
+    """Recalcula la tabla resumen_mensual desde los pagos confirmados y las facturas. El commit lo hace quien llama.
+
+    Cada fila va a la propiedad guardada con el pago o la factura, así que el resultado no depende
+    de dónde vive hoy el inquilino y no cambia de un despliegue a otro."""
+    cursor.execute("DELETE FROM resumen_mensual")
+    cursor.execute('''
+        INSERT INTO resumen_mensual(propiedad_id, mes, ingresos, gastos)
+        SELECT propiedad_id, mes, SUM(ingresos), SUM(gastos) FROM (
+            SELECT COALESCE(propiedad_id, 0) AS propiedad_id, substr(fecha_pago, 1, 7) AS mes,
+                   monto_pagado AS ingresos, 0 AS gastos
+            FROM pagos
+            WHERE confirmado = 1
+            UNION ALL
+            SELECT COALESCE(f.propiedad_id, 0), substr(f.fecha, 1, 7), 0, f.monto
+            FROM facturas f
+        )
+        GROUP BY propiedad_id, mes
+    ''')
+
+# --- P&L por propiedad ---
+# Los contadores de pyg_propiedad se mantienen con triggers al generar cargos, confirmar pagos,
+# registrar facturas y cambiar saldos, así que leer el P&L de una propiedad es una sola fila.
+# propiedad_id 0 agrupa lo que no tiene propiedad asignada.
+_SQL_CALCULO_PYG = '''
+    SELECT propiedad_id, SUM(alquiler), SUM(servicios), SUM(costos), SUM(cobrado), SUM(deuda) FROM (
+        SELECT COALESCE(propiedad_id, 0) AS propiedad_id, monto_alquiler AS alquiler, monto - monto_alquiler AS servicios,
+               0 AS costos, 0 AS cobrado, 0 AS deuda
+        FROM cargos
+        UNION ALL
+        SELECT COALESCE(propiedad_id, 0), 0, 0, monto, 0, 0 FROM facturas
+        UNION ALL
+        SELECT COALESCE(propiedad_id, 0), 0, 0, 0, monto_pagado, 0 FROM pagos WHERE confirmado = 1
+        UNION ALL
+        SELECT COALESCE(propiedad_id, 0), 0, 0, 0, 0, COALESCE(saldo, 0) FROM inquilinos
+    )
+    GROUP BY propiedad_id
+'''
+
+def _sumar_pyg(propiedad, **deltas):
+    """SQL (para triggers) que suma los deltas a los contadores de una propiedad."""
+    columnas = ', '.join(deltas)
+    valores = ', '.join(deltas.values())
+    asignaciones = ', '.join(f"{columna} = {columna} + excluded.{columna}" for columna in deltas)
+    return (
+        f"INSERT INTO pyg_propiedad(propiedad_id, {columnas}) VALUES (COALESCE({propiedad}, 0), {valores}) "
+        f"ON CONFLICT(propiedad_id) DO UPDATE SET {asignaciones};"
+    )
+
+def crear_contadores_pyg():
+    """Crea la tabla de contadores del P&L por propiedad y los triggers que la mantienen. El commit lo hace quien llama."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pyg_propiedad (
+            propiedad_id INTEGER PRIMARY KEY,
+            alquiler_facturado REAL NOT NULL DEFAULT 0,
+            servicios_facturados REAL NOT NULL DEFAULT 0,
+            costos_servicios REAL NOT NULL DEFAULT 0,
+            cobrado REAL NOT NULL DEFAULT 0,
+            deuda REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    triggers = {
+        'pyg_cargo_insert': (
+            "AFTER INSERT ON cargos",
+            _sumar_pyg('new.propiedad_id', alquiler_facturado='new.monto_alquiler',
+                       servicios_facturados='new.monto - new.monto_alquiler'),
+        ),
+        'pyg_factura_insert': (
+            "AFTER INSERT ON facturas",
+            _sumar_pyg('new.propiedad_id', costos_servicios='new.monto'),
+        ),
+        'pyg_factura_delete': (
+            "AFTER DELETE ON facturas",
+            _sumar_pyg('old.propiedad_id', costos_servicios='-old.monto'),
+        ),
+        'pyg_pago_confirmado': (
+            "AFTER UPDATE OF confirmado ON pagos WHEN new.confirmado = 1 AND COALESCE(old.confirmado, 0) = 0",
+            _sumar_pyg('new.propiedad_id', cobrado='new.monto_pagado'),
+        ),
+        'pyg_pago_delete': (
+            "AFTER DELETE ON pagos WHEN old.confirmado = 1",
+            _sumar_pyg('old.propiedad_id', cobrado='-old.monto_pagado'),
+        ),
+        'pyg_cargo_delete': (
+            "AFTER DELETE ON cargos",
+            _sumar_pyg('old.propiedad_id', alquiler_facturado='-old.monto_alquiler',
+                       servicios_facturados='-(old.monto - old.monto_alquiler)'),
+        ),
+        'pyg_inquilino_insert': (
+            "AFTER INSERT ON inquilinos",
+            _sumar_pyg('new.propiedad_id', deuda='COALESCE(new.saldo, 0)'),
+        ),
+        'pyg_inquilino_update': (
+            "AFTER UPDATE OF saldo, propiedad_id ON inquilinos",
+            _sumar_pyg('old.propiedad_id', deuda='-COALESCE(old.saldo, 0)')
+            + _sumar_pyg('new.propiedad_id', deuda='COALESCE(new.saldo, 0)'),
+        ),
+        'pyg_inquilino_delete': (
+            "AFTER DELETE ON inquilinos",
+            _sumar_pyg('old.propiedad_id', deuda='-COALESCE(old.saldo, 0)'),
+        ),
+    }
+    for nombre, (evento, cuerpo) in triggers.items():
+        # Se recrean en cada despliegue para que las bases existentes tomen la definición actual
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        cursor.execute(f"CREATE TRIGGER {nombre} {evento} BEGIN {cuerpo} END")
+
+def reconciliar_pyg():
+    """Compara los contadores del P&L con las tablas de origen y corrige las diferencias. Devuelve las propiedades corregidas.
+
+    Corre en su propia conexión y transacción (la llama la tarea nocturna desde otro hilo): no confirma
+    escrituras a medias de los handlers y ningún trigger mueve los contadores entre la lectura y la corrección."""
+    with shards.actual().escritura() as cursor_propio:
+        cursor_propio.execute(_SQL_CALCULO_PYG)
+        esperado = {fila[0]: tuple(round(v or 0, 2) for v in fila[1:]) for fila in cursor_propio.fetchall()}
+        cursor_propio.execute("SELECT propiedad_id, alquiler_facturado, servicios_facturados, costos_servicios, cobrado, deuda FROM pyg_propiedad")
+        actual = {fila[0]: tuple(round(v or 0, 2) for v in fila[1:]) for fila in cursor_propio.fetchall()}
+        corregidas = []
+        for propiedad_id in set(esperado) | set(actual):
+            valores = esperado.get(propiedad_id, (0, 0, 0, 0, 0))
+            if actual.get(propiedad_id) != valores:
+                logger.warning("P&L de la propiedad %s descuadrado: contadores %s, esperado %s. Se corrige.", propiedad_id, actual.get(propiedad_id), valores)
+                cursor_propio.execute(
+                    "INSERT OR REPLACE INTO pyg_propiedad(propiedad_id, alquiler_facturado, servicios_facturados, costos_servicios, cobrado, deuda) VALUES (?, ?, ?, ?, ?, ?)",
+                    (propiedad_id,) + valores
+                )
+                corregidas.append(propiedad_id)
+    logger.info("Reconciliación del P&L terminada: %s propiedades corregidas.", len(corregidas))
+    return corregidas
+
+def obtener_pyg_propiedad(propiedad_id):
+    """Obtiene los contadores del P&L de una propiedad (una fila por clave primaria)."""
+    cursor.execute(
+        "SELECT alquiler_facturado, servicios_facturados, costos_servicios, cobrado, deuda FROM pyg_propiedad WHERE propiedad_id = ?",
+        (propiedad_id,)
+    )
+    return cursor.fetchone() or (0.0, 0.0, 0.0, 0.0, 0.0)
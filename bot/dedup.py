@@ -0,0 +1,78 @@
+"""Descarta updates de Telegram repetidos (reenvíos del webhook) antes de procesarlos.
+
+Telegram reenvía un update si el webhook tarda en responder. Sin este filtro, callbacks
+como confirmar un pago o generar el cobro mensual podrían aplicarse dos veces.
+
+Un update es repetido solo si su ``update_id`` ya está registrado: tras unos días sin updates
+Telegram puede reiniciar la numeración en un valor más bajo, así que la distancia al mayor id
+visto no dice nada. Lo registrado se poda por orden de llegada."""
+
+import collections
+import logging
+import sqlite3
+import threading
+
+from bot import metrics
+from bot.db import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+class DeduplicadorUpdates:
+    """Filtro de ``update_id`` repetidos: buffer circular en memoria más tabla compartida entre workers."""
+
+    def __init__(self, ruta=DB_PATH, capacidad=1000, retencion=20000):
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self.retencion = retencion # Updates que guarda la tabla (compartida por todos los workers)
+        self._recientes = collections.deque(maxlen=capacidad)
+        self._vistos = set()
+        self._insertados = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _conexion(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.ruta, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("BEGIN IMMEDIATE") # Un solo worker crea la tabla y migra la anterior
+            # ``orden`` (el rowid) sigue la llegada y permite podar sin mirar los update_id
+            conn.execute("CREATE TABLE IF NOT EXISTS updates_recibidos (orden INTEGER PRIMARY KEY, update_id INTEGER NOT NULL UNIQUE)")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'updates_procesados'").fetchone():
+                # Tabla anterior, indexada por update_id: se migra lo registrado
+                conn.execute("INSERT OR IGNORE INTO updates_recibidos (update_id) SELECT update_id FROM updates_procesados ORDER BY update_id")
+                conn.execute("DROP TABLE updates_procesados")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _recordar(self, update_id):
+        if len(self._recientes) == self._recientes.maxlen:
+            self._vistos.discard(self._recientes[0])
+        self._recientes.append(update_id)
+        self._vistos.add(update_id)
+
+    def es_duplicado(self, update_id):
+        """Registra el update y devuelve True si ya se había recibido (en este u otro worker)."""
+        with self._lock:
+            if update_id in self._vistos:
+                duplicado = True
+            else:
+                conn = self._conexion()
+                with conn:
+                    insertado = conn.execute(
+                        "INSERT OR IGNORE INTO updates_recibidos (update_id) VALUES (?)", (update_id,)
+                    ).rowcount
+                    self._insertados += 1
+                    if self._insertados % self.capacidad == 0:
+                        # La tabla guarda los últimos ``retencion`` updates recibidos
+                        conn.execute(
+                            "DELETE FROM updates_recibidos WHERE orden <= (SELECT MAX(orden) FROM updates_recibidos) - ?",
+                            (self.retencion,),
+                        )
+                duplicado = not insertado
+                self._recordar(update_id)
+        if duplicado:
+            metrics.incrementar('bot_updates_duplicados_total', "Updates descartados por update_id repetido.")
+            logger.info("Update %s repetido; se descarta.", update_id)
+        return duplicado
@@ -0,0 +1,12 @@
+"""Utilidades de formato de texto para los mensajes de Telegram."""
+
+# Helper function to escape MarkdownV2 special characters
+def escape_markdown_v2(text: str) -> str:
+    if not text:  # Maneja None o vacío
+        return ""
+    
+    text = text.replace('\\', '\\\\')
+    special_chars_to_escape = '[]()~`>#+-=|{}.!'
+    for char in special_chars_to_escape:
+        text = text.replace(char, f'\\{char}')
+    return text
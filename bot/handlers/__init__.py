@@ -0,0 +1,326 @@
+"""Registro de handlers del bot.
+
+Los flujos de administración menos usados (inquilinos, propiedades y cobro mensual)
+se importan de forma diferida la primera vez que llega un update para ellos."""
+
+import importlib
+
+from telegram import Update
+from telegram.ext import (
+    CallbackQueryHandler,
+    CommandHandler,
+    InlineQueryHandler,
+    MessageHandler,
+    TypeHandler,
+    filters,
+)
+
+from bot.config import ADMIN_IDS
+from bot.handlers.admin import (
+    admin_buscar_quejas,
+    admin_buscar_quejas_pagina,
+    admin_confirm_pago_confirm,
+    admin_confirm_pago_select,
+    admin_confirm_payment_direct,
+    admin_consultas_sql,
+    admin_mark_queja_resolved_confirm,
+    admin_mark_queja_resolved_select,
+    admin_reg_factura_monto,
+    admin_reg_factura_propiedad,
+    admin_reg_factura_servicio_tipo,
+    admin_reg_lectura_medidor_select,
+    admin_reg_lectura_propiedad,
+    admin_reg_lectura_valor,
+    admin_reporte_periodo,
+    admin_resolve_queja_direct,
+    admin_send_notice_inquilino_select,
+    admin_send_notice_message,
+    admin_send_notice_property_select,
+    admin_send_notice_scope_select,
+    admin_show_accounting_summary,
+    handle_admin_confirmar_pagos_callback,
+    handle_admin_menu_comunicacion,
+    handle_admin_menu_facturacion,
+    handle_admin_menu_inquilinos,
+    handle_admin_quejas_callback,
+    handle_admin_reg_factura_callback,
+    handle_admin_reg_lectura_callback,
+    handle_admin_reporte_anual_callback,
+    handle_admin_send_notice_callback,
+)
+from bot.handlers.common import cancelar, menu_callback, registrar_ci, registrar_nombre, start
+from bot.handlers.router import RouterCallbacks
+from bot.handlers.tenant import (
+    handle_amortizar_callback,
+    handle_queja_callback,
+    inq_amortizar_comprobante,
+    inq_amortizar_monto,
+    inq_enviar_queja,
+    ver_mi_propiedad,
+    ver_saldo_y_pagos,
+)
+from bot.metrics import instrumentar_handlers
+from bot.persistence import ConversationHandlerCompartido, volcar_persistencia
+from bot.sessions import vencer_flujos
+from bot.shards import enrutar_update
+from bot.states import (
+    ADMIN_ADD_MEDIDOR_NOMBRE,
+    ADMIN_ADD_MEDIDOR_PROPIEDAD_SELECT,
+    ADMIN_ADD_MEDIDOR_TIPO,
+    ADMIN_ADD_PROPIEDAD_DIRECCION,
+    ADMIN_ADD_PROPIEDAD_NOMBRE,
+    ADMIN_ADD_PROPIEDAD_SSID,
+    ADMIN_ADD_PROPIEDAD_WIFI,
+    ADMIN_CONFIRM_PAGO_CONFIRM,
+    ADMIN_CONFIRM_PAGO_SELECT,
+    ADMIN_DEL_PROPIEDAD_CONFIRM,
+    ADMIN_DEL_PROPIEDAD_SELECT,
+    ADMIN_ELIMINAR_INQUILINO_CONFIRM,
+    ADMIN_ELIMINAR_INQUILINO_SELECT,
+    ADMIN_GENERAR_COBRO_MENSUAL_CONFIRM,
+    ADMIN_GENERAR_COBRO_MENSUAL_PROPERTY_SELECT,
+    ADMIN_GENERAR_COBRO_MENSUAL_SCOPE,
+    ADMIN_MARK_QUEJA_RESOLVED_CONFIRM,
+    ADMIN_MARK_QUEJA_RESOLVED_SELECT,
+    ADMIN_MODIFICAR_INQUILINO_FIELD,
+    ADMIN_MODIFICAR_INQUILINO_SELECT,
+    ADMIN_MODIFICAR_INQUILINO_VALUE,
+    ADMIN_MODIFICAR_PROPIEDAD_FIELD,
+    ADMIN_MODIFICAR_PROPIEDAD_SELECT,
+    ADMIN_MODIFICAR_PROPIEDAD_VALUE,
+    ADMIN_PROPIEDADES_MENU,
+    ADMIN_REG_ALQUILER,
+    ADMIN_REG_FACTURA_MONTO,
+    ADMIN_REG_FACTURA_PROPIEDAD,
+    ADMIN_REG_FACTURA_SERVICIO_TIPO,
+    ADMIN_REG_FECHA,
+    ADMIN_REG_INQUILINO_PROPIEDAD,
+    ADMIN_REG_INQUILINO_SELECT,
+    ADMIN_REG_INQ_MEDIDOR_AGUA,
+    ADMIN_REG_INQ_MEDIDOR_GAS,
+    ADMIN_REG_INQ_MEDIDOR_LUZ,
+    ADMIN_REG_LECTURA_MEDIDOR_SELECT,
+    ADMIN_REG_LECTURA_PROPIEDAD,
+    ADMIN_REG_LECTURA_VALOR,
+    ADMIN_REG_NUM_PERSONAS,
+    ADMIN_REG_TIPO_ALQ,
+    ADMIN_SEND_NOTICE_INQUILINO_SELECT,
+    ADMIN_SEND_NOTICE_MESSAGE,
+    ADMIN_SEND_NOTICE_PROPERTY_SELECT,
+    ADMIN_SEND_NOTICE_SCOPE,
+    INQ_AMORTIZAR_COMPROBANTE,
+    INQ_AMORTIZAR_MONTO,
+    INQ_ENVIAR_QUEJA,
+    NOMBRE,
+    REGISTRAR_CI,
+    REGISTRAR_NOMBRE,
+)
+
+
+class _ModuloDiferido:
+    """Expone los callbacks de un módulo de handlers sin importarlo hasta su primer uso."""
+
+    def __init__(self, nombre_modulo):
+        self._nombre_modulo = nombre_modulo
+        self._modulo = None
+
+    def _cargar(self):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre_modulo)
+        return self._modulo
+
+    def __getattr__(self, nombre):
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+
+        async def callback(update, context):
+            return await getattr(self._cargar(), nombre)(update, context)
+
+        callback.__name__ = callback.__qualname__ = nombre
+        setattr(self, nombre, callback)
+        return callback
+
+_inquilinos = _ModuloDiferido('bot.handlers.admin_inquilinos')
+_propiedades = _ModuloDiferido('bot.handlers.admin_propiedades')
+_cobros = _ModuloDiferido('bot.handlers.admin_cobros')
+
+# Texto escrito por el usuario; excluye los resultados de la búsqueda inline que se envían al chat
+TEXTO_LIBRE = filters.TEXT & ~filters.COMMAND & ~filters.VIA_BOT
+
+# --- Configuración de los handlers de conversación ---
+
+conv_handler = ConversationHandlerCompartido(
+    entry_points=[
+        # Enlaces profundos de los resultados de la búsqueda inline de inquilinos
+        CommandHandler(
+            'start', _inquilinos.abrir_enlace_inquilino,
+            filters=filters.User(ADMIN_IDS) & filters.Regex(r'^/start (modinq|delinqui|noticeinq)_\d+$'),
+        ),
+        CommandHandler('start', start),
+        # Botones de menú y acciones que inician conversaciones: una sola búsqueda por acción
+        RouterCallbacks({
+            # Los botones de "Volver al menú principal" van directamente al start handler
+            'menu_admin': start,
+            'menu_inquilino': start,
+            # Submenús de admin
+            'admin_menu_inquilinos': handle_admin_menu_inquilinos,
+            'admin_menu_facturacion': handle_admin_menu_facturacion,
+            'admin_menu_comunicacion': handle_admin_menu_comunicacion,
+
+            # Acciones de inquilino que pueden iniciar una conversación
+            'amortizar': handle_amortizar_callback,
+            'queja': handle_queja_callback,
+            'ver_mi_propiedad': ver_mi_propiedad,
+            'ver_saldo': ver_saldo_y_pagos,
+
+            # Acciones de administrador que pueden iniciar una conversación (desde submenús)
+            'admin_reg_inquilino': _inquilinos.handle_admin_reg_inquilino_callback,
+            'admin_modificar_inquilino': _inquilinos.handle_admin_modificar_inquilino_callback,
+            'admin_nuevo_inquilino': _inquilinos.handle_admin_nuevo_inquilino_callback,
+            'admin_eliminar_inquilino': _inquilinos.handle_admin_eliminar_inquilino_callback,
+            'admin_reg_factura': handle_admin_reg_factura_callback,
+            'admin_reg_lectura': handle_admin_reg_lectura_callback,
+            'admin_gestionar_propiedades': _propiedades.handle_admin_gestionar_propiedades_callback,
+            'admin_add_propiedad': _propiedades.handle_admin_add_propiedad_callback,
+            'admin_del_propiedad': _propiedades.handle_admin_del_propiedad_callback,
+            'admin_add_medidor': _propiedades.handle_admin_add_medidor_callback,
+            'admin_modificar_propiedad': _propiedades.handle_admin_modificar_propiedad_callback,
+            'admin_send_notice': handle_admin_send_notice_callback,
+            'admin_confirmar_pagos': handle_admin_confirmar_pagos_callback,
+            'admin_quejas': handle_admin_quejas_callback,
+            'admin_generar_cobro_mensual': _cobros.handle_admin_generar_cobro_mensual_callback,
+            'admin_resumen_contable': admin_show_accounting_summary,
+
+            # Acciones que solo muestran información y no inician una conversación de múltiples pasos
+            'admin_morosos': menu_callback,
+            'admin_ver_propiedades': _propiedades.admin_ver_propiedades_callback,
+        }),
+    ],
+    states={
+        REGISTRAR_NOMBRE: [MessageHandler(TEXTO_LIBRE, registrar_nombre)],
+        REGISTRAR_CI: [MessageHandler(TEXTO_LIBRE, registrar_ci)],
+
+        ADMIN_REG_INQUILINO_SELECT: [CallbackQueryHandler(_inquilinos.handle_reginqui_selection_callback, pattern='^reginqui_')],
+        ADMIN_REG_FECHA: [MessageHandler(TEXTO_LIBRE, _inquilinos.admin_reg_fecha)],
+        ADMIN_REG_ALQUILER: [MessageHandler(TEXTO_LIBRE, _inquilinos.admin_reg_monto)],
+        ADMIN_REG_TIPO_ALQ: [CallbackQueryHandler(_inquilinos.admin_reg_tipo, pattern='^tipo_')],
+        ADMIN_REG_NUM_PERSONAS: [MessageHandler(TEXTO_LIBRE, _inquilinos.admin_reg_num_personas)],
+        ADMIN_REG_INQ_MEDIDOR_LUZ: [CallbackQueryHandler(_inquilinos.admin_reg_inq_medidor_luz, pattern='^medluz_sel_')],
+        ADMIN_REG_INQ_MEDIDOR_AGUA: [CallbackQueryHandler(_inquilinos.admin_reg_inq_medidor_agua, pattern='^medagua_sel_')],
+        ADMIN_REG_INQ_MEDIDOR_GAS: [CallbackQueryHandler(_inquilinos.admin_reg_inq_medidor_gas, pattern='^medgas_sel_')],
+        ADMIN_REG_INQUILINO_PROPIEDAD: [CallbackQueryHandler(_inquilinos.admin_reg_inquilino_propiedad, pattern='^propiedad_sel_')], # Asegura que este handler esté aquí
+
+        INQ_AMORTIZAR_MONTO: [MessageHandler(TEXTO_LIBRE, inq_amortizar_monto)],
+        INQ_AMORTIZAR_COMPROBANTE: [MessageHandler(filters.PHOTO & ~filters.COMMAND, inq_amortizar_comprobante)],
+
+        # CORRECCIÓN: Se revierte a solo texto para quejas/sugerencias
+        INQ_ENVIAR_QUEJA: [MessageHandler(TEXTO_LIBRE, inq_enviar_queja)],
+
+        ADMIN_REG_FACTURA_PROPIEDAD: [CallbackQueryHandler(admin_reg_factura_propiedad, pattern='^factprop_')],
+        ADMIN_REG_FACTURA_SERVICIO_TIPO: [CallbackQueryHandler(admin_reg_factura_servicio_tipo, pattern='^servicio_')],
+        ADMIN_REG_FACTURA_MONTO: [
+            CallbackQueryHandler(admin_reg_factura_monto, pattern='^factmed_'), # Selección de medidor
+            MessageHandler(TEXTO_LIBRE, admin_reg_factura_monto) # Entrada de monto
+        ],
+
+        ADMIN_REG_LECTURA_PROPIEDAD: [CallbackQueryHandler(admin_reg_lectura_propiedad, pattern='^lectprop_')],
+        ADMIN_REG_LECTURA_MEDIDOR_SELECT: [CallbackQueryHandler(admin_reg_lectura_medidor_select, pattern='^lectmed_')],
+        ADMIN_REG_LECTURA_VALOR: [MessageHandler(TEXTO_LIBRE, admin_reg_lectura_valor)],
+
+        NOMBRE: [MessageHandler(TEXTO_LIBRE, _inquilinos.obtener_nombre_manual)],
+        REGISTRAR_CI: [MessageHandler(TEXTO_LIBRE, _inquilinos.obtener_chat_id_manual)], # Reutilizamos este estado para el chat_id manual
+
+        ADMIN_ELIMINAR_INQUILINO_SELECT: [CallbackQueryHandler(_inquilinos.admin_eliminar_inquilino_select, pattern='^delinqui_')],
+        ADMIN_ELIMINAR_INQUILINO_CONFIRM: [CallbackQueryHandler(_inquilinos.admin_eliminar_inquilino_confirm, pattern='^(confirm_del_inquilino|cancel_del_inquilino)$')],
+
+        ADMIN_PROPIEDADES_MENU: [
+            CallbackQueryHandler(_propiedades.admin_ver_propiedades_callback, pattern='^admin_ver_propiedades$'),
+            CallbackQueryHandler(_propiedades.handle_admin_add_propiedad_callback, pattern='^admin_add_propiedad$'),
+            CallbackQueryHandler(_propiedades.handle_admin_del_propiedad_callback, pattern='^admin_del_propiedad$'),
+            CallbackQueryHandler(_propiedades.handle_admin_add_medidor_callback, pattern='^admin_add_medidor$'),
+            CallbackQueryHandler(_propiedades.handle_admin_modificar_propiedad_callback, pattern='^admin_modificar_propiedad$'), # Nuevo handler
+            CallbackQueryHandler(menu_callback, pattern='^admin_menu_facturacion$') # Para volver al submenu de facturación
+        ],
+        ADMIN_ADD_PROPIEDAD_NOMBRE: [MessageHandler(TEXTO_LIBRE, _propiedades.admin_add_propiedad_nombre)],
+        ADMIN_ADD_PROPIEDAD_DIRECCION: [MessageHandler(TEXTO_LIBRE, _propiedades.admin_add_propiedad_direccion)],
+        ADMIN_ADD_PROPIEDAD_SSID: [MessageHandler(TEXTO_LIBRE, _propiedades.admin_add_propiedad_ssid)],
+        ADMIN_ADD_PROPIEDAD_WIFI: [MessageHandler(TEXTO_LIBRE, _propiedades.admin_add_propiedad_wifi)],
+
+        ADMIN_DEL_PROPIEDAD_SELECT: [CallbackQueryHandler(_propiedades.admin_del_propiedad_select, pattern='^delprop_')],
+        ADMIN_DEL_PROPIEDAD_CONFIRM: [CallbackQueryHandler(_propiedades.admin_del_propiedad_confirm, pattern='^(confirm_del_propiedad|cancel_del_propiedad)$')],
+
+        ADMIN_MODIFICAR_PROPIEDAD_SELECT: [CallbackQueryHandler(_propiedades.admin_modificar_propiedad_select, pattern='^modprop_')],
+        ADMIN_MODIFICAR_PROPIEDAD_FIELD: [CallbackQueryHandler(_propiedades.admin_modificar_propiedad_field, pattern='^mod_prop_')],
+        ADMIN_MODIFICAR_PROPIEDAD_VALUE: [
+            MessageHandler(TEXTO_LIBRE, _propiedades.admin_modificar_propiedad_value),
+            CallbackQueryHandler(_propiedades.admin_modificar_propiedad_value, pattern='^mod_val_') # Para selecciones de tipo/propiedad/medidor
+        ],
+
+
+        ADMIN_ADD_MEDIDOR_PROPIEDAD_SELECT: [CallbackQueryHandler(_propiedades.admin_add_medidor_propiedad_select, pattern='^addmedprop_')],
+        ADMIN_ADD_MEDIDOR_NOMBRE: [MessageHandler(TEXTO_LIBRE, _propiedades.admin_add_medidor_nombre)],
+        ADMIN_ADD_MEDIDOR_TIPO: [CallbackQueryHandler(_propiedades.admin_add_medidor_tipo, pattern='^servicio_')],
+
+        ADMIN_SEND_NOTICE_SCOPE: [CallbackQueryHandler(admin_send_notice_scope_select, pattern='^notice_scope_')],
+        ADMIN_SEND_NOTICE_PROPERTY_SELECT: [CallbackQueryHandler(admin_send_notice_property_select, pattern='^noticeprop_')],
+        ADMIN_SEND_NOTICE_INQUILINO_SELECT: [CallbackQueryHandler(admin_send_notice_inquilino_select, pattern='^noticeinq_')],
+        ADMIN_SEND_NOTICE_MESSAGE: [MessageHandler(TEXTO_LIBRE, admin_send_notice_message)],
+
+        ADMIN_CONFIRM_PAGO_SELECT: [CallbackQueryHandler(admin_confirm_pago_select, pattern='^confirmpago_')], # Se mantiene aquí para el flujo del menú
+        ADMIN_CONFIRM_PAGO_CONFIRM: [CallbackQueryHandler(admin_confirm_pago_confirm, pattern='^(confirm_pago_yes|confirm_pago_no)$')],
+
+        ADMIN_MARK_QUEJA_RESOLVED_SELECT: [CallbackQueryHandler(admin_mark_queja_resolved_select, pattern='^markqueja_')], # Se mantiene aquí para el flujo del menú
+        ADMIN_MARK_QUEJA_RESOLVED_CONFIRM: [CallbackQueryHandler(admin_mark_queja_resolved_confirm, pattern='^(confirm_resolve_queja|cancel_resolve_queja)$')],
+
+        ADMIN_MODIFICAR_INQUILINO_SELECT: [CallbackQueryHandler(_inquilinos.admin_modificar_inquilino_select, pattern='^modinq_')],
+        ADMIN_MODIFICAR_INQUILINO_FIELD: [CallbackQueryHandler(_inquilinos.admin_modificar_inquilino_field, pattern='^mod_inq_')],
+        ADMIN_MODIFICAR_INQUILINO_VALUE: [
+            MessageHandler(TEXTO_LIBRE, _inquilinos.admin_modificar_inquilino_value),
+            CallbackQueryHandler(_inquilinos.admin_modificar_inquilino_value, pattern='^mod_val_') # Para selecciones de tipo/propiedad/medidor
+        ],
+        ADMIN_GENERAR_COBRO_MENSUAL_SCOPE: [CallbackQueryHandler(_cobros.admin_generar_cobro_mensual_scope, pattern='^charge_scope_')],
+        ADMIN_GENERAR_COBRO_MENSUAL_PROPERTY_SELECT: [CallbackQueryHandler(_cobros.admin_generar_cobro_mensual_property_select, pattern='^chargeprop_')],
+        ADMIN_GENERAR_COBRO_MENSUAL_CONFIRM: [CallbackQueryHandler(_cobros.admin_generar_cobro_mensual_confirm, pattern='^charge_confirm_|^charge_cancel$')],
+    },
+    fallbacks=[
+        CommandHandler('cancelar', cancelar),
+    ],
+    allow_reentry=True,
+    # El estado se guarda en SQLite para que varios workers compartan la conversación
+    name='conversacion_principal',
+    persistent=True,
+)
+
+def registrar_handlers(application):
+    """Agrega todos los handlers del bot a la aplicación."""
+    # Fija la base de datos (shard) del propietario del chat antes que nada (ver bot.shards)
+    application.add_handler(TypeHandler(Update, enrutar_update), group=-2)
+    # Vence los flujos abandonados antes de que los handlers vean el update (ver bot.sessions)
+    application.add_handler(TypeHandler(Update, vencer_flujos), group=-1)
+    application.add_handler(conv_handler)
+    # Botones que no forman parte de la conversación principal
+    application.add_handler(RouterCallbacks(
+        {
+            # Confirmar pagos y resolver quejas directamente desde la notificación (id y shard del inquilino)
+            'pago_directo': (admin_confirm_payment_direct, int, str),
+            'queja_directa': (admin_resolve_queja_direct, int, str),
+            # Reportes de varios meses como documento
+            'admin_reporte_anual': handle_admin_reporte_anual_callback,
+            # Páginas de la búsqueda de quejas
+            'bq': (admin_buscar_quejas_pagina, int),
+            # P&L por propiedad
+            'admin_pyg': _propiedades.handle_admin_pyg_callback,
+            'pyg': (_propiedades.admin_pyg_propiedad, int),
+        },
+        # Confirmar pagos y resolver quejas cambia datos: solo desde botones generados por el servidor
+        solo_almacen=('pago_directo', 'queja_directa'),
+    ))
+    application.add_handler(CommandHandler('reporte', admin_reporte_periodo))
+    application.add_handler(CommandHandler('buscar_quejas', admin_buscar_quejas))
+    application.add_handler(CommandHandler('consultas', admin_consultas_sql))
+    # Búsqueda inline de inquilinos (solo administradores)
+    application.add_handler(InlineQueryHandler(_inquilinos.buscar_inquilinos_inline))
+    # Guarda user_data y el estado de la conversación al terminar cada update (ver bot.persistence)
+    application.add_handler(TypeHandler(Update, volcar_persistencia), group=1)
+    # Latencia, errores y consultas a la BD por callback, expuestas en /metrics
+    instrumentar_handlers(application.handlers[0])
@@ -0,0 +1,868 @@
+"""Handlers de administrador de uso frecuente: submenús, pagos, quejas, facturas, lecturas y avisos."""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes, ConversationHandler
+
+from bot import query_profiler, shards
+from bot.config import ADMIN_IDS
+from bot.db import (
+    buscar_quejas,
+    confirmar_pago_db,
+    cursor,
+    marcar_queja_resuelto,
+    obtener_inquilino,
+    obtener_inquilinos_para_seleccion,
+    obtener_inquilinos_por_propiedad,
+    obtener_medidor_por_id,
+    obtener_pagos_pendientes,
+    obtener_propiedad_por_id,
+    obtener_propiedades,
+    obtener_quejas_pendientes,
+    registrar_factura_db,
+    registrar_lectura_db,
+)
+from bot.formatting import escape_markdown_v2
+from bot.handlers.editing import editar_mensaje, responder
+from bot.handlers.router import datos_callback
+from bot.keyboards import (
+    MAX_INQUILINOS_EN_TECLADO,
+    boton_volver_menu,
+    teclado_admin_comunicacion,
+    teclado_admin_facturacion,
+    teclado_admin_inquilinos,
+    teclado_medidores,
+    teclado_propiedades,
+    teclado_seleccion_inquilinos,
+    teclado_send_notice_scope,
+    teclado_tipos_servicio_factura,
+)
+from bot.reports import generar_reporte_periodo, texto_resumen_contable, xlsx_disponible
+from bot.states import (
+    ADMIN_CONFIRM_PAGO_CONFIRM,
+    ADMIN_CONFIRM_PAGO_SELECT,
+    ADMIN_MARK_QUEJA_RESOLVED_CONFIRM,
+    ADMIN_MARK_QUEJA_RESOLVED_SELECT,
+    ADMIN_REG_FACTURA_MONTO,
+    ADMIN_REG_FACTURA_PROPIEDAD,
+    ADMIN_REG_FACTURA_SERVICIO_TIPO,
+    ADMIN_REG_LECTURA_MEDIDOR_SELECT,
+    ADMIN_REG_LECTURA_PROPIEDAD,
+    ADMIN_REG_LECTURA_VALOR,
+    ADMIN_SEND_NOTICE_INQUILINO_SELECT,
+    ADMIN_SEND_NOTICE_MESSAGE,
+    ADMIN_SEND_NOTICE_PROPERTY_SELECT,
+    ADMIN_SEND_NOTICE_SCOPE,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- Handlers para iniciar conversaciones desde callbacks (Admin) ---
+
+async def handle_admin_menu_inquilinos(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra el menú de gestión de inquilinos."""
+    query = update.callback_query
+    await responder(query)
+    await editar_mensaje(query, escape_markdown_v2("Menú de Gestión de Inquilinos:"), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def handle_admin_menu_facturacion(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra el menú de facturación y medidores."""
+    query = update.callback_query
+    await responder(query)
+    await editar_mensaje(query, escape_markdown_v2("Menú de Facturación y Medidores:"), reply_markup=teclado_admin_facturacion(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def handle_admin_menu_comunicacion(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra el menú de comunicación y pagos."""
+    query = update.callback_query
+    await responder(query)
+    await editar_mensaje(query, escape_markdown_v2("Menú de Comunicación y Pagos:"), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def _mismo_shard(query, context, nombre_shard):
+    """Comprueba que el botón sea del shard del administrador: el mismo id es otro registro en otra base."""
+    if nombre_shard == shards.actual().nombre:
+        return True
+    logger.warning("El administrador %s usó un botón del shard %s.", query.message.chat.id, nombre_shard)
+    await context.bot.send_message(
+        chat_id=query.message.chat.id,
+        text=escape_markdown_v2("Este botón corresponde a otro propietario."),
+        parse_mode='MarkdownV2'
+    )
+    return False
+
+# NUEVO HANDLER: Confirmar pago directamente desde la notificación
+async def admin_confirm_payment_direct(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Confirma un pago directamente desde el botón de la notificación."""
+    query = update.callback_query
+    await query.answer() # Always answer the callback query
+    if query.message.chat.id not in ADMIN_IDS:
+        return ConversationHandler.END
+
+    # El botón solo identifica el pago y su shard; monto, inquilino y saldo se leen de la BD
+    pago_id, nombre_shard = context.args
+    if not await _mismo_shard(query, context, nombre_shard):
+        return ConversationHandler.END
+    cursor.execute(
+        "SELECT p.chat_id, p.monto_pagado, p.confirmado, i.saldo FROM pagos p LEFT JOIN inquilinos i ON i.chat_id = p.chat_id WHERE p.id = ?",
+        (pago_id,)
+    )
+    pago = cursor.fetchone()
+    if not pago:
+        await context.bot.send_message(
+            chat_id=query.message.chat.id,
+            text=escape_markdown_v2("Pago no encontrado. Puede que haya sido eliminado."),
+            parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    chat_id_inquilino, monto_pagado, confirmado, saldo_actual = pago
+    saldo_real_despues_pago = (saldo_actual or 0.0) - monto_pagado
+
+    # Check if payment is already confirmed
+    if confirmado == 1:
+        # Send a new message to the admin, as we cannot edit the original if it was a photo caption
+        await context.bot.send_message(
+            chat_id=query.message.chat.id,
+            text=escape_markdown_v2("Este pago ya ha sido confirmado previamente."),
+            parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+
+    if not confirmar_pago_db(pago_id, chat_id_inquilino, monto_pagado, saldo_real_despues_pago):
+        await context.bot.send_message(
+            chat_id=query.message.chat.id,
+            text=escape_markdown_v2("Este pago ya ha sido confirmado previamente."),
+            parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    
+    # Send a new message to the admin confirming the action
+    await context.bot.send_message(
+        chat_id=query.message.chat.id, # Send to the admin who clicked the button
+        text=escape_markdown_v2("✅ Pago confirmado y saldo actualizado."),
+        parse_mode='MarkdownV2'
+    )
+    
+    try:
+        await context.bot.send_message(
+            chat_id=chat_id_inquilino,
+            text=escape_markdown_v2(f"✅ Tu pago de {monto_pagado:.2f} Bs. ha sido *confirmado* por la administración.\n"
+                 f"Tu nuevo saldo pendiente es: {saldo_real_despues_pago:.2f} Bs."),
+            parse_mode='MarkdownV2'
+        )
+    except Exception as e:
+        logger.error("Error al notificar al inquilino %s sobre pago confirmado: %s", chat_id_inquilino, e)
+    
+    return ConversationHandler.END
+
+async def handle_admin_confirmar_pagos_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra la lista de pagos pendientes de confirmación."""
+    query = update.callback_query
+    await query.answer()
+    pagos_pendientes = obtener_pagos_pendientes()
+    if not pagos_pendientes:
+        await query.edit_message_text(
+            escape_markdown_v2("No hay pagos pendientes de confirmación."),
+            reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+
+    buttons = []
+    for p_id, chat_id, nombre_inquilino, fecha_pago, monto, saldo_restante, comprobante in pagos_pendientes:
+        buttons.append([InlineKeyboardButton(escape_markdown_v2(f"ID Pago: {p_id} - {nombre_inquilino} ({monto:.2f} Bs.)"), callback_data=f"confirmpago_{p_id}")])
+    buttons.append([InlineKeyboardButton("Volver", callback_data='admin_menu_comunicacion')])
+    await query.edit_message_text(
+        escape_markdown_v2("Selecciona un pago para confirmar:"),
+        reply_markup=InlineKeyboardMarkup(buttons), parse_mode='MarkdownV2'
+    )
+    return ADMIN_CONFIRM_PAGO_SELECT
+
+async def admin_confirm_pago_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra los detalles de un pago pendiente y pide confirmación."""
+    query = update.callback_query
+    await query.answer()
+    pago_id = int(query.data.split("_")[1])
+    context.user_data['pago_a_confirmar_id'] = pago_id
+
+    cursor.execute("SELECT p.chat_id, i.nombre, p.fecha_pago, p.monto_pagado, p.saldo_restante, p.comprobante, i.saldo FROM pagos p JOIN inquilinos i ON p.chat_id = i.chat_id WHERE p.id = ?", (pago_id,))
+    pago_info = cursor.fetchone()
+
+    if not pago_info:
+        await query.edit_message_text(escape_markdown_v2("Pago no encontrado. Puede que ya haya sido confirmado o eliminado."),
+                                      reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    chat_id_inquilino, nombre_inquilino, fecha_pago, monto_pagado, saldo_restante_simulado, comprobante_info_db, saldo_actual_inquilino_db = pago_info
+    
+    nuevo_saldo_real = saldo_actual_inquilino_db - monto_pagado
+
+    context.user_data['pago_info_confirm'] = {
+        'chat_id': chat_id_inquilino,
+        'monto_pagado': monto_pagado,
+        'saldo_restante': nuevo_saldo_real
+    }
+
+    comprobante_file_id = None
+    if comprobante_info_db and comprobante_info_db.startswith("Foto ID: "):
+        comprobante_file_id = comprobante_info_db.replace("Foto ID: ", "")
+
+    if comprobante_file_id:
+        try:
+            await context.bot.send_photo(
+                chat_id=query.message.chat.id,
+                photo=comprobante_file_id,
+                caption=escape_markdown_v2(f"Comprobante enviado por {escape_markdown_v2(nombre_inquilino)} para el pago de {monto_pagado:.2f} Bs."),
+                parse_mode='MarkdownV2'
+            )
+        except Exception as e:
+            logger.error("Error al enviar la foto del comprobante %s: %s", comprobante_file_id, e)
+            await context.bot.send_message(
+                chat_id=query.message.chat.id,
+                text=escape_markdown_v2(f"No se pudo mostrar la imagen del comprobante (ID: {comprobante_file_id}). Error: {str(e)}"),
+                parse_mode='MarkdownV2'
+            )
+
+    keyboard = [
+        [InlineKeyboardButton("Confirmar Pago", callback_data='confirm_pago_yes')],
+        [InlineKeyboardButton("Cancelar", callback_data='confirm_pago_no')]
+    ]
+    await query.edit_message_text(
+        escape_markdown_v2(f"Detalles del pago:\n"
+        f"- Inquilino: {escape_markdown_v2(nombre_inquilino)} (ID: {chat_id_inquilino})\n"
+        f"- Fecha: {fecha_pago}\n"
+        f"- Monto: {monto_pagado:.2f} Bs.\n"
+        f"- Saldo actual del inquilino (antes de este pago): {saldo_actual_inquilino_db:.2f} Bs.\n"
+        f"- Saldo del inquilino si se confirma este pago: {nuevo_saldo_real:.2f} Bs.\n\n"
+        f"¿Deseas confirmar este pago?"),
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode='MarkdownV2'
+    )
+    return ADMIN_CONFIRM_PAGO_CONFIRM
+
+async def admin_confirm_pago_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Confirma o cancela el pago pendiente."""
+    query = update.callback_query
+    await query.answer()
+    pago_id = context.user_data.get('pago_a_confirmar_id')
+    pago_info = context.user_data.get('pago_info_confirm')
+
+    if not pago_id or not pago_info:
+        await query.edit_message_text(escape_markdown_v2("Error: Información del pago no encontrada."), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    chat_id_inquilino = pago_info['chat_id']
+    monto_pagado = pago_info['monto_pagado']
+    saldo_real_despues_pago = pago_info['saldo_restante']
+
+    if query.data == 'confirm_pago_yes' and not confirmar_pago_db(pago_id, chat_id_inquilino, monto_pagado, saldo_real_despues_pago):
+        await query.edit_message_text(escape_markdown_v2("Este pago ya había sido confirmado; el saldo no se modificó."), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+    elif query.data == 'confirm_pago_yes':
+        await query.edit_message_text(escape_markdown_v2("Pago confirmado y saldo actualizado."), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+        try:
+            await context.bot.send_message(
+                chat_id=chat_id_inquilino,
+                text=escape_markdown_v2(f"✅ Tu pago de {monto_pagado:.2f} Bs. ha sido *confirmado* por la administración.\n"
+                     f"Tu nuevo saldo pendiente es: {saldo_real_despues_pago:.2f} Bs."),
+                parse_mode='MarkdownV2'
+            )
+        except Exception as e:
+            logger.error("Error al notificar al inquilino %s sobre pago confirmado: %s", chat_id_inquilino, e)
+    else:
+        await query.edit_message_text(escape_markdown_v2("Confirmación de pago cancelada."), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+
+    del context.user_data['pago_a_confirmar_id']
+    if 'pago_info_confirm' in context.user_data: del context.user_data['pago_info_confirm']
+    return ConversationHandler.END
+
+async def handle_admin_quejas_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra las quejas pendientes y da opción a marcarlas como resueltas."""
+    query = update.callback_query
+    await query.answer()
+    quejas_pendientes = obtener_quejas_pendientes()
+    if not quejas_pendientes:
+        await query.edit_message_text(
+            escape_markdown_v2("No hay quejas o sugerencias pendientes."),
+            reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+
+    texto = "Quejas/Sugerencias pendientes:\n\n"
+    buttons = []
+    for q_id, q_chat_id, i_nombre, q_fecha, q_texto in quejas_pendientes:
+        texto += f"*ID:* {q_id}\n"
+        texto += f"*De:* {escape_markdown_v2(i_nombre)} (Chat ID: {q_chat_id})\n"
+        texto += f"*Fecha:* {q_fecha}\n"
+        texto += f"*Mensaje:* {escape_markdown_v2(q_texto)}\n\n"
+        buttons.append([InlineKeyboardButton(escape_markdown_v2(f"Marcar como resuelta Queja ID: {q_id}"), callback_data=f"markqueja_{q_id}")])
+    buttons.append([InlineKeyboardButton("Volver", callback_data='admin_menu_comunicacion')])
+    await query.edit_message_text(escape_markdown_v2(texto), reply_markup=InlineKeyboardMarkup(buttons), parse_mode='MarkdownV2')
+    return ADMIN_MARK_QUEJA_RESOLVED_SELECT
+
+async def admin_mark_queja_resolved_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Pide confirmación para marcar una queja como resuelta."""
+    query = update.callback_query
+    await query.answer()
+    queja_id = int(query.data.split("_")[1])
+    context.user_data['queja_a_resolver_id'] = queja_id
+
+    keyboard = [
+        [InlineKeyboardButton("Sí, marcar como resuelta", callback_data='confirm_resolve_queja')],
+        [InlineKeyboardButton("No, cancelar", callback_data='cancel_resolve_queja')]
+    ]
+    await query.edit_message_text(
+        escape_markdown_v2(f"¿Estás seguro de que quieres marcar la queja ID {queja_id} como resuelta?"),
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode='MarkdownV2'
+    )
+    return ADMIN_MARK_QUEJA_RESOLVED_CONFIRM
+
+async def admin_mark_queja_resolved_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Confirma y marca la queja como resuelta."""
+    query = update.callback_query
+    await query.answer()
+    queja_id = context.user_data.get('queja_a_resolver_id')
+
+    if query.data == 'confirm_resolve_queja':
+        marcar_queja_resuelto(queja_id)
+        await query.edit_message_text(escape_markdown_v2(f"Queja ID {queja_id} marcada como resuelta."),
+                                      reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+    else:
+        await query.edit_message_text(escape_markdown_v2("Operación cancelada."), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+
+    if 'queja_a_resolver_id' in context.user_data: del context.user_data['queja_a_resolver_id']
+    return ConversationHandler.END
+
+# NUEVO HANDLER: Marcar queja como resuelta directamente desde la notificación
+async def admin_resolve_queja_direct(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Marca una queja como resuelta directamente desde el botón de la notificación."""
+    query = update.callback_query
+    await query.answer()
+    if query.message.chat.id not in ADMIN_IDS:
+        return ConversationHandler.END
+    
+    queja_id, nombre_shard = context.args
+    if not await _mismo_shard(query, context, nombre_shard):
+        return ConversationHandler.END
+
+    # Check if queja is already resolved
+    cursor.execute("SELECT resuelto FROM quejas WHERE id = ?", (queja_id,))
+    is_resolved = cursor.fetchone()
+    if is_resolved and is_resolved[0] == 1:
+        # Send a new message to the admin, as we cannot edit the original if it was a photo caption
+        await context.bot.send_message(
+            chat_id=query.message.chat.id,
+            text=escape_markdown_v2("Esta queja ya ha sido marcada como resuelta."),
+            parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+
+    marcar_queja_resuelto(queja_id)
+    # Send a new message to the admin confirming the action
+    await context.bot.send_message(
+        chat_id=query.message.chat.id,
+        text=escape_markdown_v2(f"✅ Queja ID {queja_id} marcada como resuelta."),
+        parse_mode='MarkdownV2'
+    )
+    
+    return ConversationHandler.END
+
+async def handle_admin_reg_factura_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Registrar factura' y pide la propiedad."""
+    query = update.callback_query
+    await query.answer()
+    teclado = teclado_propiedades('factprop_', 'admin_menu_facturacion')
+    if not teclado:
+        await query.edit_message_text(escape_markdown_v2("No hay propiedades registradas para asignar la factura. Por favor, registra una propiedad primero."),
+                                      reply_markup=teclado_admin_facturacion(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+    await query.edit_message_text(escape_markdown_v2("Selecciona la propiedad para esta factura:"),
+                                  reply_markup=teclado, parse_mode='MarkdownV2')
+    return ADMIN_REG_FACTURA_PROPIEDAD
+
+async def admin_reg_factura_propiedad(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de propiedad para la factura y pide el tipo de servicio."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = int(query.data.split("_")[1])
+    context.user_data['factura_propiedad_id'] = propiedad_id
+    await query.edit_message_text(
+        escape_markdown_v2("Selecciona el tipo de servicio de la factura:"),
+        reply_markup=teclado_tipos_servicio_factura(), parse_mode='MarkdownV2'
+    )
+    return ADMIN_REG_FACTURA_SERVICIO_TIPO
+
+async def admin_reg_factura_servicio_tipo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del tipo de servicio para la factura y pide el medidor (si aplica)."""
+    query = update.callback_query
+    await query.answer()
+    servicio_tipo = query.data.split("_")[1]
+    context.user_data['factura_servicio_tipo'] = servicio_tipo
+    propiedad_id = context.user_data.get('factura_propiedad_id')
+
+    teclado = teclado_medidores(
+        propiedad_id, 'factmed_', servicio_tipo, 'admin_menu_facturacion',
+        extra=(("No aplica (factura general de propiedad)", 'factmed_none'),)
+    )
+    if teclado:
+        await query.edit_message_text(escape_markdown_v2(f"Selecciona el medidor de *{servicio_tipo.replace('_', '/').upper()}* para esta factura (si aplica):"),
+                                      reply_markup=teclado, parse_mode='MarkdownV2')
+        return ADMIN_REG_FACTURA_MONTO
+    else:
+        context.user_data['factura_medidor_id'] = None
+        context.user_data['awaiting_kwh_input'] = False
+        
+        message_text = escape_markdown_v2(f"No hay medidores de *{servicio_tipo.replace('_', '/').upper()}* para esta propiedad. ")
+        if servicio_tipo == 'luz':
+            message_text += escape_markdown_v2("Ingresa el monto de la factura de LUZ y el total de kWh (ej: 150.75,300):")
+            context.user_data['awaiting_kwh_input'] = True
+        else:
+            message_text += escape_markdown_v2(f"Ingresa el monto de la factura de *{servicio_tipo.replace('_', '/').upper()}*:")
+
+        await query.edit_message_text(message_text, reply_markup=boton_volver_menu('admin', 'admin_menu_facturacion'), parse_mode='MarkdownV2')
+        return ADMIN_REG_FACTURA_MONTO
+
+async def admin_reg_factura_monto(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la entrada del monto de la factura y la registra."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    if update.callback_query: # Si viene de la selección de medidor
+        medidor_id = int(update.callback_query.data.split("_")[1]) if update.callback_query.data != 'factmed_none' else None
+        context.user_data['factura_medidor_id'] = medidor_id
+        servicio_tipo = context.user_data.get('factura_servicio_tipo')
+
+        if servicio_tipo == 'luz' and medidor_id is not None:
+            await update.callback_query.edit_message_text(
+                escape_markdown_v2(f"Ingresa el monto de la factura de *{servicio_tipo.upper()}*. Si es de luz, ingresa también el total de kWh de la factura (ej: 150.75,300):"),
+                reply_markup=boton_volver_menu('admin', 'admin_menu_facturacion'), parse_mode='MarkdownV2'
+            )
+            context.user_data['awaiting_kwh_input'] = True
+            return ADMIN_REG_FACTURA_MONTO
+        else:
+            await update.callback_query.edit_message_text(
+                escape_markdown_v2(f"Ingresa el monto de la factura de *{servicio_tipo.replace('_', '/').upper()}*:"),
+                reply_markup=boton_volver_menu('admin', 'admin_menu_facturacion'), parse_mode='MarkdownV2'
+            )
+            context.user_data['awaiting_kwh_input'] = False
+            return ADMIN_REG_FACTURA_MONTO
+
+    else: # Si es la entrada del monto por texto
+        texto = update.effective_message.text.strip()
+        propiedad_id = context.user_data.get('factura_propiedad_id')
+        servicio_tipo = context.user_data.get('factura_servicio_tipo')
+        medidor_id = context.user_data.get('factura_medidor_id')
+        awaiting_kwh_input = context.user_data.get('awaiting_kwh_input', False)
+
+        monto = 0.0
+        total_kwh = 0.0
+
+        try:
+            if awaiting_kwh_input and servicio_tipo == 'luz':
+                parts = texto.split(',')
+                if len(parts) == 2:
+                    monto = float(parts[0].strip())
+                    total_kwh = float(parts[1].strip())
+                else:
+                    raise ValueError("Formato incorrecto. Usa 'monto,kwh'.")
+            else:
+                monto = float(texto)
+            
+            if monto <= 0:
+                raise ValueError("El monto debe ser positivo.")
+            if total_kwh < 0:
+                raise ValueError("Los kWh no pueden ser negativos.")
+
+        except ValueError as e:
+            await update.message.reply_text(escape_markdown_v2(f"Entrada inválida: {str(e)}. Ingresa un número válido (o 'monto,kwh' para luz). Intenta de nuevo:"),
+                                            reply_markup=boton_volver_menu('admin', 'admin_menu_facturacion'), parse_mode='MarkdownV2')
+            return ADMIN_REG_FACTURA_MONTO
+
+        registrar_factura_db(servicio_tipo, monto, propiedad_id, medidor_id, total_kwh)
+        await update.message.reply_text(escape_markdown_v2("Factura registrada."), reply_markup=teclado_admin_facturacion(), parse_mode='MarkdownV2')
+        if 'awaiting_kwh_input' in context.user_data: del context.user_data['awaiting_kwh_input']
+        return ConversationHandler.END
+
+async def handle_admin_reg_lectura_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Registrar lectura contador' y pide la propiedad."""
+    query = update.callback_query
+    await query.answer()
+    teclado = teclado_propiedades('lectprop_', 'admin_menu_facturacion')
+    if not teclado:
+        await query.edit_message_text(escape_markdown_v2("No hay propiedades registradas para registrar lecturas. Por favor, registra una propiedad primero."),
+                                      reply_markup=teclado_admin_facturacion(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+    await query.edit_message_text(escape_markdown_v2("Selecciona la propiedad para la cual registrarás la lectura:"),
+                                  reply_markup=teclado, parse_mode='MarkdownV2')
+    return ADMIN_REG_LECTURA_PROPIEDAD
+
+async def admin_reg_lectura_propiedad(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de propiedad para la lectura y muestra los medidores."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = int(query.data.split("_")[1])
+    context.user_data['lectura_propiedad_id'] = propiedad_id
+
+    teclado = teclado_medidores(propiedad_id, 'lectmed_', menu_volver='admin_menu_facturacion', mostrar_tipo=True)
+    if not teclado:
+        await query.edit_message_text(escape_markdown_v2("No hay medidores registrados para esta propiedad. Por favor, añade uno primero."),
+                                      reply_markup=boton_volver_menu('admin', 'admin_gestionar_propiedades'), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    await query.edit_message_text(escape_markdown_v2("Selecciona el medidor para el que registrarás la lectura:"),
+                                  reply_markup=teclado, parse_mode='MarkdownV2')
+    return ADMIN_REG_LECTURA_MEDIDOR_SELECT
+
+async def admin_reg_lectura_medidor_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de medidor para la lectura y pide el valor."""
+    query = update.callback_query
+    await query.answer()
+    medidor_id = int(query.data.split("_")[1])
+    context.user_data['lectura_medidor_id'] = medidor_id
+    medidor_info = obtener_medidor_por_id(medidor_id)
+    medidor_nombre = medidor_info[2] if medidor_info else "desconocido"
+    await query.edit_message_text(
+        escape_markdown_v2(f"Ingresa la lectura para el medidor '{escape_markdown_v2(medidor_nombre)}':"),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_facturacion'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_REG_LECTURA_VALOR
+
+async def admin_reg_lectura_valor(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la entrada del valor de la lectura y la registra."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    texto = update.effective_message.text.strip()
+    medidor_id = context.user_data.get('lectura_medidor_id')
+
+    if not medidor_id:
+        await update.message.reply_text(escape_markdown_v2("Error: No se seleccionó un medidor. Vuelve a intentarlo."),
+                                        reply_markup=teclado_admin_facturacion(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    try:
+        lectura = float(texto)
+        if lectura < 0:
+            raise ValueError("La lectura no puede ser negativa.")
+    except ValueError:
+        await update.message.reply_text(escape_markdown_v2("Lectura inválida. Ingresa un número válido. Intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('admin', 'admin_menu_facturacion'), parse_mode='MarkdownV2')
+        return ADMIN_REG_LECTURA_VALOR
+
+    registrar_lectura_db(medidor_id, lectura)
+    await update.message.reply_text(escape_markdown_v2("Lectura registrada."), reply_markup=teclado_admin_facturacion(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+# --- Handlers para enviar avisos ---
+
+def texto_seleccion_inquilino(titulo, inquilinos):
+    """Texto del paso de selección; si hay demasiados inquilinos para listarlos, indica usar la búsqueda."""
+    if len(inquilinos) <= MAX_INQUILINOS_EN_TECLADO:
+        return f"{titulo}\n(o usa 🔎 Buscar inquilino)"
+    return f"{titulo}\nHay demasiados inquilinos para listarlos: usa 🔎 Buscar inquilino y escribe parte del nombre, el CI o la propiedad."
+
+async def handle_admin_send_notice_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Enviar Aviso' y pide el alcance."""
+    query = update.callback_query
+    await query.answer()
+    await query.edit_message_text(
+        escape_markdown_v2("¿A quién deseas enviar el aviso?"),
+        reply_markup=teclado_send_notice_scope(), parse_mode='MarkdownV2'
+    )
+    return ADMIN_SEND_NOTICE_SCOPE
+
+async def admin_send_notice_scope_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del alcance del aviso (propiedad o inquilino específico)."""
+    query = update.callback_query
+    await query.answer()
+    scope = query.data.split("_")[2]
+    context.user_data['notice_scope'] = scope
+
+    if scope == 'property':
+        teclado = teclado_propiedades('noticeprop_', 'admin_menu_comunicacion')
+        if not teclado:
+            await query.edit_message_text(escape_markdown_v2("No hay propiedades registradas para enviar avisos. Por favor, registra una propiedad primero."),
+                                          reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+            return ConversationHandler.END
+        await query.edit_message_text(escape_markdown_v2("Selecciona la propiedad a la que enviar el aviso:"),
+                                      reply_markup=teclado, parse_mode='MarkdownV2')
+        return ADMIN_SEND_NOTICE_PROPERTY_SELECT
+    elif scope == 'single_inquilino':
+        inquilinos = obtener_inquilinos_para_seleccion(MAX_INQUILINOS_EN_TECLADO + 1)
+        if not inquilinos:
+            await query.edit_message_text(escape_markdown_v2("No hay inquilinos registrados para enviar avisos. Por favor, registra uno primero."),
+                                          reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+            return ConversationHandler.END
+        await query.edit_message_text(escape_markdown_v2(texto_seleccion_inquilino("Selecciona el inquilino al que enviar el aviso:", inquilinos)),
+                                      reply_markup=teclado_seleccion_inquilinos(inquilinos, 'noticeinq_', 'admin_menu_comunicacion'), parse_mode='MarkdownV2')
+        return ADMIN_SEND_NOTICE_INQUILINO_SELECT
+    else:
+        await query.edit_message_text(escape_markdown_v2("Opción inválida. Intenta de nuevo."), reply_markup=teclado_send_notice_scope(), parse_mode='MarkdownV2')
+        return ADMIN_SEND_NOTICE_SCOPE
+
+async def admin_send_notice_property_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de propiedad para enviar aviso."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = int(query.data.split("_")[1])
+    context.user_data['notice_target_id'] = propiedad_id
+    propiedad_info = obtener_propiedad_por_id(propiedad_id)
+    nombre_propiedad = propiedad_info[1] if propiedad_info else "Desconocida"
+    await query.edit_message_text(
+        escape_markdown_v2(f"Escribe el mensaje del aviso para todos los inquilinos de '{escape_markdown_v2(nombre_propiedad)}':"),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_comunicacion'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_SEND_NOTICE_MESSAGE
+
+async def pedir_mensaje_aviso_inquilino(message_editor, context, inquilino_chat_id):
+    """Guarda el inquilino destinatario del aviso y pide el mensaje."""
+    context.user_data['notice_scope'] = 'single_inquilino'
+    context.user_data['notice_target_id'] = inquilino_chat_id
+    inquilino_info = obtener_inquilino(inquilino_chat_id)
+    nombre_inquilino = inquilino_info[1] if inquilino_info else "Desconocido"
+    await message_editor(
+        escape_markdown_v2(f"Escribe el mensaje del aviso para '{escape_markdown_v2(nombre_inquilino)}':"),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_comunicacion'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_SEND_NOTICE_MESSAGE
+
+async def admin_send_notice_inquilino_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de inquilino para enviar aviso."""
+    query = update.callback_query
+    await query.answer()
+    return await pedir_mensaje_aviso_inquilino(query.edit_message_text, context, int(query.data.split("_")[1]))
+
+async def admin_send_notice_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Envía el aviso al/los inquilino/s seleccionado/s."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    notice_message = update.effective_message.text.strip()
+    scope = context.user_data.get('notice_scope')
+    target_id = context.user_data.get('notice_target_id')
+
+    if not notice_message:
+        await update.message.reply_text(escape_markdown_v2("El mensaje del aviso no puede estar vacío. Intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('admin', 'admin_menu_comunicacion'), parse_mode='MarkdownV2')
+        return ADMIN_SEND_NOTICE_MESSAGE
+
+    sent_count = 0
+    if scope == 'property':
+        inquilinos_en_propiedad = obtener_inquilinos_por_propiedad(target_id)
+        if not inquilinos_en_propiedad:
+            await update.message.reply_text(escape_markdown_v2("No hay inquilinos en esa propiedad para enviar el aviso."),
+                                            reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+            return ConversationHandler.END
+        for chat_id, nombre_inquilino, _ in inquilinos_en_propiedad:
+            try:
+                await context.bot.send_message(chat_id=chat_id, text=escape_markdown_v2(f"**AVISO DE LA ADMINISTRACIÓN**\n\n{escape_markdown_v2(notice_message)}"), parse_mode='MarkdownV2')
+                sent_count += 1
+                logger.info("Aviso enviado a inquilino %s (%s) en propiedad %s.", nombre_inquilino, chat_id, target_id)
+            except Exception as e:
+                logger.error("Error al enviar aviso a inquilino %s (%s): %s", nombre_inquilino, chat_id, e)
+        await update.message.reply_text(escape_markdown_v2(f"Aviso enviado a {sent_count} inquilino(s) de la propiedad."),
+                                        reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+    elif scope == 'single_inquilino':
+        try:
+            await context.bot.send_message(chat_id=target_id, text=escape_markdown_v2(f"**AVISO DE LA ADMINISTRACIÓN**\n\n{escape_markdown_v2(notice_message)}"), parse_mode='MarkdownV2')
+            sent_count += 1
+            logger.info("Aviso enviado a inquilino específico %s.", target_id)
+            await update.message.reply_text(escape_markdown_v2("Aviso enviado al inquilino."),
+                                            reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+        except Exception as e:
+            logger.error("Error al enviar aviso al inquilino %s: %s", target_id, e)
+            await update.message.reply_text(escape_markdown_v2("Error al enviar aviso al inquilino. Asegúrate de que el Chat ID sea correcto y que el bot haya interactuado con él antes."),
+                                            reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+    else:
+        await update.message.reply_text(escape_markdown_v2("Error: Alcance del aviso no definido. Intenta de nuevo."),
+                                        reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+
+    if 'notice_scope' in context.user_data: del context.user_data['notice_scope']
+    if 'notice_target_id' in context.user_data: del context.user_data['notice_target_id']
+
+    return ConversationHandler.END
+
+async def admin_show_accounting_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra un resumen contable del mes actual (pagos confirmados e ingresos)."""
+    query = update.callback_query
+    await query.answer()
+
+    summary_text = texto_resumen_contable()
+
+    await query.edit_message_text(
+        escape_markdown_v2(summary_text),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_facturacion'),
+        parse_mode='MarkdownV2'
+    )
+    return ConversationHandler.END
+
+# --- Reportes de varios meses ---
+
+def _parsear_rango_reporte(args):
+    """Interpreta los argumentos de /reporte: [desde] [hasta] [csv|xlsx], con meses 'YYYY-MM' o años 'YYYY'."""
+    formato = 'csv'
+    fechas = []
+    for arg in args:
+        if arg.lower() in ('csv', 'xlsx'):
+            formato = arg.lower()
+        else:
+            fechas.append(arg)
+    if not fechas:
+        fechas = [str(datetime.now().year)]
+    if len(fechas) > 2:
+        raise ValueError("Demasiados argumentos.")
+    for fecha in fechas:
+        datetime.strptime(fecha, "%Y-%m" if len(fecha) == 7 else "%Y")
+    desde = fechas[0] if len(fechas[0]) == 7 else f"{fechas[0]}-01"
+    hasta = fechas[-1] if len(fechas[-1]) == 7 else f"{fechas[-1]}-12"
+    if desde > hasta:
+        raise ValueError("El inicio del rango es posterior al final.")
+    return desde, hasta, formato
+
+async def _enviar_reporte(chat_id, context, desde, hasta, formato):
+    """Genera el reporte fuera del bucle de eventos y lo envía como documento."""
+    if formato == 'xlsx' and not xlsx_disponible():
+        await context.bot.send_message(chat_id, escape_markdown_v2("El formato XLSX no está disponible en el servidor. Se envía en CSV."), parse_mode='MarkdownV2')
+        formato = 'csv'
+    nombre_archivo, contenido = await asyncio.to_thread(generar_reporte_periodo, desde, hasta, formato)
+    await context.bot.send_document(
+        chat_id, document=contenido, filename=nombre_archivo,
+        caption=f"Ingresos, gastos y balance por propiedad y mes ({desde} a {hasta})."
+    )
+
+async def admin_reporte_periodo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Envía el reporte de un rango de meses como documento: /reporte [desde] [hasta] [csv|xlsx]."""
+    chat_id = update.effective_chat.id
+    if chat_id not in ADMIN_IDS:
+        return
+    try:
+        desde, hasta, formato = _parsear_rango_reporte(context.args or [])
+    except ValueError:
+        await update.message.reply_text(
+            escape_markdown_v2("Uso: /reporte [desde] [hasta] [csv|xlsx]. Ejemplos: /reporte 2024, /reporte 2024-01 2024-06 xlsx"),
+            parse_mode='MarkdownV2'
+        )
+        return
+    await _enviar_reporte(chat_id, context, desde, hasta, formato)
+
+async def handle_admin_reporte_anual_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Envía el reporte del año en curso desde el menú de facturación."""
+    query = update.callback_query
+    await query.answer()
+    if query.message.chat.id not in ADMIN_IDS:
+        return
+    year = datetime.now().year
+    await _enviar_reporte(query.message.chat.id, context, f"{year}-01", f"{year}-12", 'csv')
+
+# --- Búsqueda de quejas ---
+
+QUEJAS_POR_PAGINA = 5
+
+def _parsear_busqueda_quejas(args):
+    """Separa las palabras a buscar de los filtros prop:, desde:, hasta: y estado:."""
+    busqueda = {'terminos': [], 'propiedad_id': None, 'desde': None, 'hasta': None, 'resuelto': None}
+    for arg in args:
+        clave, _, valor = arg.partition(':')
+        clave = clave.lower()
+        if not valor or clave not in ('prop', 'desde', 'hasta', 'estado'):
+            busqueda['terminos'].append(arg)
+        elif clave == 'prop':
+            if valor.isdigit():
+                busqueda['propiedad_id'] = int(valor)
+            else:
+                # Los espacios del nombre se escriben como '_' (prop:Casa_Blanca); basta con el inicio del nombre
+                buscado = valor.replace('_', ' ').lower()
+                propiedades = [(p_id, nombre.lower()) for p_id, nombre, _, _, _ in obtener_propiedades()]
+                coincidencias = [p_id for p_id, nombre in propiedades if nombre == buscado] or \
+                    [p_id for p_id, nombre in propiedades if nombre.startswith(buscado)]
+                if len(coincidencias) != 1:
+                    raise ValueError(f"No existe la propiedad '{valor}'." if not coincidencias else f"Hay varias propiedades que empiezan con '{valor}'.")
+                busqueda['propiedad_id'] = coincidencias[0]
+        elif clave in ('desde', 'hasta'):
+            datetime.strptime(valor, "%Y-%m-%d")
+            busqueda[clave] = valor
+        elif valor.lower() in ('pendiente', 'pendientes'):
+            busqueda['resuelto'] = False
+        elif valor.lower() in ('resuelta', 'resueltas', 'resuelto', 'resueltos'):
+            busqueda['resuelto'] = True
+        else:
+            raise ValueError("El estado debe ser 'pendiente' o 'resuelta'.")
+    busqueda['terminos'] = ' '.join(busqueda['terminos'])
+    if not busqueda['terminos']:
+        raise ValueError("Indica al menos una palabra a buscar.")
+    return busqueda
+
+def _texto_pagina_quejas(busqueda, pagina):
+    """Arma el texto y el teclado de una página de resultados de búsqueda de quejas."""
+    filtros = {clave: busqueda[clave] for clave in ('propiedad_id', 'desde', 'hasta', 'resuelto')}
+    # Se pide una fila de más para saber si hay página siguiente
+    resultados = buscar_quejas(busqueda['terminos'], limite=QUEJAS_POR_PAGINA + 1, offset=pagina * QUEJAS_POR_PAGINA, **filtros)
+    hay_siguiente = len(resultados) > QUEJAS_POR_PAGINA
+    resultados = resultados[:QUEJAS_POR_PAGINA]
+
+    if not resultados:
+        texto = f"No se encontraron quejas para «{busqueda['terminos']}»."
+    else:
+        texto = f"🔎 Quejas para «{busqueda['terminos']}» (página {pagina + 1}):\n\n"
+        for queja_id, fecha, resuelto, nombre_inquilino, nombre_propiedad, fragmento in resultados:
+            estado = "resuelta" if resuelto else "pendiente"
+            propiedad = f" ({nombre_propiedad})" if nombre_propiedad else ""
+            texto += f"#{queja_id} {fecha} - {nombre_inquilino}{propiedad} - {estado}\n  {fragmento}\n\n"
+
+    navegacion = []
+    if pagina > 0:
+        navegacion.append(InlineKeyboardButton("◀ Anterior", callback_data=datos_callback('bq', pagina - 1)))
+    if hay_siguiente:
+        navegacion.append(InlineKeyboardButton("Siguiente ▶", callback_data=datos_callback('bq', pagina + 1)))
+    return texto, InlineKeyboardMarkup([navegacion]) if navegacion else None
+
+async def admin_buscar_quejas(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Busca quejas por texto: /buscar_quejas <palabras> [prop:<id|nombre>] [desde:AAAA-MM-DD] [hasta:AAAA-MM-DD] [estado:pendiente|resuelta]."""
+    if update.effective_chat.id not in ADMIN_IDS:
+        return
+    try:
+        busqueda = _parsear_busqueda_quejas(context.args or [])
+    except ValueError as e:
+        await update.message.reply_text(
+            escape_markdown_v2(f"{e}\nUso: /buscar_quejas <palabras> [prop:<id o nombre_con_guiones>] [desde:AAAA-MM-DD] [hasta:AAAA-MM-DD] [estado:pendiente|resuelta]"),
+            parse_mode='MarkdownV2'
+        )
+        return
+    context.user_data['busqueda_quejas'] = busqueda
+    texto, teclado = _texto_pagina_quejas(busqueda, 0)
+    await update.message.reply_text(escape_markdown_v2(texto), reply_markup=teclado, parse_mode='MarkdownV2')
+
+async def admin_buscar_quejas_pagina(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra otra página de la última búsqueda de quejas."""
+    query = update.callback_query
+    await query.answer()
+    busqueda = context.user_data.get('busqueda_quejas')
+    if not busqueda:
+        await query.edit_message_text(escape_markdown_v2("La búsqueda expiró. Vuelve a usar /buscar_quejas."), parse_mode='MarkdownV2')
+        return
+    texto, teclado = _texto_pagina_quejas(busqueda, context.args[0])
+    await query.edit_message_text(escape_markdown_v2(texto), reply_markup=teclado, parse_mode='MarkdownV2')
+
+# --- Perfil de consultas SQL ---
+
+MAX_CONSULTAS_MOSTRADAS = 20
+LIMITE_MENSAJE = 4000 # Telegram rechaza mensajes de más de 4096 caracteres
+
+async def admin_consultas_sql(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra las consultas SQL más costosas y las últimas lentas de este worker: /consultas [n] [reiniciar]."""
+    if update.effective_chat.id not in ADMIN_IDS:
+        return
+    args = context.args or []
+    if 'reiniciar' in args:
+        query_profiler.reiniciar()
+        await update.message.reply_text(escape_markdown_v2("Estadísticas de consultas reiniciadas."), parse_mode='MarkdownV2')
+        return
+    n = min(int(args[0]), MAX_CONSULTAS_MOSTRADAS) if args and args[0].isdigit() else 10
+    # Sin parse_mode: el SQL trae '*' y '_', que escape_markdown_v2 deja como formato
+    texto = query_profiler.texto_resumen(n)
+    if len(texto) > LIMITE_MENSAJE:
+        texto = texto[:LIMITE_MENSAJE - 3] + "..."
+    await update.message.reply_text(texto)
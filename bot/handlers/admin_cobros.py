@@ -0,0 +1,182 @@
+"""Handlers de administrador para generar el cobro mensual.
+
+Se importa de forma diferida la primera vez que se usa este flujo."""
+
+import logging
+from datetime import datetime
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes, ConversationHandler
+
+from bot.billing import calcular_servicios_prorrateo
+from bot.db import actualizar_datos_inquilino, cursor, obtener_propiedad_por_id, registrar_cargo
+from bot.formatting import escape_markdown_v2
+from bot.keyboards import (
+    teclado_admin_comunicacion,
+    teclado_generar_cobro_mensual_scope,
+    teclado_propiedades,
+)
+from bot.states import (
+    ADMIN_GENERAR_COBRO_MENSUAL_CONFIRM,
+    ADMIN_GENERAR_COBRO_MENSUAL_PROPERTY_SELECT,
+    ADMIN_GENERAR_COBRO_MENSUAL_SCOPE,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- Handlers para generar cobro mensual (NUEVOS) ---
+
+async def handle_admin_generar_cobro_mensual_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Generar Cobro Mensual' y pide el alcance."""
+    query = update.callback_query
+    await query.answer()
+    await query.edit_message_text(
+        escape_markdown_v2("¿Para quién deseas generar el cobro mensual?"),
+        reply_markup=teclado_generar_cobro_mensual_scope(), parse_mode='MarkdownV2'
+    )
+    return ADMIN_GENERAR_COBRO_MENSUAL_SCOPE
+
+async def admin_generar_cobro_mensual_scope(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del alcance del cobro mensual (todos o por propiedad)."""
+    query = update.callback_query
+    await query.answer()
+    scope = query.data.split("_")[2]
+    context.user_data['charge_scope'] = scope
+
+    if scope == 'all':
+        await query.edit_message_text(
+            escape_markdown_v2("¿Estás seguro de que deseas generar el cobro mensual para *todos* los inquilinos registrados?"),
+            parse_mode='MarkdownV2',
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("Sí, generar para todos", callback_data='charge_confirm_all')],
+                [InlineKeyboardButton("No, cancelar", callback_data='charge_cancel')]
+            ])
+        )
+        return ADMIN_GENERAR_COBRO_MENSUAL_CONFIRM
+    elif scope == 'property':
+        teclado = teclado_propiedades('chargeprop_', 'admin_menu_comunicacion')
+        if not teclado:
+            await query.edit_message_text(escape_markdown_v2("No hay propiedades registradas para generar cobros. Por favor, registra una propiedad primero."),
+                                          reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+            return ConversationHandler.END
+        await query.edit_message_text(escape_markdown_v2("Selecciona la propiedad para la cual generar el cobro:"),
+                                      reply_markup=teclado, parse_mode='MarkdownV2')
+        return ADMIN_GENERAR_COBRO_MENSUAL_PROPERTY_SELECT
+    else:
+        await query.edit_message_text(escape_markdown_v2("Opción inválida. Intenta de nuevo."), reply_markup=teclado_generar_cobro_mensual_scope(), parse_mode='MarkdownV2')
+        return ADMIN_GENERAR_COBRO_MENSUAL_SCOPE
+
+async def admin_generar_cobro_mensual_property_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de propiedad para generar cobro mensual."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = int(query.data.split("_")[1])
+    context.user_data['charge_target_id'] = propiedad_id
+    propiedad_info = obtener_propiedad_por_id(propiedad_id)
+    nombre_propiedad = propiedad_info[1] if propiedad_info else "Desconocida"
+
+    await query.edit_message_text(
+        escape_markdown_v2(f"¿Estás seguro de que deseas generar el cobro mensual para los inquilinos de '{escape_markdown_v2(nombre_propiedad)}'?"),
+        reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("Sí, generar para esta propiedad", callback_data='charge_confirm_property')],
+            [InlineKeyboardButton("No, cancelar", callback_data='charge_cancel')]
+        ]),
+        parse_mode='MarkdownV2'
+    )
+    return ADMIN_GENERAR_COBRO_MENSUAL_CONFIRM
+
+async def admin_generar_cobro_mensual_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Confirma y ejecuta la generación del cobro mensual."""
+    query = update.callback_query
+    await query.answer()
+    scope = context.user_data.get('charge_scope')
+    target_id = context.user_data.get('charge_target_id')
+    
+    current_year = datetime.now().year
+    current_month = datetime.now().month
+
+    if query.data == 'charge_cancel':
+        await query.edit_message_text(escape_markdown_v2("Generación de cobro mensual cancelada."), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    inquilinos_a_cobrar = []
+    if scope == 'all':
+        cursor.execute("SELECT chat_id, nombre, num_personas, propiedad_id, monto_alquiler, tipo_alquiler, medidor_asignado_luz_id, medidor_asignado_agua_id, medidor_asignado_gas_id, saldo FROM inquilinos WHERE fecha_ingreso IS NOT NULL") # Solo inquilinos con registro completo
+        inquilinos_a_cobrar = cursor.fetchall()
+    elif scope == 'property' and target_id:
+        cursor.execute("SELECT chat_id, nombre, num_personas, propiedad_id, monto_alquiler, tipo_alquiler, medidor_asignado_luz_id, medidor_asignado_agua_id, medidor_asignado_gas_id, saldo FROM inquilinos WHERE propiedad_id = ? AND fecha_ingreso IS NOT NULL", (target_id,)) # Solo inquilinos con registro completo
+        inquilinos_a_cobrar = cursor.fetchall()
+    
+    if not inquilinos_a_cobrar:
+        logger.info("No inquilinos encontrados para generar cobro mensual. Scope: %s, Target ID: %s", scope, target_id)
+        await query.edit_message_text(escape_markdown_v2("No se encontraron inquilinos con registro completo para generar el cobro en el alcance seleccionado. Asegúrate de que los inquilinos estén completamente registrados (con fecha de ingreso, monto de alquiler, etc.)."), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    cobros_generados = 0
+    datos_prorrateo = {} # Facturas y personas por propiedad y medidor, compartidas entre los inquilinos
+    for inquilino_data in inquilinos_a_cobrar:
+        chat_id = inquilino_data[0]
+        nombre_inquilino = inquilino_data[1]
+        num_personas_inquilino = inquilino_data[2] if inquilino_data[2] is not None else 1
+        propiedad_id = inquilino_data[3]
+        monto_alquiler = inquilino_data[4] if inquilino_data[4] is not None else 0.0
+        tipo_alquiler = inquilino_data[5]
+        medidor_luz_individual_id = inquilino_data[6]
+        medidor_agua_main_id = inquilino_data[7]
+        medidor_gas_main_id = inquilino_data[8]
+        saldo_actual = inquilino_data[9] if inquilino_data[9] is not None else 0.0
+        
+        total_a_cobrar = monto_alquiler
+        detalle_cobro = f"Cobro mensual para {escape_markdown_v2(nombre_inquilino)} (ID: {chat_id}):\n\n"
+        detalle_cobro += f"- Alquiler base: {monto_alquiler:.2f} Bs.\n"
+
+        if tipo_alquiler == 'prorrateo':
+            detalle_cobro += "\n*Detalle de Servicios (Mes anterior):*\n"
+            total_servicios_prorrateo, detalle_servicios = calcular_servicios_prorrateo(
+                propiedad_id, num_personas_inquilino, medidor_luz_individual_id,
+                medidor_agua_main_id, medidor_gas_main_id, current_year, current_month, cache=datos_prorrateo
+            )
+            detalle_cobro += detalle_servicios
+
+            total_a_cobrar += total_servicios_prorrateo
+            detalle_cobro += f"\nTotal servicios: {total_servicios_prorrateo:.2f} Bs.\n"
+
+        detalle_cobro += f"\n*Total a cobrar este mes: {total_a_cobrar:.2f} Bs.*"
+        
+        # Actualizar el saldo del inquilino
+        nuevo_saldo = saldo_actual + total_a_cobrar
+        actualizar_datos_inquilino(chat_id, saldo=nuevo_saldo)
+        if total_a_cobrar > 0:
+            registrar_cargo(
+                chat_id, total_a_cobrar, f"Cobro mensual {datetime.now().strftime('%Y-%m')}",
+                propiedad_id=propiedad_id, monto_alquiler=monto_alquiler
+            )
+        
+        detalle_cobro += f"\nTu nuevo saldo pendiente es: {nuevo_saldo:.2f} Bs."
+
+        try:
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=escape_markdown_v2(detalle_cobro),
+                parse_mode='MarkdownV2'
+            )
+            cobros_generados += 1
+            logger.info("Cobro mensual generado y enviado a %s (%s).", nombre_inquilino, chat_id)
+        except Exception as e:
+            logger.error("Error al enviar cobro mensual a %s (%s): %s", nombre_inquilino, chat_id, e)
+    
+    if cobros_generados > 0:
+        await query.edit_message_text(
+            escape_markdown_v2(f"✅ Cobro mensual generado y enviado a *{cobros_generados} inquilino(s)*."),
+            reply_markup=teclado_admin_comunicacion(),
+            parse_mode='MarkdownV2'
+        )
+    else:
+        # This branch is reached if inquilinos_a_cobrar was not empty, but no messages were sent.
+        # This could happen if there were errors sending messages to all tenants.
+        await query.edit_message_text(
+            escape_markdown_v2("⚠️ No se pudo generar o enviar cobros a los inquilinos. Verifica los logs para más detalles. Asegúrate de que los inquilinos estén completamente registrados y que las facturas y lecturas estén al día."),
+            reply_markup=teclado_admin_comunicacion(),
+            parse_mode='MarkdownV2'
+        )
+    return ConversationHandler.END
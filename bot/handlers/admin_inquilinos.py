@@ -0,0 +1,663 @@
+"""Handlers de administrador para gestionar inquilinos (completar registro, alta manual, modificar y eliminar).
+
+Se importa de forma diferida la primera vez que se usa uno de estos flujos."""
+
+import logging
+from datetime import datetime
+
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Update,
+)
+from telegram.ext import ContextTypes, ConversationHandler
+from telegram.helpers import create_deep_linked_url
+
+from bot.config import ADMIN_IDS
+from bot.db import (
+    actualizar_datos_inquilino,
+    agregar_inquilino,
+    buscar_inquilinos,
+    cursor,
+    eliminar_inquilino_db,
+    obtener_inquilino,
+    obtener_inquilinos_para_seleccion,
+    obtener_propiedad_por_id,
+)
+from bot.formatting import escape_markdown_v2
+from bot.handlers.admin import pedir_mensaje_aviso_inquilino, texto_seleccion_inquilino
+from bot.keyboards import (
+    MAX_INQUILINOS_EN_TECLADO,
+    boton_volver_menu,
+    teclado_admin,
+    teclado_admin_inquilinos,
+    teclado_medidores,
+    teclado_modificar_inquilino_campos,
+    teclado_propiedades,
+    teclado_seleccion_inquilinos,
+)
+from bot.states import (
+    ADMIN_ELIMINAR_INQUILINO_CONFIRM,
+    ADMIN_ELIMINAR_INQUILINO_SELECT,
+    ADMIN_MODIFICAR_INQUILINO_FIELD,
+    ADMIN_MODIFICAR_INQUILINO_SELECT,
+    ADMIN_MODIFICAR_INQUILINO_VALUE,
+    ADMIN_REG_ALQUILER,
+    ADMIN_REG_FECHA,
+    ADMIN_REG_INQUILINO_PROPIEDAD,
+    ADMIN_REG_INQUILINO_SELECT,
+    ADMIN_REG_INQ_MEDIDOR_AGUA,
+    ADMIN_REG_INQ_MEDIDOR_GAS,
+    ADMIN_REG_INQ_MEDIDOR_LUZ,
+    ADMIN_REG_NUM_PERSONAS,
+    ADMIN_REG_TIPO_ALQ,
+    NOMBRE,
+    REGISTRAR_CI,
+)
+
+logger = logging.getLogger(__name__)
+
+RESULTADOS_BUSQUEDA_INLINE = 20 # Telegram admite hasta 50 resultados por consulta inline
+
+async def handle_admin_reg_inquilino_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Completar registro de inquilino' y muestra la lista de pendientes."""
+    query = update.callback_query
+    await query.answer()
+    cursor.execute("SELECT chat_id, nombre, ci FROM inquilinos WHERE fecha_ingreso IS NULL")
+    pendientes = cursor.fetchall()
+    if not pendientes:
+        await query.edit_message_text(
+            escape_markdown_v2("No hay inquilinos pendientes de completar registro."),
+            reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    buttons = [
+        [InlineKeyboardButton(escape_markdown_v2(f"{nom} (CI: {ci})"), callback_data=f"reginqui_{cid}")]
+        for cid, nom, ci in pendientes
+    ]
+    buttons.append([InlineKeyboardButton("Volver", callback_data='admin_menu_inquilinos')])
+    await query.edit_message_text(
+        escape_markdown_v2("Selecciona un inquilino para completar registro:"),
+        reply_markup=InlineKeyboardMarkup(buttons), parse_mode='MarkdownV2'
+    )
+    return ADMIN_REG_INQUILINO_SELECT
+
+async def handle_reginqui_selection_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de un inquilino pendiente por el admin."""
+    query = update.callback_query
+    await query.answer()
+    cid = int(query.data.split("_")[1])
+    context.user_data['reginqui_chatid'] = cid
+    await query.edit_message_text(
+        escape_markdown_v2("Ingresa la fecha de ingreso (YYYY-MM-DD):"),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_inquilinos'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_REG_FECHA
+
+async def admin_reg_fecha(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la entrada de la fecha de ingreso para el registro de inquilinos."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    texto = update.effective_message.text.strip()
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    if not chat_id_reg:
+        await message_editor(escape_markdown_v2("Error: No se encontró el inquilino. Por favor, vuelve a intentar desde el menú admin."),
+                                        reply_markup=teclado_admin(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+    try:
+        datetime.strptime(texto, '%Y-%m-%d')
+    except ValueError:
+        await message_editor(escape_markdown_v2("Fecha inválida. Usa formato YYYY-MM-DD. Intenta de nuevo:"), parse_mode='MarkdownV2')
+        return ADMIN_REG_FECHA
+    actualizar_datos_inquilino(chat_id_reg, fecha_ingreso=texto)
+    context.user_data['reg_fecha'] = texto
+    await update.message.reply_text( # Usar reply_text aquí porque es una respuesta a un mensaje de texto
+        escape_markdown_v2("Fecha guardada. Ahora ingresa el monto del alquiler:"),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_inquilinos'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_REG_ALQUILER
+
+async def admin_reg_monto(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la entrada del monto del alquiler para el registro de inquilinos."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    texto = update.effective_message.text.strip()
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    if not chat_id_reg:
+        await message_editor(escape_markdown_v2("Error: No se encontró el inquilino. Por favor, vuelve a intentar desde el menú admin."),
+                                        reply_markup=teclado_admin(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+    try:
+        monto = float(texto)
+        if monto <= 0:
+            raise ValueError("El monto debe ser positivo.")
+    except ValueError:
+        await update.message.reply_text(escape_markdown_v2("Monto inválido. Ingresa un número válido y positivo. Intenta de nuevo:"), parse_mode='MarkdownV2')
+        return ADMIN_REG_ALQUILER
+    actualizar_datos_inquilino(chat_id_reg, monto_alquiler=monto)
+    await update.message.reply_text( # Usar reply_text aquí porque es una respuesta a un mensaje de texto
+        escape_markdown_v2("Monto guardado. Ahora selecciona el tipo de alquiler:"),
+        reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("Todo incluido", callback_data='tipo_todo')],
+            [InlineKeyboardButton("Prorrateo servicios", callback_data='tipo_prorrateo')],
+        ]), parse_mode='MarkdownV2'
+    )
+    return ADMIN_REG_TIPO_ALQ
+
+async def admin_reg_tipo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del tipo de alquiler y pide la propiedad."""
+    query = update.callback_query
+    await query.answer()
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    if not chat_id_reg:
+        await query.edit_message_text(escape_markdown_v2("Error: No se encontró el inquilino. Por favor, vuelve a intentar desde el menú admin."),
+                                      reply_markup=teclado_admin(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    tipo = query.data.split("_")[1]
+    context.user_data['reginqui_tipo_alquiler'] = tipo
+    actualizar_datos_inquilino(chat_id_reg, tipo_alquiler=tipo)
+
+    teclado = teclado_propiedades('propiedad_sel_', 'admin_menu_inquilinos')
+    if not teclado:
+        await query.edit_message_text(escape_markdown_v2("No hay propiedades registradas. Por favor, registra una propiedad primero."),
+                                      reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    await query.edit_message_text(escape_markdown_v2("Selecciona la propiedad para este inquilino:"),
+                                  reply_markup=teclado, parse_mode='MarkdownV2')
+    return ADMIN_REG_INQUILINO_PROPIEDAD
+
+async def admin_reg_inquilino_propiedad(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de propiedad para el inquilino."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = int(query.data.split("_")[2])
+    context.user_data['reginqui_propiedad_id'] = propiedad_id
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    actualizar_datos_inquilino(chat_id_reg, propiedad_id=propiedad_id)
+
+    await query.edit_message_text(
+        escape_markdown_v2("Ingresa el número de personas que vivirán con el inquilino (incluyéndolo a él):"),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_inquilinos'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_REG_NUM_PERSONAS
+
+async def admin_reg_num_personas(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la entrada del número de personas para el inquilino."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    texto = update.effective_message.text.strip()
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    try:
+        num_personas = int(texto)
+        if num_personas <= 0:
+            raise ValueError("El número de personas debe ser positivo.")
+    except ValueError:
+        await update.message.reply_text(escape_markdown_v2("Número inválido. Ingresa un número entero positivo. Intenta de nuevo:"), parse_mode='MarkdownV2')
+        return ADMIN_REG_NUM_PERSONAS
+
+    actualizar_datos_inquilino(chat_id_reg, num_personas=num_personas)
+    context.user_data['reginqui_num_personas'] = num_personas
+
+    tipo_alquiler = context.user_data.get('reginqui_tipo_alquiler')
+    propiedad_id = context.user_data.get('reginqui_propiedad_id')
+
+    if tipo_alquiler == 'prorrateo':
+        # Usar edit_message_text si la interacción previa fue un callback, sino reply_text
+        if update.callback_query:
+            return await _ask_for_medidor(update, context, 'luz', editor_func=update.callback_query.edit_message_text)
+        else:
+            return await _ask_for_medidor(update, context, 'luz', editor_func=update.message.reply_text)
+    else: # Todo incluido
+        if update.callback_query:
+            await update.callback_query.edit_message_text(escape_markdown_v2("Registro completo para el inquilino."), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+        else:
+            await update.message.reply_text(escape_markdown_v2("Registro completo para el inquilino."), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+        await send_welcome_and_wifi_key_to_inquilino(context, chat_id_reg, propiedad_id)
+        return ConversationHandler.END
+
+async def _ask_for_medidor(update: Update, context: ContextTypes.DEFAULT_TYPE, service_type: str, editor_func):
+    """Helper function to ask for medidor for a given service type."""
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    propiedad_id = context.user_data.get('reginqui_propiedad_id')
+
+    teclado = teclado_medidores(
+        propiedad_id, f"med{service_type}_sel_", service_type, 'admin_menu_inquilinos',
+        extra=(("Ninguno", f"med{service_type}_sel_none"),)
+    )
+    
+    current_state = {
+        'luz': ADMIN_REG_INQ_MEDIDOR_LUZ,
+        'agua': ADMIN_REG_INQ_MEDIDOR_AGUA,
+        'gas': ADMIN_REG_INQ_MEDIDOR_GAS
+    }
+    
+    next_service_type = {
+        'luz': 'agua',
+        'agua': 'gas',
+        'gas': None
+    }
+
+    if teclado:
+        message_text = escape_markdown_v2(f"Selecciona el medidor de *{service_type.upper()}* asignado a este inquilino:")
+        
+        await editor_func(message_text, reply_markup=teclado, parse_mode='MarkdownV2')
+        
+        return current_state[service_type]
+    else:
+        if service_type == 'luz':
+            actualizar_datos_inquilino(chat_id_reg, medidor_asignado_luz_id=None)
+        elif service_type == 'agua':
+            actualizar_datos_inquilino(chat_id_reg, medidor_asignado_agua_id=None)
+        elif service_type == 'gas':
+            actualizar_datos_inquilino(chat_id_reg, medidor_asignado_gas_id=None)
+
+        message_text = escape_markdown_v2(f"No hay medidores de *{service_type.upper()}* para esta propiedad. ")
+        
+        if next_service_type[service_type]:
+            message_text += escape_markdown_v2(f"Continuar con *{next_service_type[service_type].capitalize()}*.")
+            await editor_func(message_text, parse_mode='MarkdownV2')
+            return await _ask_for_medidor(update, context, next_service_type[service_type], editor_func)
+        else:
+            message_text += escape_markdown_v2("Registro completo.")
+            await editor_func(message_text, reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+            await send_welcome_and_wifi_key_to_inquilino(context, chat_id_reg, propiedad_id)
+            return ConversationHandler.END
+
+async def admin_reg_inq_medidor_luz(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del medidor de luz para el inquilino."""
+    query = update.callback_query
+    await query.answer()
+
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    medidor_luz_id = int(query.data.split("_")[2]) if query.data != 'medluz_sel_none' else None
+    actualizar_datos_inquilino(chat_id_reg, medidor_asignado_luz_id=medidor_luz_id)
+    
+    return await _ask_for_medidor(update, context, 'agua', editor_func=query.edit_message_text)
+
+async def admin_reg_inq_medidor_agua(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del medidor de agua para el inquilino."""
+    query = update.callback_query
+    await query.answer()
+
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    medidor_agua_id = int(query.data.split("_")[2]) if query.data != 'medagua_sel_none' else None
+    actualizar_datos_inquilino(chat_id_reg, medidor_asignado_agua_id=medidor_agua_id)
+
+    return await _ask_for_medidor(update, context, 'gas', editor_func=query.edit_message_text)
+
+async def admin_reg_inq_medidor_gas(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del medidor de gas para el inquilino y finaliza el registro."""
+    query = update.callback_query
+    await query.answer()
+
+    chat_id_reg = context.user_data.get('reginqui_chatid')
+    propiedad_id = context.user_data.get('reginqui_propiedad_id')
+    medidor_gas_id = int(query.data.split("_")[2]) if query.data != 'medgas_sel_none' else None
+    actualizar_datos_inquilino(chat_id_reg, medidor_asignado_gas_id=medidor_gas_id)
+
+    await query.edit_message_text(
+        escape_markdown_v2("Registro completo para el inquilino."), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2'
+    )
+    await send_welcome_and_wifi_key_to_inquilino(context, chat_id_reg, propiedad_id)
+    return ConversationHandler.END
+
+async def send_welcome_and_wifi_key_to_inquilino(context: ContextTypes.DEFAULT_TYPE, chat_id_inquilino, propiedad_id):
+    """Envía un mensaje de bienvenida, la clave de Wi-Fi y la fecha de pago al inquilino."""
+    inquilino_info = obtener_inquilino(chat_id_inquilino)
+    propiedad = obtener_propiedad_por_id(propiedad_id)
+
+    if not inquilino_info:
+        logger.error("No se encontró información del inquilino para enviar bienvenida: %s", chat_id_inquilino)
+        return
+
+    welcome_message = f"¡Hola {escape_markdown_v2(inquilino_info[1])}! Tu registro ha sido completado por el administrador.\n\n"
+
+    if inquilino_info[3]: # fecha_ingreso
+        try:
+            fecha_ingreso_dt = datetime.strptime(inquilino_info[3], '%Y-%m-%d')
+            dia_pago = fecha_ingreso_dt.day
+            welcome_message += f"Tu fecha de pago mensual es el día {dia_pago} de cada mes.\n\n"
+        except ValueError:
+            logger.error("Fecha de ingreso inválida para inquilino %s: %s", chat_id_inquilino, inquilino_info[3])
+
+    if propiedad:
+        wifi_ssid = propiedad[3] if propiedad[3] else 'No asignado'
+        wifi_password = propiedad[4] if propiedad[4] else 'No asignado'
+        welcome_message += f"Detalles de tu propiedad:\n" \
+                           f"  - Red Wi-Fi (SSID): `{escape_markdown_v2(wifi_ssid)}`\n" \
+                           f"  - Contraseña Wi-Fi: `{escape_markdown_v2(wifi_password)}`\n\n"
+    
+    welcome_message += "Con este bot podrás:\n" \
+                       "- Consultar tu saldo y pagos.\n" \
+                       "- Amortizar tu alquiler.\n" " - Enviar quejas o sugerencias.\n" \
+                       "- Ver los detalles de tu propiedad.\n\n" \
+                       "Usa /start para acceder a tu menú."
+
+    try:
+        await context.bot.send_message(
+            chat_id=chat_id_inquilino,
+            text=escape_markdown_v2(welcome_message),
+            parse_mode='MarkdownV2'
+        )
+        logger.info("Mensaje de bienvenida y Wi-Fi enviado a inquilino %s.", chat_id_inquilino)
+    except Exception as e:
+        logger.error("Error al enviar mensaje de bienvenida a %s: %s", chat_id_inquilino, e)
+
+async def handle_admin_nuevo_inquilino_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Añadir nuevo inquilino (manual)'."""
+    query = update.callback_query
+    await query.answer()
+    await query.edit_message_text(
+        escape_markdown_v2("Por favor, ingresa el nombre completo del nuevo inquilino para añadirlo manualmente:"),
+        reply_markup=boton_volver_menu('admin', 'admin_menu_inquilinos'), parse_mode='MarkdownV2'
+    )
+    return NOMBRE
+
+async def obtener_nombre_manual(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene el nombre del inquilino para el registro manual del admin."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    nombre = update.effective_message.text.strip()
+    if not nombre:
+        await update.message.reply_text(escape_markdown_v2("El nombre no puede estar vacío, intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('admin', 'admin_menu_inquilinos'), parse_mode='MarkdownV2')
+        return NOMBRE
+    context.user_data['nombre_manual'] = nombre
+
+    await update.message.reply_text(escape_markdown_v2(f"Nombre '{escape_markdown_v2(nombre)}' guardado. Ahora ingresa el Chat ID de Telegram del inquilino (debe ser un número):"),
+                                    reply_markup=boton_volver_menu('admin', 'admin_menu_inquilinos'), parse_mode='MarkdownV2')
+    return REGISTRAR_CI
+
+async def obtener_chat_id_manual(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene el Chat ID del inquilino para el registro manual del admin."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    chat_id_str = update.effective_message.text.strip()
+    nombre = context.user_data.get('nombre_manual')
+
+    try:
+        chat_id_nuevo = int(chat_id_str)
+        if chat_id_nuevo <= 0:
+            raise ValueError("El Chat ID debe ser un número positivo.")
+    except ValueError:
+        await update.message.reply_text(escape_markdown_v2("Chat ID inválido. Ingresa un número entero válido. Intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('admin', 'admin_menu_inquilinos'), parse_mode='MarkdownV2')
+        return REGISTRAR_CI
+
+    agregar_inquilino(chat_id_nuevo, nombre, "PENDIENTE_CI")
+
+    await update.message.reply_text(escape_markdown_v2(f"Inquilino '{escape_markdown_v2(nombre)}' con Chat ID '{chat_id_nuevo}' agregado correctamente. "
+                                     "Recuerda que aún debes completar su registro (fecha de ingreso, monto, tipo, propiedad, medidor) "
+                                     "desde la opción 'Completar registro de inquilino' en el menú de administrador."),
+                                     reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def handle_admin_eliminar_inquilino_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Eliminar inquilino' y muestra la lista (o la búsqueda, si son muchos)."""
+    query = update.callback_query
+    await query.answer()
+    inquilinos = obtener_inquilinos_para_seleccion(MAX_INQUILINOS_EN_TECLADO + 1)
+    if not inquilinos:
+        await query.edit_message_text(
+            escape_markdown_v2("No hay inquilinos para eliminar."),
+            reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    await query.edit_message_text(
+        escape_markdown_v2(texto_seleccion_inquilino("Selecciona el inquilino a eliminar:", inquilinos)),
+        reply_markup=teclado_seleccion_inquilinos(inquilinos, 'delinqui_', 'admin_menu_inquilinos'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_ELIMINAR_INQUILINO_SELECT
+
+async def _pedir_confirmacion_eliminacion(message_editor, context, chat_id_eliminar):
+    """Guarda el inquilino a eliminar y pide confirmación."""
+    context.user_data['eliminar_chat_id'] = chat_id_eliminar
+    inquilino_info = obtener_inquilino(chat_id_eliminar)
+    nombre_inquilino = inquilino_info[1] if inquilino_info else "Desconocido"
+
+    keyboard = [
+        [InlineKeyboardButton("Sí, eliminar", callback_data='confirm_del_inquilino')],
+        [InlineKeyboardButton("No, cancelar", callback_data='cancel_del_inquilino')]
+    ]
+    await message_editor(
+        escape_markdown_v2(f"¿Estás seguro de que quieres eliminar a {escape_markdown_v2(nombre_inquilino)} (Chat ID: {chat_id_eliminar}) y todos sus registros?"),
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode='MarkdownV2'
+    )
+    return ADMIN_ELIMINAR_INQUILINO_CONFIRM
+
+async def admin_eliminar_inquilino_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de inquilino a eliminar y pide confirmación."""
+    query = update.callback_query
+    await query.answer()
+    return await _pedir_confirmacion_eliminacion(query.edit_message_text, context, int(query.data.split("_")[1]))
+
+async def admin_eliminar_inquilino_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Confirma y ejecuta la eliminación del inquilino."""
+    query = update.callback_query
+    await query.answer()
+    chat_id_eliminar = context.user_data.get('eliminar_chat_id')
+
+    if query.data == 'confirm_del_inquilino':
+        if eliminar_inquilino_db(chat_id_eliminar):
+            await query.edit_message_text(escape_markdown_v2(f"Inquilino (Chat ID: {chat_id_eliminar}) eliminado correctamente."),
+                                          reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+        else:
+            await query.edit_message_text(escape_markdown_v2(f"Error al eliminar inquilino (Chat ID: {chat_id_eliminar}). Intenta de nuevo."),
+                                          reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+    else:
+        await query.edit_message_text(escape_markdown_v2("Eliminación cancelada."), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+
+    return ConversationHandler.END
+
+# --- Handlers para modificar inquilino ---
+
+async def handle_admin_modificar_inquilino_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Modificar datos de inquilino' y muestra la lista (o la búsqueda, si son muchos)."""
+    query = update.callback_query
+    await query.answer()
+    inquilinos = obtener_inquilinos_para_seleccion(MAX_INQUILINOS_EN_TECLADO + 1)
+    if not inquilinos:
+        await query.edit_message_text(
+            escape_markdown_v2("No hay inquilinos para modificar."),
+            reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    await query.edit_message_text(
+        escape_markdown_v2(texto_seleccion_inquilino("Selecciona el inquilino a modificar:", inquilinos)),
+        reply_markup=teclado_seleccion_inquilinos(inquilinos, 'modinq_', 'admin_menu_inquilinos'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_MODIFICAR_INQUILINO_SELECT
+
+async def _pedir_campo_modificacion(message_editor, context, chat_id_modificar):
+    """Guarda el inquilino a modificar y pide el campo."""
+    context.user_data['mod_inq_chat_id'] = chat_id_modificar
+    inquilino_info = obtener_inquilino(chat_id_modificar)
+    nombre_inquilino = inquilino_info[1] if inquilino_info else "Desconocido"
+
+    await message_editor(
+        escape_markdown_v2(f"¿Qué dato de {escape_markdown_v2(nombre_inquilino)} (ID: {chat_id_modificar}) deseas modificar?"),
+        reply_markup=teclado_modificar_inquilino_campos(), parse_mode='MarkdownV2'
+    )
+    return ADMIN_MODIFICAR_INQUILINO_FIELD
+
+async def admin_modificar_inquilino_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de inquilino a modificar y pide el campo."""
+    query = update.callback_query
+    await query.answer()
+    return await _pedir_campo_modificacion(query.edit_message_text, context, int(query.data.split("_")[1]))
+
+async def admin_modificar_inquilino_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del campo a modificar y pide el nuevo valor."""
+    query = update.callback_query
+    await query.answer()
+    field_to_modify = query.data.split("_")[2]
+    context.user_data['mod_inq_field'] = field_to_modify
+    chat_id_modificar = context.user_data.get('mod_inq_chat_id')
+
+    prompt_message = ""
+    reply_markup = boton_volver_menu('admin', 'admin_modificar_inquilino')
+    if field_to_modify == 'nombre':
+        prompt_message = escape_markdown_v2("Ingresa el nuevo nombre completo:")
+    elif field_to_modify == 'ci':
+        prompt_message = escape_markdown_v2("Ingresa el nuevo número de carnet de identidad:")
+    elif field_to_modify == 'fecha_ingreso':
+        prompt_message = escape_markdown_v2("Ingresa la nueva fecha de ingreso (YYYY-MM-DD):")
+    elif field_to_modify == 'monto_alquiler':
+        prompt_message = escape_markdown_v2("Ingresa el nuevo monto de alquiler:")
+    elif field_to_modify == 'num_personas':
+        prompt_message = escape_markdown_v2("Ingresa el nuevo número de personas:")
+    elif field_to_modify == 'tipo_alquiler':
+        prompt_message = escape_markdown_v2("Selecciona el nuevo tipo de alquiler:")
+        reply_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("Todo incluido", callback_data='mod_val_tipo_todo')],
+            [InlineKeyboardButton("Prorrateo servicios", callback_data='mod_val_tipo_prorrateo')],
+        ])
+    elif field_to_modify == 'propiedad_id':
+        reply_markup = teclado_propiedades('mod_val_prop_', extra=(("Ninguna", 'mod_val_prop_none'),))
+        if not reply_markup:
+            await query.edit_message_text(escape_markdown_v2("No hay propiedades para asignar. Asigna una propiedad primero."), reply_markup=boton_volver_menu('admin', 'admin_modificar_inquilino'), parse_mode='MarkdownV2')
+            return ADMIN_MODIFICAR_INQUILINO_FIELD
+        prompt_message = escape_markdown_v2("Selecciona la nueva propiedad:")
+    elif field_to_modify in ['medidor_luz_id', 'medidor_agua_id', 'medidor_gas_id']:
+        tipo_servicio = field_to_modify.replace('medidor_', '').replace('_id', '')
+        inquilino = obtener_inquilino(chat_id_modificar)
+        propiedad_id = inquilino[7]
+        if not propiedad_id:
+            await query.edit_message_text(escape_markdown_v2("El inquilino no tiene una propiedad asignada. Asigna una propiedad primero."), reply_markup=boton_volver_menu('admin', 'admin_modificar_inquilino'), parse_mode='MarkdownV2')
+            return ADMIN_MODIFICAR_INQUILINO_FIELD
+        reply_markup = teclado_medidores(propiedad_id, 'mod_val_med_', tipo_servicio, extra=(("Ninguno", 'mod_val_med_none'),))
+        if not reply_markup:
+            await query.edit_message_text(escape_markdown_v2(f"No hay medidores de {escape_markdown_v2(tipo_servicio.capitalize())} para la propiedad de este inquilino."), reply_markup=boton_volver_menu('admin', 'admin_modificar_inquilino'), parse_mode='MarkdownV2')
+            return ADMIN_MODIFICAR_INQUILINO_FIELD
+        prompt_message = escape_markdown_v2(f"Selecciona el nuevo medidor de {escape_markdown_v2(tipo_servicio.capitalize())}:")
+    else:
+        await query.edit_message_text(escape_markdown_v2("Campo no reconocido para modificar."), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    await query.edit_message_text(prompt_message, reply_markup=reply_markup, parse_mode='MarkdownV2')
+    return ADMIN_MODIFICAR_INQUILINO_VALUE
+
+async def admin_modificar_inquilino_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Recibe el nuevo valor y actualiza el dato del inquilino."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    chat_id_modificar = context.user_data.get('mod_inq_chat_id')
+    field_to_modify = context.user_data.get('mod_inq_field')
+    new_value = None
+    update_success = False
+    message_text = escape_markdown_v2("Dato actualizado correctamente.")
+
+    if update.message and update.message.text:
+        new_value_str = update.message.text.strip()
+    elif update.callback_query:
+        new_value_str = update.callback_query.data.split("_")[-1]
+    else:
+        await message_editor(
+            escape_markdown_v2("Entrada inválida. Por favor, intenta de nuevo."),
+            reply_markup=boton_volver_menu('admin', 'admin_modificar_inquilino'), parse_mode='MarkdownV2'
+        )
+        return ADMIN_MODIFICAR_INQUILINO_VALUE
+
+    try:
+        if field_to_modify in ['nombre', 'ci']:
+            new_value = new_value_str
+        elif field_to_modify == 'fecha_ingreso':
+            datetime.strptime(new_value_str, '%Y-%m-%d')
+            new_value = new_value_str
+        elif field_to_modify == 'monto_alquiler':
+            new_value = float(new_value_str)
+            if new_value <= 0: raise ValueError("El monto debe ser positivo.")
+        elif field_to_modify == 'num_personas':
+            new_value = int(new_value_str)
+            if new_value <= 0: raise ValueError("El número de personas debe ser positivo.")
+        elif field_to_modify == 'tipo_alquiler':
+            new_value = new_value_str
+        elif field_to_modify == 'propiedad_id':
+            new_value = int(new_value_str) if new_value_str != 'none' else None
+        elif field_to_modify in ['medidor_luz_id', 'medidor_agua_id', 'medidor_gas_id']:
+            new_value = int(new_value_str) if new_value_str != 'none' else None
+        else:
+            message_text = escape_markdown_v2("Campo de modificación no reconocido.")
+            update_success = False
+
+        if new_value is not None or (field_to_modify == 'propiedad_id' and new_value_str == 'none') or (field_to_modify in ['medidor_luz_id', 'medidor_agua_id', 'medidor_gas_id'] and new_value_str == 'none'):
+            actualizar_datos_inquilino(chat_id_modificar, **{field_to_modify: new_value})
+            update_success = True
+        else:
+            message_text = escape_markdown_v2("Valor inválido o no se pudo procesar.")
+
+    except ValueError as e:
+        message_text = escape_markdown_v2(f"Valor ingresado inválido para este campo: {str(e)}. Intenta de nuevo.")
+        update_success = False
+    except Exception as e:
+        logger.error("Error al modificar inquilino %s, campo %s: %s", chat_id_modificar, field_to_modify, e)
+        message_text = escape_markdown_v2(f"Ocurrió un error al intentar modificar el dato: {str(e)}")
+        update_success = False
+
+    if update_success:
+        await message_editor(
+            message_text,
+            reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    else:
+        await message_editor(
+            message_text,
+            reply_markup=boton_volver_menu('admin', 'admin_modificar_inquilino'), parse_mode='MarkdownV2'
+        )
+        return ADMIN_MODIFICAR_INQUILINO_VALUE
+
+# --- Búsqueda de inquilinos (inline) ---
+
+async def buscar_inquilinos_inline(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Responde las consultas inline de los administradores con los inquilinos que coinciden y sus acciones."""
+    inline_query = update.inline_query
+    if inline_query.from_user.id not in ADMIN_IDS:
+        await inline_query.answer([], cache_time=300, is_personal=True)
+        return
+    resultados = []
+    for chat_id, nombre, ci, propiedad, saldo in buscar_inquilinos(inline_query.query, limite=RESULTADOS_BUSQUEDA_INLINE):
+        propiedad = propiedad or "Sin propiedad"
+        # Enlaces profundos: /start <accion>_<chat_id> abre el flujo correspondiente en el chat con el bot
+        keyboard = [[
+            InlineKeyboardButton("Modificar", url=create_deep_linked_url(context.bot.username, f"modinq_{chat_id}")),
+            InlineKeyboardButton("Eliminar", url=create_deep_linked_url(context.bot.username, f"delinqui_{chat_id}")),
+            InlineKeyboardButton("Aviso", url=create_deep_linked_url(context.bot.username, f"noticeinq_{chat_id}")),
+        ]]
+        resultados.append(InlineQueryResultArticle(
+            id=str(chat_id),
+            title=f"{nombre} (CI: {ci})",
+            description=f"{propiedad} · Saldo: {saldo or 0:.2f} Bs.",
+            input_message_content=InputTextMessageContent(
+                escape_markdown_v2(f"Inquilino: {nombre} (CI: {ci}) - ID: {chat_id}\nPropiedad: {propiedad}\nSaldo: {saldo or 0:.2f} Bs."),
+                parse_mode='MarkdownV2'
+            ),
+            reply_markup=InlineKeyboardMarkup(keyboard),
+        ))
+    await inline_query.answer(resultados, cache_time=5, is_personal=True)
+
+async def abrir_enlace_inquilino(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Abre la acción elegida en un resultado de la búsqueda inline (/start modinq_<id>, delinqui_<id> o noticeinq_<id>)."""
+    accion, chat_id = context.args[0].split("_")
+    chat_id = int(chat_id)
+    if not obtener_inquilino(chat_id):
+        await update.message.reply_text(
+            escape_markdown_v2("Ese inquilino ya no existe."), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    if accion == 'modinq':
+        return await _pedir_campo_modificacion(update.message.reply_text, context, chat_id)
+    if accion == 'delinqui':
+        return await _pedir_confirmacion_eliminacion(update.message.reply_text, context, chat_id)
+    return await pedir_mensaje_aviso_inquilino(update.message.reply_text, context, chat_id)
@@ -0,0 +1,430 @@
+"""Handlers de administrador para gestionar propiedades y medidores.
+
+Se importa de forma diferida la primera vez que se usa uno de estos flujos."""
+
+import logging
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes, ConversationHandler
+
+from bot.config import ADMIN_IDS
+from bot.db import (
+    actualizar_datos_propiedad,
+    agregar_medidor,
+    agregar_propiedad,
+    eliminar_propiedad_db,
+    obtener_medidores_agrupados,
+    obtener_propiedad_por_id,
+    obtener_propiedades,
+    obtener_pyg_propiedad,
+)
+from bot.formatting import escape_markdown_v2
+from bot.handlers.router import datos_callback
+from bot.keyboards import (
+    boton_volver_menu,
+    teclado_gestionar_propiedades,
+    teclado_propiedades,
+    teclado_tipos_servicio_factura,
+)
+from bot.states import (
+    ADMIN_ADD_MEDIDOR_NOMBRE,
+    ADMIN_ADD_MEDIDOR_PROPIEDAD_SELECT,
+    ADMIN_ADD_MEDIDOR_TIPO,
+    ADMIN_ADD_PROPIEDAD_DIRECCION,
+    ADMIN_ADD_PROPIEDAD_NOMBRE,
+    ADMIN_ADD_PROPIEDAD_SSID,
+    ADMIN_ADD_PROPIEDAD_WIFI,
+    ADMIN_DEL_PROPIEDAD_CONFIRM,
+    ADMIN_DEL_PROPIEDAD_SELECT,
+    ADMIN_MODIFICAR_PROPIEDAD_FIELD,
+    ADMIN_MODIFICAR_PROPIEDAD_SELECT,
+    ADMIN_MODIFICAR_PROPIEDAD_VALUE,
+    ADMIN_PROPIEDADES_MENU,
+)
+
+logger = logging.getLogger(__name__)
+
+async def handle_admin_gestionar_propiedades_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Gestionar propiedades'."""
+    query = update.callback_query
+    await query.answer()
+    await query.edit_message_text(
+        escape_markdown_v2("Menú de gestión de propiedades:"),
+        reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2'
+    )
+    return ADMIN_PROPIEDADES_MENU
+
+async def admin_ver_propiedades_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra la lista de propiedades registradas."""
+    query = update.callback_query
+    await query.answer()
+    propiedades = obtener_propiedades()
+    if not propiedades:
+        await query.edit_message_text(escape_markdown_v2("No hay propiedades registradas."), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    texto = "Propiedades registradas:\n\n"
+    medidores_por_propiedad = obtener_medidores_agrupados()
+    for p_id, nombre, direccion, wifi_ssid, wifi_password in propiedades:
+        texto += f"*ID:* {p_id}\n"
+        texto += f"*Nombre:* {escape_markdown_v2(nombre)}\n"
+        texto += f"*Dirección:* {escape_markdown_v2(direccion)}\n"
+        texto += f"  *SSID Wi-Fi:* `{escape_markdown_v2(wifi_ssid if wifi_ssid else 'No asignado')}`\n"
+        texto += f"  *Contraseña Wi-Fi:* `{escape_markdown_v2(wifi_password if wifi_password else 'No asignado')}`\n"
+        medidores = medidores_por_propiedad.get(p_id)
+        if medidores:
+            texto += "* Medidores:*\n"
+            for m_id, m_nombre, m_tipo in medidores:
+                texto += f"    - ID: {m_id}, Nombre: {escape_markdown_v2(m_nombre)} (Tipo: {escape_markdown_v2(m_tipo.replace('_', '/').capitalize())})\n"
+        texto += "\n"
+    await query.edit_message_text(escape_markdown_v2(texto), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def handle_admin_add_propiedad_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inicia el flujo para añadir una nueva propiedad."""
+    query = update.callback_query
+    await query.answer()
+    await query.edit_message_text(
+        escape_markdown_v2("Ingresa el nombre de la nueva propiedad (ej. Casa Blanca):"),
+        reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_ADD_PROPIEDAD_NOMBRE
+
+async def admin_add_propiedad_nombre(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene el nombre de la propiedad."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    nombre = update.effective_message.text.strip()
+    if not nombre:
+        await update.message.reply_text(escape_markdown_v2("El nombre no puede estar vacío. Intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2')
+        return ADMIN_ADD_PROPIEDAD_NOMBRE
+    context.user_data['nueva_propiedad_nombre'] = nombre
+    await update.message.reply_text(escape_markdown_v2("Ingresa la dirección de la propiedad (ej. Calle Falsa 123):"),
+                                    reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2')
+    return ADMIN_ADD_PROPIEDAD_DIRECCION
+
+async def admin_add_propiedad_direccion(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene la dirección de la propiedad."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    direccion = update.effective_message.text.strip()
+    if not direccion:
+        await update.message.reply_text(escape_markdown_v2("La dirección no puede estar vacía. Intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2')
+        return ADMIN_ADD_PROPIEDAD_DIRECCION
+    context.user_data['nueva_propiedad_direccion'] = direccion
+    await update.message.reply_text(escape_markdown_v2("Ingresa el nombre de la red Wi-Fi (SSID) para esta propiedad (o 'N/A' si no aplica):"),
+                                    reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2')
+    return ADMIN_ADD_PROPIEDAD_SSID
+
+async def admin_add_propiedad_ssid(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene el SSID de la propiedad."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    ssid = update.effective_message.text.strip()
+    context.user_data['nueva_propiedad_ssid'] = ssid if ssid.upper() != 'N/A' else None
+    await update.message.reply_text(escape_markdown_v2("Ingresa la contraseña de Wi-Fi para esta propiedad (o 'N/A' si no aplica):"),
+                                    reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2')
+    return ADMIN_ADD_PROPIEDAD_WIFI
+
+async def admin_add_propiedad_wifi(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene la contraseña de Wi-Fi y finaliza el registro de propiedad."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    wifi_password = update.effective_message.text.strip()
+    nombre = context.user_data.get('nueva_propiedad_nombre')
+    direccion = context.user_data.get('nueva_propiedad_direccion')
+    wifi_ssid = context.user_data.get('nueva_propiedad_ssid')
+    wifi_password_final = wifi_password if wifi_password.upper() != 'N/A' else None
+
+    if agregar_propiedad(nombre, direccion, wifi_ssid, wifi_password_final):
+        await update.message.reply_text(escape_markdown_v2(f"Propiedad '{escape_markdown_v2(nombre)}' agregada correctamente."),
+                                        reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+    else:
+        await update.message.reply_text(escape_markdown_v2(f"Error al agregar propiedad '{escape_markdown_v2(nombre)}'. Puede que ya exista un nombre igual."),
+                                        reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def handle_admin_del_propiedad_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inicia el flujo para eliminar una propiedad."""
+    query = update.callback_query
+    await query.answer()
+    teclado = teclado_propiedades('delprop_', 'admin_gestionar_propiedades')
+    if not teclado:
+        await query.edit_message_text(escape_markdown_v2("No hay propiedades para eliminar."), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    await query.edit_message_text(escape_markdown_v2("Selecciona la propiedad a eliminar:"),
+                                  reply_markup=teclado, parse_mode='MarkdownV2')
+    return ADMIN_DEL_PROPIEDAD_SELECT
+
+async def admin_del_propiedad_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Confirma la eliminación de la propiedad."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = int(query.data.split("_")[1])
+    context.user_data['propiedad_a_eliminar_id'] = propiedad_id
+    propiedad_info = obtener_propiedad_por_id(propiedad_id)
+    nombre_propiedad = propiedad_info[1] if propiedad_info else "Desconocida"
+
+    keyboard = [
+        [InlineKeyboardButton("Sí, eliminar", callback_data='confirm_del_propiedad')],
+        [InlineKeyboardButton("No, cancelar", callback_data='cancel_del_propiedad')]
+    ]
+    await query.edit_message_text(
+        escape_markdown_v2(f"¿Estás seguro de que quieres eliminar la propiedad '{escape_markdown_v2(nombre_propiedad)}' y todos sus medidores, facturas y desvincular inquilinos?"),
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode='MarkdownV2'
+    )
+    return ADMIN_DEL_PROPIEDAD_CONFIRM
+
+async def admin_del_propiedad_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ejecuta la eliminación de la propiedad."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = context.user_data.get('propiedad_a_eliminar_id')
+
+    if query.data == 'confirm_del_propiedad':
+        if eliminar_propiedad_db(propiedad_id):
+            await query.edit_message_text(escape_markdown_v2("Propiedad eliminada correctamente."),
+                                          reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        else:
+            await query.edit_message_text(escape_markdown_v2("Error al eliminar la propiedad. Intenta de nuevo."),
+                                          reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+    else:
+        await query.edit_message_text(escape_markdown_v2("Eliminación de propiedad cancelada."), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def handle_admin_add_medidor_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inicia el flujo para añadir un medidor a una propiedad."""
+    query = update.callback_query
+    await query.answer()
+    teclado = teclado_propiedades('addmedprop_', 'admin_gestionar_propiedades')
+    if not teclado:
+        await query.edit_message_text(escape_markdown_v2("No hay propiedades a las que añadir medidores. Por favor, añade una propiedad primero."),
+                                      reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    await query.edit_message_text(escape_markdown_v2("Selecciona la propiedad a la que añadir un medidor:"),
+                                  reply_markup=teclado, parse_mode='MarkdownV2')
+    return ADMIN_ADD_MEDIDOR_PROPIEDAD_SELECT
+
+async def admin_add_medidor_propiedad_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de propiedad para añadir medidor."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id = int(query.data.split("_")[1])
+    context.user_data['medidor_propiedad_id'] = propiedad_id
+    propiedad_info = obtener_propiedad_por_id(propiedad_id)
+    nombre_propiedad = propiedad_info[1] if propiedad_info else "Desconocida"
+
+    await query.edit_message_text(
+        escape_markdown_v2(f"Ingresa el nombre del nuevo medidor para '{escape_markdown_v2(nombre_propiedad)}' (ej. Medidor 1, Medidor Cocina):"),
+        reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2'
+    )
+    return ADMIN_ADD_MEDIDOR_NOMBRE
+
+async def admin_add_medidor_nombre(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene el nombre del medidor y pide el tipo de servicio."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    nombre_medidor = update.effective_message.text.strip()
+    propiedad_id = context.user_data.get('medidor_propiedad_id')
+
+    if not nombre_medidor:
+        await update.message.reply_text(escape_markdown_v2("El nombre del medidor no puede estar vacío. Intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2')
+        return ADMIN_ADD_MEDIDOR_NOMBRE
+    if not propiedad_id:
+        await update.message.reply_text(escape_markdown_v2("Error: No se seleccionó una propiedad para el medidor. Vuelve a intentarlo."),
+                                        reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+    context.user_data['nuevo_medidor_nombre'] = nombre_medidor
+    await update.message.reply_text(
+        escape_markdown_v2("Selecciona el tipo de servicio de este medidor (Luz, Agua, Gas, Internet/TV):"),
+        reply_markup=teclado_tipos_servicio_factura(), parse_mode='MarkdownV2'
+    )
+    return ADMIN_ADD_MEDIDOR_TIPO
+
+async def admin_add_medidor_tipo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Obtiene el tipo de servicio del medidor y lo registra."""
+    query = update.callback_query
+    await query.answer()
+    tipo_servicio = query.data.split("_")[1]
+    nombre_medidor = context.user_data.get('nuevo_medidor_nombre')
+    propiedad_id = context.user_data.get('medidor_propiedad_id')
+
+    if agregar_medidor(propiedad_id, nombre_medidor, tipo_servicio):
+        await query.edit_message_text(escape_markdown_v2(f"Medidor '{escape_markdown_v2(nombre_medidor)}' ({escape_markdown_v2(tipo_servicio.replace('_', '/').capitalize())}) agregado correctamente a la propiedad."),
+                                      reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+    else:
+        await query.edit_message_text(escape_markdown_v2(f"Error al agregar medidor '{escape_markdown_v2(nombre_medidor)}'. Puede que ya exista un medidor con ese nombre en esta propiedad."),
+                                      reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+# --- Handlers para modificar propiedades ---
+
+async def handle_admin_modificar_propiedad_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Modificar propiedad' y muestra la lista."""
+    query = update.callback_query
+    await query.answer()
+    teclado = teclado_propiedades('modprop_', 'admin_gestionar_propiedades')
+    if not teclado:
+        await query.edit_message_text(
+            escape_markdown_v2("No hay propiedades para modificar."),
+            reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    await query.edit_message_text(
+        escape_markdown_v2("Selecciona la propiedad a modificar:"),
+        reply_markup=teclado, parse_mode='MarkdownV2'
+    )
+    return ADMIN_MODIFICAR_PROPIEDAD_SELECT
+
+async def admin_modificar_propiedad_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección de propiedad a modificar y pide el campo."""
+    query = update.callback_query
+    await query.answer()
+    propiedad_id_modificar = int(query.data.split("_")[1])
+    context.user_data['mod_prop_id'] = propiedad_id_modificar
+    propiedad_info = obtener_propiedad_por_id(propiedad_id_modificar)
+    nombre_propiedad = propiedad_info[1] if propiedad_info else "Desconocida"
+
+    keyboard = [
+        [InlineKeyboardButton("Nombre", callback_data='mod_prop_nombre')],
+        [InlineKeyboardButton("Dirección", callback_data='mod_prop_direccion')],
+        [InlineKeyboardButton("SSID Wi-Fi", callback_data='mod_prop_wifi_ssid')],
+        [InlineKeyboardButton("Contraseña Wi-Fi", callback_data='mod_prop_wifi_password')],
+        [InlineKeyboardButton("Volver a Gestión de Propiedades", callback_data='admin_gestionar_propiedades')],
+    ]
+    await query.edit_message_text(
+        escape_markdown_v2(f"¿Qué dato de la propiedad '{escape_markdown_v2(nombre_propiedad)}' deseas modificar?"),
+        reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='MarkdownV2'
+    )
+    return ADMIN_MODIFICAR_PROPIEDAD_FIELD
+
+async def admin_modificar_propiedad_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja la selección del campo a modificar de la propiedad y pide el nuevo valor."""
+    query = update.callback_query
+    await query.answer()
+    field_to_modify = query.data.split("_")[2]
+    context.user_data['mod_prop_field'] = field_to_modify
+
+    prompt_message = ""
+    if field_to_modify == 'nombre':
+        prompt_message = escape_markdown_v2("Ingresa el nuevo nombre de la propiedad:")
+    elif field_to_modify == 'direccion':
+        prompt_message = escape_markdown_v2("Ingresa la nueva dirección de la propiedad:")
+    elif field_to_modify == 'wifi_ssid':
+        prompt_message = escape_markdown_v2("Ingresa el nuevo SSID de Wi-Fi (o 'N/A' si no aplica):")
+    elif field_to_modify == 'wifi_password':
+        prompt_message = escape_markdown_v2("Ingresa la nueva contraseña de Wi-Fi (o 'N/A' si no aplica):")
+    else:
+        await query.edit_message_text(escape_markdown_v2("Campo no reconocido para modificar propiedad."), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    await query.edit_message_text(prompt_message, reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2')
+    return ADMIN_MODIFICAR_PROPIEDAD_VALUE
+
+async def admin_modificar_propiedad_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Recibe el nuevo valor y actualiza el dato de la propiedad."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    propiedad_id_modificar = context.user_data.get('mod_prop_id')
+    field_to_modify = context.user_data.get('mod_prop_field')
+    new_value = None
+    update_success = False
+    message_text = escape_markdown_v2("Dato de propiedad actualizado correctamente.")
+
+    if update.message and update.message.text:
+        new_value_str = update.message.text.strip()
+    else:
+        await message_editor(
+            escape_markdown_v2("Entrada inválida. Por favor, intenta de nuevo."),
+            reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2'
+        )
+        return ADMIN_MODIFICAR_PROPIEDAD_VALUE
+
+    try:
+        if field_to_modify in ['nombre', 'direccion']:
+            new_value = new_value_str
+        elif field_to_modify in ['wifi_ssid', 'wifi_password']:
+            new_value = new_value_str if new_value_str.upper() != 'N/A' else None
+        else:
+            message_text = escape_markdown_v2("Campo de modificación no reconocido.")
+            update_success = False
+
+        if new_value is not None or new_value_str.upper() == 'N/A':
+            actualizar_datos_propiedad(propiedad_id_modificar, **{field_to_modify: new_value})
+            update_success = True
+        else:
+            message_text = escape_markdown_v2("Valor inválido o no se pudo procesar.")
+
+    except Exception as e:
+        logger.error("Error al modificar propiedad %s, campo %s: %s", propiedad_id_modificar, field_to_modify, e)
+        message_text = escape_markdown_v2(f"Ocurrió un error al intentar modificar el dato: {str(e)}")
+        update_success = False
+
+    if update_success:
+        await message_editor(
+            message_text,
+            reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+    else:
+        await message_editor(
+            message_text,
+            reply_markup=boton_volver_menu('admin', 'admin_propiedades'), parse_mode='MarkdownV2'
+        )
+        return ADMIN_MODIFICAR_PROPIEDAD_VALUE
+
+# --- P&L por propiedad ---
+
+async def handle_admin_pyg_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra la lista de propiedades para ver su P&L."""
+    query = update.callback_query
+    await query.answer()
+    if update.effective_chat.id not in ADMIN_IDS:
+        return
+    teclado = teclado_propiedades('pyg:', 'admin_gestionar_propiedades', extra=(("Sin propiedad asignada", datos_callback('pyg', 0)),))
+    if not teclado:
+        await query.edit_message_text(escape_markdown_v2("No hay propiedades registradas."), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        return
+    await query.edit_message_text(
+        escape_markdown_v2("Selecciona la propiedad para ver su P&L:"),
+        reply_markup=teclado, parse_mode='MarkdownV2'
+    )
+
+async def admin_pyg_propiedad(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra el P&L acumulado de una propiedad a partir de sus contadores."""
+    query = update.callback_query
+    await query.answer()
+    if update.effective_chat.id not in ADMIN_IDS:
+        return
+    propiedad_id = context.args[0]
+    propiedad = obtener_propiedad_por_id(propiedad_id) if propiedad_id else None
+    nombre = propiedad[1] if propiedad else "Sin propiedad asignada"
+    alquiler, servicios, costos, cobrado, deuda = obtener_pyg_propiedad(propiedad_id)
+
+    texto = (
+        f"📈 *P&L de {escape_markdown_v2(nombre)}* (acumulado)\n\n"
+        f"*Alquiler facturado:* {alquiler:.2f} Bs.\n"
+        f"*Servicios facturados:* {servicios:.2f} Bs.\n"
+        f"*Total facturado:* {alquiler + servicios:.2f} Bs.\n"
+        f"*Costos de servicios (facturas):* {costos:.2f} Bs.\n"
+        f"*Cobrado:* {cobrado:.2f} Bs.\n"
+        f"*Deuda pendiente:* {deuda:.2f} Bs.\n\n"
+        f"*Resultado (cobrado - costos):* {cobrado - costos:.2f} Bs."
+    )
+    buttons = [
+        [InlineKeyboardButton("Ver otra propiedad", callback_data='admin_pyg')],
+        [InlineKeyboardButton("Volver", callback_data='admin_gestionar_propiedades')],
+    ]
+    await query.edit_message_text(escape_markdown_v2(texto), reply_markup=InlineKeyboardMarkup(buttons), parse_mode='MarkdownV2')
@@ -0,0 +1,308 @@
+"""Handlers comunes: /start, registro inicial del inquilino, navegación de menús y /cancelar."""
+
+import functools
+import logging
+from datetime import datetime
+
+from telegram import Update
+from telegram.ext import ContextTypes, ConversationHandler
+
+from bot.billing import calcular_servicios_prorrateo
+from bot.config import ADMIN_IDS
+from bot.db import (
+    agregar_inquilino,
+    cursor,
+    obtener_inquilino,
+    obtener_medidor_por_id,
+    obtener_medidores_agrupados,
+    obtener_propiedad_por_id,
+    obtener_propiedades,
+)
+from bot.formatting import escape_markdown_v2
+from bot.handlers.editing import editar_mensaje, responder
+from bot.keyboards import (
+    boton_volver_menu,
+    teclado_admin,
+    teclado_admin_comunicacion,
+    teclado_admin_facturacion,
+    teclado_admin_inquilinos,
+    teclado_gestionar_propiedades,
+    teclado_inquilino,
+)
+from bot.reports import texto_antiguedad_deuda, texto_resumen_contable
+from bot.states import REGISTRAR_CI, REGISTRAR_NOMBRE
+
+logger = logging.getLogger(__name__)
+
+# --- Handlers principales ---
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el comando /start y dirige al usuario al menú apropiado, editando el mensaje si es una callback."""
+    chat_id = update.effective_chat.id
+    
+    message_editor = None
+    if update.callback_query:
+        await responder(update.callback_query)
+        message_editor = functools.partial(editar_mensaje, update.callback_query)
+    elif update.message:
+        message_editor = update.message.reply_text
+
+    if not message_editor:
+        logger.error("No se pudo determinar el editor de mensajes en start.")
+        return ConversationHandler.END
+
+    if chat_id in ADMIN_IDS:
+        await message_editor(
+            escape_markdown_v2("Bienvenido al panel administrador."), reply_markup=teclado_admin(), parse_mode='MarkdownV2'
+        )
+    else:
+        inquilino = obtener_inquilino(chat_id)
+        if inquilino and inquilino[3] is not None: # Si el inquilino está completamente registrado (tiene fecha de ingreso)
+            await message_editor(
+                escape_markdown_v2(f"Hola {escape_markdown_v2(inquilino[1])}, bienvenido a tu panel."), reply_markup=teclado_inquilino(), parse_mode='MarkdownV2'
+            )
+        else: # Nuevo inquilino o registro pendiente/incompleto
+            if inquilino: # Inquilino existe pero registro incompleto
+                await message_editor(
+                    escape_markdown_v2(f"Hola {escape_markdown_v2(inquilino[1])}, tu registro está pendiente de validación por el administrador. "
+                    "Usa /start para verificar tu estado."),
+                    parse_mode='MarkdownV2'
+                )
+            else: # Inquilino no registrado
+                await message_editor(
+                    escape_markdown_v2("¡Bienvenido! Para comenzar, por favor registra tu nombre completo:"), parse_mode='MarkdownV2'
+                )
+                return REGISTRAR_NOMBRE
+    return ConversationHandler.END
+
+async def registrar_nombre(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Pide el nombre completo del inquilino para el registro inicial."""
+    nombre = update.message.text.strip()
+    if not nombre:
+        await update.message.reply_text(escape_markdown_v2("El nombre no puede estar vacío. Por favor, ingresa tu nombre completo:"), parse_mode='MarkdownV2')
+        return REGISTRAR_NOMBRE
+    context.user_data['nombre'] = nombre
+    await update.message.reply_text(escape_markdown_v2("Ahora ingresa tu número de carnet de identidad:"), parse_mode='MarkdownV2')
+    return REGISTRAR_CI
+
+async def registrar_ci(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Pide el CI del inquilino y lo registra inicialmente."""
+    chat_id = update.effective_chat.id
+    ci = update.message.text.strip()
+    if not ci:
+        await update.message.reply_text(escape_markdown_v2("El CI no puede estar vacío. Por favor, ingresa tu número de carnet de identidad:"), parse_mode='MarkdownV2')
+        return REGISTRAR_CI
+    nombre = context.user_data.get('nombre')
+    agregar_inquilino(chat_id, nombre, ci)
+    # No mostrar el teclado del inquilino hasta que el registro sea validado por el admin
+    await update.message.reply_text(
+        escape_markdown_v2(f"Gracias {escape_markdown_v2(nombre)}, tu registro está pendiente de validación por el administrador. "
+        "Usa /start para verificar tu estado."),
+        parse_mode='MarkdownV2'
+    )
+    return ConversationHandler.END
+
+# --- Handlers para mostrar información (sin iniciar conversación) ---
+
+async def menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja las interacciones de los botones inline de los menús que solo muestran información o navegan entre submenús."""
+    query = update.callback_query
+    await responder(query)
+
+    chat_id = query.message.chat.id
+    target_menu_data = query.data
+
+    if chat_id in ADMIN_IDS:
+        # --- Opciones administrador ---
+        if target_menu_data == 'admin_menu_inquilinos':
+            await editar_mensaje(query, escape_markdown_v2("Menú de Gestión de Inquilinos:"), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+        elif target_menu_data == 'admin_menu_facturacion':
+            await editar_mensaje(query, escape_markdown_v2("Menú de Facturación y Medidores:"), reply_markup=teclado_admin_facturacion(), parse_mode='MarkdownV2')
+        elif target_menu_data == 'admin_menu_comunicacion':
+            await editar_mensaje(query, escape_markdown_v2("Menú de Comunicación y Pagos:"), reply_markup=teclado_admin_comunicacion(), parse_mode='MarkdownV2')
+        elif target_menu_data == 'admin_morosos':
+            texto = texto_antiguedad_deuda()
+            if not texto:
+                await editar_mensaje(query, 
+                    escape_markdown_v2("No hay inquilinos morosos."),
+                    reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2'
+                )
+            else:
+                await editar_mensaje(query, escape_markdown_v2(texto), reply_markup=teclado_admin_inquilinos(), parse_mode='MarkdownV2')
+        elif target_menu_data == 'admin_gestionar_propiedades':
+            await editar_mensaje(query, escape_markdown_v2("Menú de gestión de propiedades:"), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        elif target_menu_data == 'admin_ver_propiedades':
+            propiedades = obtener_propiedades()
+            if not propiedades:
+                await editar_mensaje(query, escape_markdown_v2("No hay propiedades registradas."), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+            else:
+                texto = "Propiedades registradas:\n\n"
+                medidores_por_propiedad = obtener_medidores_agrupados()
+                for p_id, nombre, direccion, wifi_ssid, wifi_password in propiedades:
+                    texto += f"*ID:* {p_id}\n"
+                    texto += f"*Nombre:* {escape_markdown_v2(nombre)}\n"
+                    texto += f"*Dirección:* {escape_markdown_v2(direccion)}\n"
+                    texto += f"  *SSID Wi-Fi:* `{escape_markdown_v2(wifi_ssid if wifi_ssid else 'No asignado')}`\n"
+                    texto += f"  *Contraseña Wi-Fi:* `{escape_markdown_v2(wifi_password if wifi_password else 'No asignado')}`\n"
+                    medidores = medidores_por_propiedad.get(p_id)
+                    if medidores:
+                        texto += "* Medidores:*\n"
+                        for m_id, m_nombre, m_tipo in medidores:
+                            texto += f"    - ID: {m_id}, Nombre: {escape_markdown_v2(m_nombre)} (Tipo: {escape_markdown_v2(m_tipo.replace('_', '/').capitalize())})\n"
+                    texto += "\n"
+                await editar_mensaje(query, escape_markdown_v2(texto), reply_markup=teclado_gestionar_propiedades(), parse_mode='MarkdownV2')
+        elif target_menu_data == 'admin_resumen_contable':
+            summary_text = texto_resumen_contable()
+
+            await editar_mensaje(query, 
+                escape_markdown_v2(summary_text),
+                reply_markup=teclado_admin_facturacion(),
+                parse_mode='MarkdownV2'
+            )
+        else:
+            await editar_mensaje(query, escape_markdown_v2("Opción no reconocida para administrador."), reply_markup=teclado_admin(), parse_mode='MarkdownV2')
+    else:
+        # --- Opciones inquilino ---
+        if target_menu_data == 'ver_saldo':
+            inquilino = obtener_inquilino(chat_id)
+
+            if not inquilino:
+                await editar_mensaje(query, escape_markdown_v2("No estás registrado. Por favor, usa /start para iniciar el registro."),
+                                              reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+                return ConversationHandler.END
+            
+            if inquilino[3] is None: # Si el inquilino no tiene fecha de ingreso, su registro está incompleto
+                await editar_mensaje(query, 
+                    escape_markdown_v2("Tu registro está pendiente de validación por el administrador. Por favor, espera a que el administrador complete tu registro para ver esta información."),
+                    reply_markup=teclado_inquilino(), parse_mode='MarkdownV2'
+                )
+                return ConversationHandler.END
+
+
+            nombre_inquilino = inquilino[1]
+            monto_alquiler = inquilino[4] if inquilino[4] is not None else 0.0
+            saldo_actual = inquilino[6] if inquilino[6] is not None else 0.0
+            tipo_alquiler = inquilino[5]
+            propiedad_id = inquilino[7]
+            num_personas_inquilino = inquilino[11] if inquilino[11] is not None else 1
+
+            texto = f"Hola {escape_markdown_v2(nombre_inquilino)},\n\n"
+            texto += f"Tu alquiler mensual base es: *{monto_alquiler:.2f} Bs.*"
+            texto += f"\nSaldo pendiente total: *{saldo_actual:.2f} Bs.*"
+            texto += "\n\n"
+
+            if tipo_alquiler == 'prorrateo':
+                texto += "*Estimado de Servicios (Mes actual):*\n"
+                current_year = datetime.now().year
+                current_month = datetime.now().month
+                total_servicios_prorrateo_estimado, detalle_servicios = calcular_servicios_prorrateo(
+                    propiedad_id, num_personas_inquilino, inquilino[8], inquilino[9], inquilino[10], current_year, current_month
+                )
+                texto += detalle_servicios
+
+                texto += f"\nTotal estimado servicios: *{total_servicios_prorrateo_estimado:.2f} Bs.*"
+                texto += f"\nTotal mensual estimado (Alquiler + Servicios): *{(monto_alquiler + total_servicios_prorrateo_estimado):.2f} Bs.*"
+                texto += "\n\n"
+
+            # Historial de pagos
+            cursor.execute("SELECT fecha_pago, monto_pagado, confirmado FROM pagos WHERE chat_id = ? ORDER BY fecha_pago DESC LIMIT 5", (chat_id,))
+            pagos_recientes = cursor.fetchall()
+            if pagos_recientes:
+                texto += "*Últimos pagos registrados:*\n"
+                for fecha, monto, confirmado in pagos_recientes:
+                    estado = "Confirmado" if confirmado else "Pendiente"
+                    texto += f"- {fecha}: {monto:.2f} Bs. ({estado})\n"
+            else:
+                texto += "No hay pagos registrados.\n"
+
+            await editar_mensaje(query, escape_markdown_v2(texto), reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+
+        elif target_menu_data == 'ver_mi_propiedad':
+            inquilino = obtener_inquilino(chat_id)
+
+            if not inquilino or inquilino[7] is None: # inquilino[7] es propiedad_id
+                await editar_mensaje(query, escape_markdown_v2("No tienes una propiedad asignada aún. Contacta al administrador."),
+                                              reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+                return ConversationHandler.END
+
+            propiedad_id = inquilino[7]
+            propiedad = obtener_propiedad_por_id(propiedad_id)
+
+            if propiedad:
+                texto = (
+                    f"🏡 *Detalles de tu Propiedad* 🏡\n\n"
+                    f"*Nombre:* {escape_markdown_v2(propiedad[1])}\n"
+                    f"*Dirección:* {escape_markdown_v2(propiedad[2])}\n\n"
+                    f"🌐 *Información Wi-Fi:*\n"
+                    f"  - *SSID:* `{escape_markdown_v2(propiedad[3] if propiedad[3] else 'No asignado')}`\n"
+                    f"  - *Contraseña:* `{escape_markdown_v2(propiedad[4] if propiedad[4] else 'No asignado')}`\n"
+                )
+                
+                has_medidores = False
+                medidor_luz = obtener_medidor_por_id(inquilino[8]) if inquilino[8] else None
+                medidor_agua = obtener_medidor_por_id(inquilino[9]) if inquilino[9] else None
+                medidor_gas = obtener_medidor_por_id(inquilino[10]) if inquilino[10] else None
+
+                if medidor_luz or medidor_agua or medidor_gas:
+                    texto += "\n⚡💧🔥 *Tus Medidores Asignados:*\n"
+                    has_medidores = True
+
+                if medidor_luz:
+                    texto += f"  - *Luz:* {escape_markdown_v2(medidor_luz[2])} (Tipo: {escape_markdown_v2(medidor_luz[3].capitalize())})\n"
+                if medidor_agua:
+                    texto += f"  - *Agua:* {escape_markdown_v2(medidor_agua[2])} (Tipo: {escape_markdown_v2(medidor_agua[3].capitalize())})\n"
+                if medidor_gas:
+                    texto += f"  - *Gas:* {escape_markdown_v2(medidor_gas[2])} (Tipo: {escape_markdown_v2(medidor_gas[3].capitalize())})\n"
+
+                if not has_medidores:
+                    texto += "\n_No tienes medidores de servicios asignados a tu propiedad._\n"
+
+                await editar_mensaje(query, escape_markdown_v2(texto), reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+            else:
+                await editar_mensaje(query, escape_markdown_v2("No se encontró la información de tu propiedad. Contacta al administrador."),
+                                              reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+        else:
+            await editar_mensaje(query, escape_markdown_v2("Opción no reconocida para inquilino."), reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def cancelar(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Permite al usuario cancelar la operación actual."""
+    chat_id = update.effective_chat.id
+    message_to_edit = None
+
+    if update.message:
+        message_to_edit = update.message
+    elif update.callback_query:
+        message_to_edit = update.callback_query.message
+        await update.callback_query.answer()
+
+    if message_to_edit:
+        if chat_id in ADMIN_IDS:
+            await message_to_edit.edit_text(escape_markdown_v2("Operación cancelada."), reply_markup=teclado_admin(), parse_mode='MarkdownV2')
+        else:
+            # Para inquilinos, si cancelan, deben volver a su estado normal (sin menú si no están registrados)
+            inquilino = obtener_inquilino(chat_id)
+            if inquilino and inquilino[3] is not None: # Si está completamente registrado
+                await message_to_edit.edit_text(escape_markdown_v2("Operación cancelada."), reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+            else: # Si no está registrado o está pendiente
+                await message_to_edit.edit_text(
+                    escape_markdown_v2("Operación cancelada. Tu registro está pendiente de validación por el administrador."),
+                    parse_mode='MarkdownV2',
+                    reply_markup=None
+                )
+    else:
+        if chat_id in ADMIN_IDS:
+            await context.bot.send_message(chat_id=chat_id, text=escape_markdown_v2("Operación cancelada."), reply_markup=teclado_admin(), parse_mode='MarkdownV2')
+        else:
+            inquilino = obtener_inquilino(chat_id)
+            if inquilino and inquilino[3] is not None:
+                await context.bot.send_message(chat_id=chat_id, text=escape_markdown_v2("Operación cancelada."), reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+            else:
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=escape_markdown_v2("Operación cancelada. Tu registro está pendiente de validación por el administrador."),
+                    parse_mode='MarkdownV2',
+                    reply_markup=None
+                )
+            
+    return ConversationHandler.END
@@ -0,0 +1,70 @@
+"""Edición de mensajes de menú sin llamadas redundantes a la API.
+
+Al navegar los menús se vuelve a dibujar muchas veces el mismo texto con el mismo teclado, y
+Telegram responde a cada una con "message is not modified". Se guarda, por (chat, mensaje), la
+huella de lo último que se dibujó y la del mensaje que quedó; si el callback llega con ese mismo
+mensaje y se pide dibujar lo mismo, la edición se omite. Como se compara con el mensaje que manda
+Telegram en el callback, una edición hecha por otro worker invalida la huella sola."""
+
+import asyncio
+import collections
+import hashlib
+import json
+import logging
+
+from telegram.error import BadRequest
+
+from bot import metrics
+from bot.tasks import programar
+
+logger = logging.getLogger(__name__)
+
+MAX_MENSAJES_RECORDADOS = 5000
+_ultimas_ediciones = collections.OrderedDict() # (chat_id, message_id) -> (huella pedida, huella del mensaje)
+
+def _huella(*partes):
+    return hashlib.blake2b(json.dumps(partes, sort_keys=True, default=str).encode(), digest_size=16).digest()
+
+def _huella_mensaje(message):
+    """Huella del contenido visible de un mensaje tal como lo devuelve Telegram."""
+    entidades = [entidad.to_dict() for entidad in message.entities or ()]
+    teclado = message.reply_markup.to_dict() if message.reply_markup else None
+    return _huella(message.text, entidades, teclado)
+
+def _recordar(clave, huella_pedida, message):
+    _ultimas_ediciones[clave] = (huella_pedida, _huella_mensaje(message))
+    _ultimas_ediciones.move_to_end(clave)
+    if len(_ultimas_ediciones) > MAX_MENSAJES_RECORDADOS:
+        _ultimas_ediciones.popitem(last=False)
+
+async def editar_mensaje(query, text, reply_markup=None, parse_mode='MarkdownV2'):
+    """Como ``query.edit_message_text``, pero no llama a la API si el mensaje ya muestra eso mismo."""
+    message = query.message
+    if message is None: # Mensajes inline: no hay contenido con qué comparar
+        return await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    clave = (message.chat.id, message.message_id)
+    huella_pedida = _huella(text, reply_markup.to_dict() if reply_markup else None, parse_mode)
+    if _ultimas_ediciones.get(clave) == (huella_pedida, _huella_mensaje(message)):
+        _ultimas_ediciones.move_to_end(clave)
+        metrics.incrementar('bot_ediciones_omitidas_total', "Ediciones de mensajes omitidas por no cambiar el contenido.")
+        return message
+    try:
+        editado = await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    except BadRequest as e:
+        if 'not modified' not in str(e).lower():
+            raise
+        editado = message
+    if editado is not True:
+        _recordar(clave, huella_pedida, editado)
+    return editado
+
+async def responder(query):
+    """Responde el callback sin esperar a Telegram, para que el botón deje de cargar mientras el handler consulta la BD."""
+    async def _responder():
+        try:
+            await query.answer()
+        except Exception as e:
+            logger.warning("No se pudo responder el callback %s: %s", query.id, e)
+
+    programar(_responder())
+    await asyncio.sleep(0) # Deja que la petición salga antes de las consultas síncronas a la BD
@@ -0,0 +1,104 @@
+"""Despacho de callback queries por acción, con un diccionario en lugar de un handler con regex por botón.
+
+El ``callback_data`` tiene la forma ``accion:arg1:arg2``. Cada acción se registra con sus tipos
+de argumento; los valores convertidos quedan en ``context.args``. Los botones de menú sin
+argumentos usan la acción sola (por ejemplo ``admin_menu_inquilinos``).
+
+Los botones cuyos datos no deben viajar por el cliente usan ``k:<clave>`` (ver
+``bot.callback_store``); el router resuelve la clave y despacha la acción guardada. Las acciones
+de ``solo_almacen`` solo se aceptan así: un ``accion:arg`` armado por el cliente no las dispara."""
+
+from telegram import Update
+from telegram.ext import BaseHandler
+
+from bot.callback_store import almacen_callbacks
+from bot.formatting import escape_markdown_v2
+
+SEPARADOR = ':'
+PREFIJO_ALMACEN = 'k'
+
+def datos_callback(accion, *argumentos):
+    """Arma el callback_data ``accion:arg1:arg2`` de un botón."""
+    return SEPARADOR.join([accion, *map(str, argumentos)])
+
+def datos_guardados(accion, *argumentos):
+    """Guarda la acción y sus argumentos en el servidor y devuelve el callback_data ``k:<clave>``."""
+    return datos_callback(PREFIJO_ALMACEN, almacen_callbacks.guardar(accion, *argumentos))
+
+async def boton_expirado(update, context):
+    """Responde a un botón cuyos datos ya no están en el almacén."""
+    await update.callback_query.answer()
+    await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text=escape_markdown_v2("Este botón ya no es válido. Vuelve a abrir el menú."), parse_mode='MarkdownV2'
+    )
+
+class RouterCallbacks(BaseHandler):
+    """Handler de callback queries que resuelve la acción con una búsqueda en un diccionario.
+
+    ``rutas`` mapea cada acción a un callback o a una tupla ``(callback, tipo1, tipo2, ...)``.
+    ``legados`` mapea prefijos de formatos anteriores (``prefijo_arg1_arg2``) a una acción, para
+    que sigan funcionando los botones de mensajes ya enviados. ``solo_almacen`` son las acciones
+    que solo se despachan desde una clave ``k:`` (ni con su forma directa ni con un prefijo legado)."""
+
+    def __init__(self, rutas, legados=None, solo_almacen=()):
+        super().__init__(self._sin_ruta)
+        self.rutas = {}
+        for accion, ruta in rutas.items():
+            callback, *tipos = ruta if isinstance(ruta, tuple) else (ruta,)
+            self.rutas[accion] = (callback, tuple(tipos))
+        self.legados = dict(legados or {})
+        self.solo_almacen = frozenset(solo_almacen)
+
+    @staticmethod
+    async def _sin_ruta(update, context):
+        raise RuntimeError("RouterCallbacks despacha con el callback de cada ruta")
+
+    def _separar(self, datos):
+        accion, _, resto = datos.partition(SEPARADOR)
+        if accion == PREFIJO_ALMACEN:
+            guardado = almacen_callbacks.obtener(resto)
+            if guardado is None:
+                return PREFIJO_ALMACEN, None
+            accion, argumentos = guardado
+            if accion not in self.rutas:
+                return None, None
+            if len(argumentos) != len(self.rutas[accion][1]):
+                return PREFIJO_ALMACEN, None # Guardado con otros argumentos por una versión anterior
+            return accion, [str(a) for a in argumentos]
+        if accion in self.solo_almacen:
+            return None, None
+        if accion in self.rutas:
+            return accion, resto.split(SEPARADOR) if resto else []
+        for prefijo, accion in self.legados.items():
+            if datos.startswith(prefijo) and accion not in self.solo_almacen:
+                # Los formatos anteriores podían llevar valores de más: se toman solo los que usa la acción
+                return accion, datos[len(prefijo):].split('_')[:len(self.rutas[accion][1])]
+        return None, None
+
+    def check_update(self, update):
+        if not isinstance(update, Update) or not update.callback_query:
+            return None
+        datos = update.callback_query.data
+        if not isinstance(datos, str):
+            return None
+        accion, partes = self._separar(datos)
+        if accion is None:
+            return None
+        if partes is None: # Clave del almacén desconocida o purgada
+            return boton_expirado, []
+        callback, tipos = self.rutas[accion]
+        if len(partes) != len(tipos):
+            return None
+        try:
+            argumentos = [tipo(parte) for tipo, parte in zip(tipos, partes)]
+        except ValueError:
+            return None
+        return callback, argumentos
+
+    def collect_additional_context(self, context, update, application, check_result):
+        context.args = check_result[1]
+
+    async def handle_update(self, update, application, check_result, context):
+        self.collect_additional_context(context, update, application, check_result)
+        return await check_result[0](update, context)
@@ -0,0 +1,324 @@
+"""Handlers de inquilino: amortizar alquiler, saldo y pagos, detalles de la propiedad y quejas."""
+
+import logging
+from datetime import datetime
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes, ConversationHandler
+
+from bot import shards
+from bot.billing import calcular_servicios_prorrateo
+from bot.config import ADMIN_IDS
+from bot.db import (
+    conn,
+    cursor,
+    obtener_inquilino,
+    obtener_medidor_por_id,
+    obtener_propiedad_por_id,
+    registrar_queja,
+)
+from bot.formatting import escape_markdown_v2
+from bot.handlers.router import datos_guardados
+from bot.keyboards import boton_volver_menu, teclado_inquilino
+from bot.states import INQ_AMORTIZAR_COMPROBANTE, INQ_AMORTIZAR_MONTO, INQ_ENVIAR_QUEJA
+
+logger = logging.getLogger(__name__)
+
+def _admins_a_notificar():
+    """Administradores que reciben los avisos del inquilino: en modo multi-propietario, solo los de su shard."""
+    if not shards.MULTI:
+        return ADMIN_IDS
+    shard = shards.actual()
+    sin_grupo = set(ADMIN_IDS) - set(shards.admins_de_shards()) # Trabajan sobre el shard por defecto
+    return [admin_id for admin_id in ADMIN_IDS if admin_id in shard.admins or (shard is shards.SHARD_POR_DEFECTO and admin_id in sin_grupo)]
+
+async def handle_amortizar_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Amortizar alquiler'."""
+    query = update.callback_query
+    await query.answer()
+    chat_id = query.message.chat.id
+    inquilino = obtener_inquilino(chat_id)
+    if inquilino and inquilino[3] is not None:
+        await query.edit_message_text(
+            escape_markdown_v2("Ingresa el monto que deseas amortizar:"),
+            reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2'
+        )
+        return INQ_AMORTIZAR_MONTO
+    else:
+        await query.edit_message_text(
+            escape_markdown_v2("No puedes amortizar aún. Tu registro está pendiente o incompleto. Contacta al administrador."),
+            reply_markup=teclado_inquilino(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+
+async def inq_amortizar_monto(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Pide el monto a amortizar."""
+    message_editor = update.message.reply_text if update.message else update.callback_query.edit_message_text
+    if update.callback_query: await update.callback_query.answer()
+
+    chat_id = update.effective_chat.id
+    texto = update.effective_message.text.strip()
+    try:
+        monto_pago = float(texto)
+        if monto_pago <= 0:
+            raise ValueError("El monto debe ser un número positivo.")
+    except ValueError:
+        await update.message.reply_text(escape_markdown_v2("Monto inválido, ingresa un número positivo. Intenta de nuevo:"),
+                                        reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+        return INQ_AMORTIZAR_MONTO
+    context.user_data['monto_amortizar'] = monto_pago
+    await update.message.reply_text( # Usar reply_text porque es respuesta a un mensaje de texto
+        escape_markdown_v2("Ahora, por favor, envía una *foto del comprobante de pago*."),
+        parse_mode='MarkdownV2',
+        reply_markup=boton_volver_menu('inquilino')
+    )
+    return INQ_AMORTIZAR_COMPROBANTE
+
+async def inq_amortizar_comprobante(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Recibe el comprobante de pago y registra el pago como pendiente."""
+    chat_id = update.effective_chat.id
+    monto_amortizar = context.user_data.get('monto_amortizar')
+    if not monto_amortizar:
+        await update.message.reply_text(escape_markdown_v2("Error: No se encontró el monto a amortizar. Por favor, vuelve a intentar desde el menú."),
+                                        reply_markup=teclado_inquilino(), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    if update.message.photo:
+        comprobante_file_id = update.message.photo[-1].file_id
+        comprobante_info_for_db = f"Foto ID: {comprobante_file_id}"
+    else:
+        await update.message.reply_text(escape_markdown_v2("Por favor, envía una *foto* del comprobante. Intenta de nuevo:"),
+                                        parse_mode='MarkdownV2',
+                                        reply_markup=boton_volver_menu('inquilino'))
+        return INQ_AMORTIZAR_COMPROBANTE
+
+    inquilino = obtener_inquilino(chat_id)
+    saldo_actual_inquilino = inquilino[6] if inquilino and inquilino[6] is not None else 0.0
+    saldo_despues_pago_simulado = saldo_actual_inquilino - monto_amortizar
+    
+    # Registrar el pago y obtener su ID
+    cursor.execute(
+        "INSERT INTO pagos(chat_id, fecha_pago, monto_pagado, saldo_restante, comprobante, confirmado) VALUES (?, ?, ?, ?, ?, ?)",
+        (chat_id, datetime.now().strftime("%Y-%m-%d"), monto_amortizar, saldo_despues_pago_simulado, comprobante_info_for_db, 0)
+    )
+    conn.commit()
+    pago_id = cursor.lastrowid # Obtener el ID del pago recién insertado
+    logger.info("Pago de %s registrado para %s. Saldo pendiente de confirmación. Pago ID: %s", monto_amortizar, chat_id, pago_id)
+
+    await update.message.reply_text(
+        escape_markdown_v2(f"Tu pago de {monto_amortizar:.2f} Bs. ha sido registrado y está *pendiente de confirmación* por el administrador."),
+        parse_mode='MarkdownV2',
+        reply_markup=teclado_inquilino()
+    )
+    
+    for admin_id in _admins_a_notificar():
+        try:
+            inquilino_nombre = inquilino[1] if inquilino else chat_id
+            
+            # Botón para confirmar directamente - NUEVO CALLBACK DATA
+            keyboard = InlineKeyboardMarkup([
+                [InlineKeyboardButton("✅ Confirmar Pago Directo", callback_data=datos_guardados('pago_directo', pago_id, shards.actual().nombre))]
+            ])
+
+            await context.bot.send_message(
+                chat_id=admin_id,
+                text=escape_markdown_v2(f"🚨 *Nuevo pago pendiente de confirmación:*\n"
+                         f"Inquilino: {escape_markdown_v2(inquilino_nombre)} (ID: {chat_id})\n"
+                         f"Monto: {monto_amortizar:.2f} Bs."),
+                parse_mode='MarkdownV2'
+            )
+            if update.message.photo:
+                await context.bot.send_photo(
+                    chat_id=admin_id,
+                    photo=comprobante_file_id,
+                    caption=escape_markdown_v2(f"Comprobante de pago de {escape_markdown_v2(inquilino_nombre)} para {monto_amortizar:.2f} Bs."),
+                    reply_markup=keyboard, # Añadir el botón al comprobante
+                    parse_mode='MarkdownV2'
+                )
+            # No hay `else` aquí, porque si es una foto, el botón va en la foto. Si no es foto, el mensaje de arriba ya se envió.
+
+        except Exception as e:
+            logger.error("Error al notificar al admin %s sobre pago pendiente: %s", admin_id, e)
+
+    return ConversationHandler.END
+
+# --- Handlers para inquilinos ---
+
+async def ver_mi_propiedad(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra los detalles de la propiedad asignada al inquilino."""
+    query = update.callback_query
+    await query.answer()
+    chat_id = query.message.chat.id
+    inquilino = obtener_inquilino(chat_id)
+
+    if not inquilino or inquilino[7] is None: # inquilino[7] es propiedad_id
+        await query.edit_message_text(escape_markdown_v2("No tienes una propiedad asignada aún. Contacta al administrador."),
+                                      reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+
+    propiedad_id = inquilino[7]
+    propiedad = obtener_propiedad_por_id(propiedad_id)
+
+    if propiedad:
+        texto = (
+            f"🏡 *Detalles de tu Propiedad* 🏡\n\n"
+            f"*Nombre:* {escape_markdown_v2(propiedad[1])}\n"
+            f"*Dirección:* {escape_markdown_v2(propiedad[2])}\n\n"
+            f"🌐 *Información Wi-Fi:*\n"
+            f"  - *SSID:* `{escape_markdown_v2(propiedad[3] if propiedad[3] else 'No asignado')}`\n"
+            f"  - *Contraseña:* `{escape_markdown_v2(propiedad[4] if propiedad[4] else 'No asignado')}`\n"
+        )
+        
+        has_medidores = False
+        medidor_luz = obtener_medidor_por_id(inquilino[8]) if inquilino[8] else None
+        medidor_agua = obtener_medidor_por_id(inquilino[9]) if inquilino[9] else None
+        medidor_gas = obtener_medidor_por_id(inquilino[10]) if inquilino[10] else None
+
+        if medidor_luz or medidor_agua or medidor_gas:
+            texto += "\n⚡💧🔥 *Tus Medidores Asignados:*\n"
+            has_medidores = True
+
+        if medidor_luz:
+            texto += f"  - *Luz:* {escape_markdown_v2(medidor_luz[2])} (Tipo: {escape_markdown_v2(medidor_luz[3].capitalize())})\n"
+        if medidor_agua:
+            texto += f"  - *Agua:* {escape_markdown_v2(medidor_agua[2])} (Tipo: {escape_markdown_v2(medidor_agua[3].capitalize())})\n"
+        if medidor_gas:
+            texto += f"  - *Gas:* {escape_markdown_v2(medidor_gas[2])} (Tipo: {escape_markdown_v2(medidor_gas[3].capitalize())})\n"
+
+        if not has_medidores:
+            texto += "\n_No tienes medidores de servicios asignados a tu propiedad._\n"
+
+        await query.edit_message_text(escape_markdown_v2(texto), reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+    else:
+        await query.edit_message_text(escape_markdown_v2("No se encontró la información de tu propiedad. Contacta al administrador."),
+                                      reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def ver_saldo_y_pagos(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Muestra el saldo actual del inquilino y el detalle de pagos/prorrateo."""
+    query = update.callback_query
+    await query.answer()
+    chat_id = query.message.chat.id
+    inquilino = obtener_inquilino(chat_id)
+
+    if not inquilino:
+        await query.edit_message_text(escape_markdown_v2("No estás registrado. Por favor, usa /start para iniciar el registro."),
+                                      reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+        return ConversationHandler.END
+    
+    if inquilino[3] is None: # Si el inquilino no tiene fecha de ingreso, su registro está incompleto
+        await query.edit_message_text(
+            escape_markdown_v2("Tu registro está pendiente de validación por el administrador. Por favor, espera a que el administrador complete tu registro para ver esta información."),
+            reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+
+
+    # Datos del inquilino:
+    # 0: chat_id, 1: nombre, 2: ci, 3: fecha_ingreso, 4: monto_alquiler, 5: tipo_alquiler, 6: saldo
+    # 7: propiedad_id, 8: medidor_luz_id, 9: medidor_agua_id, 10: medidor_gas_id, 11: num_personas
+    nombre_inquilino = inquilino[1]
+    monto_alquiler = inquilino[4] if inquilino[4] is not None else 0.0
+    saldo_actual = inquilino[6] if inquilino[6] is not None else 0.0
+    tipo_alquiler = inquilino[5]
+    propiedad_id = inquilino[7]
+    num_personas_inquilino = inquilino[11] if inquilino[11] is not None else 1
+
+    texto = f"Hola {escape_markdown_v2(nombre_inquilino)},\n\n"
+    texto += f"Tu alquiler mensual base es: *{monto_alquiler:.2f} Bs.*"
+    texto += f"\nSaldo pendiente total: *{saldo_actual:.2f} Bs.*"
+    texto += "\n\n"
+
+    # Calcular prorrateo si aplica (solo para mostrar un estimado, no afecta el saldo directamente aquí)
+    if tipo_alquiler == 'prorrateo':
+        texto += "*Estimado de Servicios (Mes actual):*\n"
+        current_year = datetime.now().year
+        current_month = datetime.now().month
+        total_servicios_prorrateo_estimado, detalle_servicios = calcular_servicios_prorrateo(
+            propiedad_id, num_personas_inquilino, inquilino[8], inquilino[9], inquilino[10], current_year, current_month
+        )
+        texto += detalle_servicios
+
+        texto += f"\nTotal estimado servicios: *{total_servicios_prorrateo_estimado:.2f} Bs.*"
+        texto += f"\nTotal mensual estimado (Alquiler + Servicios): *{(monto_alquiler + total_servicios_prorrateo_estimado):.2f} Bs.*"
+        texto += "\n\n"
+
+    # Historial de pagos
+    cursor.execute("SELECT fecha_pago, monto_pagado, confirmado FROM pagos WHERE chat_id = ? ORDER BY fecha_pago DESC LIMIT 5", (chat_id,))
+    pagos_recientes = cursor.fetchall()
+    if pagos_recientes:
+        texto += "*Últimos pagos registrados:*\n"
+        for fecha, monto, confirmado in pagos_recientes:
+            estado = "Confirmado" if confirmado else "Pendiente"
+            texto += f"- {fecha}: {monto:.2f} Bs. ({estado})\n"
+    else:
+        texto += "No hay pagos registrados.\n"
+
+    await query.edit_message_text(escape_markdown_v2(texto), reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+    return ConversationHandler.END
+
+async def handle_queja_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el click en 'Enviar queja/sugerencia'."""
+    query = update.callback_query
+    await query.answer()
+    chat_id = query.message.chat.id
+    inquilino = obtener_inquilino(chat_id)
+    if inquilino and inquilino[3] is not None:
+        await query.edit_message_text(
+            escape_markdown_v2("Por favor, escribe tu queja o sugerencia:"),
+            reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2'
+        )
+        return INQ_ENVIAR_QUEJA
+    else:
+        await query.edit_message_text(
+            escape_markdown_v2("No puedes enviar quejas aún. Tu registro está pendiente o incompleto. Contacta al administrador."),
+            reply_markup=teclado_inquilino(), parse_mode='MarkdownV2'
+        )
+        return ConversationHandler.END
+
+async def inq_enviar_queja(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Recibe la queja/sugerencia del inquilino y la registra (solo texto)."""
+    chat_id = update.effective_chat.id
+    texto_queja = update.message.text.strip()
+
+    if not texto_queja:
+        await update.message.reply_text(escape_markdown_v2("La queja no puede estar vacía. Por favor, escribe tu queja o sugerencia:"),
+                                        reply_markup=boton_volver_menu('inquilino'), parse_mode='MarkdownV2')
+        return INQ_ENVIAR_QUEJA
+
+    # Register the complaint (text only for now in DB)
+    registrar_queja(chat_id, texto_queja)
+    
+    # Get the ID of the newly inserted complaint to use in the admin notification button
+    cursor.execute("SELECT id FROM quejas WHERE chat_id = ? ORDER BY fecha DESC LIMIT 1", (chat_id,))
+    queja_id = cursor.fetchone()[0]
+
+    await update.message.reply_text(
+        escape_markdown_v2("Gracias, tu queja/sugerencia ha sido enviada a la administración."),
+        reply_markup=teclado_inquilino(), parse_mode='MarkdownV2'
+    )
+    # Notificar al administrador sobre la nueva queja
+    for admin_id in _admins_a_notificar():
+        try:
+            inquilino_info = obtener_inquilino(chat_id)
+            inquilino_nombre = inquilino_info[1] if inquilino_info else chat_id
+            
+            # Botón para marcar como resuelta directamente - NUEVO CALLBACK DATA
+            keyboard = InlineKeyboardMarkup([
+                [InlineKeyboardButton("✅ Marcar como Resuelta Directo", callback_data=datos_guardados('queja_directa', queja_id, shards.actual().nombre))]
+            ])
+
+            admin_message_text = escape_markdown_v2(f"🔔 *Nueva queja/sugerencia de:*\n"
+                                 f"*Inquilino:* {escape_markdown_v2(inquilino_nombre)} (ID: {chat_id})\n"
+                                 f"*Mensaje:* {escape_markdown_v2(texto_queja)}\n")
+
+            await context.bot.send_message(
+                chat_id=admin_id,
+                text=admin_message_text,
+                reply_markup=keyboard,
+                parse_mode='MarkdownV2'
+            )
+            logger.info("Admin %s notificado sobre nueva queja de %s.", admin_id, inquilino_nombre)
+        except Exception as e:
+            logger.error("Error al notificar al admin %s sobre nueva queja: %s", admin_id, e)
+    return ConversationHandler.END
@@ -0,0 +1,211 @@
+"""Teclados inline del bot.
+
+Los teclados fijos se construyen una sola vez (InlineKeyboardMarkup es inmutable). Los de
+propiedades y medidores se cachean por versión del catálogo, que cambia al agregar,
+modificar o eliminar propiedades y medidores."""
+
+import functools
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot import shards
+from bot.db import obtener_medidores_por_propiedad, obtener_propiedades, obtener_version_cache
+
+# --- Teclados Inline ---
+
+MAX_INQUILINOS_EN_TECLADO = 20 # Con más inquilinos, la selección se hace con la búsqueda inline
+_cache_catalogo = {} # (shard, argumentos del teclado) -> (versión del catálogo, teclado)
+
+@functools.cache
+def teclado_inquilino():
+    """Retorna el teclado inline para inquilinos."""
+    keyboard = [
+        [InlineKeyboardButton("Ver saldo y pagos", callback_data='ver_saldo')],
+        [InlineKeyboardButton("Amortizar alquiler", callback_data='amortizar')],
+        [InlineKeyboardButton("Enviar queja/sugerencia", callback_data='queja')],
+        [InlineKeyboardButton("Ver detalles de mi propiedad", callback_data='ver_mi_propiedad')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_admin():
+    """Retorna el teclado inline para administradores, con submenús."""
+    keyboard = [
+        [InlineKeyboardButton("Gestión de Inquilinos", callback_data='admin_menu_inquilinos')],
+        [InlineKeyboardButton("Facturación y Medidores", callback_data='admin_menu_facturacion')],
+        [InlineKeyboardButton("Comunicación y Pagos", callback_data='admin_menu_comunicacion')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_admin_inquilinos():
+    """Retorna el teclado inline para la gestión de inquilinos."""
+    keyboard = [
+        [InlineKeyboardButton("Completar registro de inquilino", callback_data='admin_reg_inquilino')],
+        [InlineKeyboardButton("Modificar datos de inquilino", callback_data='admin_modificar_inquilino')],
+        [InlineKeyboardButton("Añadir nuevo inquilino (manual)", callback_data='admin_nuevo_inquilino')],
+        [InlineKeyboardButton("Eliminar inquilino", callback_data='admin_eliminar_inquilino')],
+        [InlineKeyboardButton("Ver inquilinos morosos", callback_data='admin_morosos')],
+        [InlineKeyboardButton("Volver al menú principal", callback_data='menu_admin')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_admin_facturacion():
+    """Retorna el teclado inline para la gestión de facturación y lecturas."""
+    keyboard = [
+        [InlineKeyboardButton("Registrar factura", callback_data='admin_reg_factura')],
+        [InlineKeyboardButton("Registrar lectura contador", callback_data='admin_reg_lectura')],
+        [InlineKeyboardButton("Gestionar propiedades y medidores", callback_data='admin_gestionar_propiedades')],
+        [InlineKeyboardButton("Ver Resumen Contable", callback_data='admin_resumen_contable')],
+        [InlineKeyboardButton("Reporte anual (CSV)", callback_data='admin_reporte_anual')],
+        [InlineKeyboardButton("Volver al menú principal", callback_data='menu_admin')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_admin_comunicacion():
+    """Retorna el teclado inline para la gestión de comunicación y pagos."""
+    keyboard = [
+        [InlineKeyboardButton("Generar Cobro Mensual", callback_data='admin_generar_cobro_mensual')],
+        [InlineKeyboardButton("Confirmar pagos pendientes", callback_data='admin_confirmar_pagos')],
+        [InlineKeyboardButton("Leer quejas y sugerencias", callback_data='admin_quejas')],
+        [InlineKeyboardButton("Enviar Aviso", callback_data='admin_send_notice')],
+        [InlineKeyboardButton("Volver al menú principal", callback_data='menu_admin')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_gestionar_propiedades():
+    """Retorna el teclado inline para gestionar propiedades."""
+    keyboard = [
+        [InlineKeyboardButton("Ver propiedades", callback_data='admin_ver_propiedades')],
+        [InlineKeyboardButton("Añadir propiedad", callback_data='admin_add_propiedad')],
+        [InlineKeyboardButton("Modificar propiedad", callback_data='admin_modificar_propiedad')], # Nuevo botón
+        [InlineKeyboardButton("Eliminar propiedad", callback_data='admin_del_propiedad')],
+        [InlineKeyboardButton("Añadir medidor a propiedad", callback_data='admin_add_medidor')],
+        [InlineKeyboardButton("Ver P&L por propiedad", callback_data='admin_pyg')],
+        [InlineKeyboardButton("Volver a Facturación y Medidores", callback_data='admin_menu_facturacion')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_send_notice_scope():
+    """Retorna el teclado para seleccionar el alcance del aviso."""
+    keyboard = [
+        [InlineKeyboardButton("Todos en una propiedad", callback_data='notice_scope_property')],
+        [InlineKeyboardButton("Un inquilino específico", callback_data='notice_scope_single_inquilino')],
+        [InlineKeyboardButton("Volver a Comunicación y Pagos", callback_data='admin_menu_comunicacion')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_tipos_servicio_factura():
+    """Retorna el teclado para seleccionar el tipo de servicio (luz, agua, gas, internet_tv) para facturas."""
+    keyboard = [
+        [InlineKeyboardButton("Luz", callback_data='servicio_luz')],
+        [InlineKeyboardButton("Agua", callback_data='servicio_agua')],
+        [InlineKeyboardButton("Gas", callback_data='servicio_gas')],
+        [InlineKeyboardButton("Internet/TV", callback_data='servicio_internet_tv')],
+        [InlineKeyboardButton("Volver", callback_data='admin_menu_facturacion')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_modificar_inquilino_campos():
+    """Retorna el teclado para seleccionar el campo a modificar de un inquilino."""
+    keyboard = [
+        [InlineKeyboardButton("Nombre", callback_data='mod_inq_nombre')],
+        [InlineKeyboardButton("CI", callback_data='mod_inq_ci')],
+        [InlineKeyboardButton("Fecha de Ingreso", callback_data='mod_inq_fecha_ingreso')],
+        [InlineKeyboardButton("Monto Alquiler", callback_data='mod_inq_monto_alquiler')],
+        [InlineKeyboardButton("Tipo Alquiler", callback_data='mod_inq_tipo_alquiler')],
+        [InlineKeyboardButton("Propiedad", callback_data='mod_inq_propiedad_id')],
+        [InlineKeyboardButton("Número de Personas", callback_data='mod_inq_num_personas')],
+        [InlineKeyboardButton("Medidor Luz", callback_data='mod_inq_medidor_luz_id')],
+        [InlineKeyboardButton("Medidor Agua", callback_data='mod_inq_medidor_agua_id')],
+        [InlineKeyboardButton("Medidor Gas", callback_data='mod_inq_medidor_gas_id')],
+        [InlineKeyboardButton("Volver a Gestión de Inquilinos", callback_data='admin_menu_inquilinos')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def teclado_generar_cobro_mensual_scope():
+    """Retorna el teclado para seleccionar el alcance del cobro mensual."""
+    keyboard = [
+        [InlineKeyboardButton("Todos los inquilinos", callback_data='charge_scope_all')],
+        [InlineKeyboardButton("Inquilinos de una propiedad", callback_data='charge_scope_property')],
+        [InlineKeyboardButton("Volver a Comunicación y Pagos", callback_data='admin_menu_comunicacion')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+def teclado_seleccion_inquilinos(inquilinos, prefijo, menu_volver):
+    """Teclado para elegir un inquilino: botón de búsqueda inline y, si caben, los inquilinos listados."""
+    keyboard = [[InlineKeyboardButton("🔎 Buscar inquilino", switch_inline_query_current_chat='')]]
+    if len(inquilinos) <= MAX_INQUILINOS_EN_TECLADO:
+        keyboard += [
+            [InlineKeyboardButton(f"{nombre} (CI: {ci}) - ID: {chat_id}", callback_data=f"{prefijo}{chat_id}")]
+            for chat_id, nombre, ci in inquilinos
+        ]
+    keyboard.append([InlineKeyboardButton("Volver", callback_data=menu_volver)])
+    return InlineKeyboardMarkup(keyboard)
+
+@functools.cache
+def boton_volver_menu(usuario='inquilino', menu_destino=''):
+    """Retorna un botón para volver a un menú específico o al principal del usuario."""
+    if menu_destino == 'admin_propiedades':
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Volver a Gestión de Propiedades", callback_data='admin_gestionar_propiedades')]])
+    elif menu_destino == 'admin_modificar_inquilino':
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Volver a Modificar Inquilino", callback_data='admin_modificar_inquilino')]])
+    elif menu_destino == 'admin_menu_inquilinos':
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Volver a Gestión de Inquilinos", callback_data='admin_menu_inquilinos')]])
+    elif menu_destino == 'admin_menu_facturacion':
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Volver a Facturación y Medidores", callback_data='admin_menu_facturacion')]])
+    elif menu_destino == 'admin_menu_comunicacion':
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Volver a Comunicación y Pagos", callback_data='admin_menu_comunicacion')]])
+    elif usuario == 'admin':
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Volver al menú principal", callback_data='menu_admin')]])
+    else: # Default para inquilino
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Volver al menú principal", callback_data='menu_inquilino')]])
+
+# --- Teclados del catálogo (propiedades y medidores) ---
+
+def _teclado_catalogo(clave, construir):
+    """Devuelve el teclado cacheado para ``clave`` si el catálogo no cambió; si no, lo reconstruye."""
+    version = obtener_version_cache('catalogo')
+    clave = (shards.actual().nombre, clave)
+    cacheado = _cache_catalogo.get(clave)
+    if cacheado and cacheado[0] == version:
+        return cacheado[1]
+    teclado = construir()
+    _cache_catalogo[clave] = (version, teclado)
+    return teclado
+
+def _filas_extra(extra, menu_volver):
+    filas = [[InlineKeyboardButton(texto, callback_data=datos)] for texto, datos in extra]
+    if menu_volver:
+        filas.append([InlineKeyboardButton("Volver", callback_data=menu_volver)])
+    return filas
+
+def teclado_propiedades(prefijo, menu_volver=None, extra=()):
+    """Teclado con una propiedad por fila (``<prefijo><id>``), los botones ``extra`` y "Volver". None si no hay propiedades."""
+    def construir():
+        propiedades = obtener_propiedades()
+        if not propiedades:
+            return None
+        filas = [[InlineKeyboardButton(p[1], callback_data=f"{prefijo}{p[0]}")] for p in propiedades]
+        return InlineKeyboardMarkup(filas + _filas_extra(extra, menu_volver))
+    return _teclado_catalogo(('propiedades', prefijo, menu_volver, extra), construir)
+
+def teclado_medidores(propiedad_id, prefijo, tipo_servicio=None, menu_volver=None, extra=(), mostrar_tipo=False):
+    """Teclado con los medidores de una propiedad (``<prefijo><id>``), opcionalmente de un solo servicio. None si no hay."""
+    def construir():
+        medidores = obtener_medidores_por_propiedad(propiedad_id, tipo_servicio)
+        if not medidores:
+            return None
+        filas = [
+            [InlineKeyboardButton(f"{m[1]} ({m[2].capitalize()})" if mostrar_tipo else m[1], callback_data=f"{prefijo}{m[0]}")]
+            for m in medidores
+        ]
+        return InlineKeyboardMarkup(filas + _filas_extra(extra, menu_volver))
+    return _teclado_catalogo(('medidores', propiedad_id, prefijo, tipo_servicio, menu_volver, extra, mostrar_tipo), construir)
@@ -0,0 +1,93 @@
+"""Configuración del logging: registros en JSON escritos por un hilo aparte, con niveles por módulo.
+
+Los handlers del bot solo encolan cada registro (``QueueHandler``); un ``QueueListener`` los
+formatea y escribe en stderr fuera del event loop. Variables de entorno:
+
+- ``LOG_FORMAT``: ``json`` (por defecto, una línea por registro) o ``texto`` (para desarrollo local).
+- ``LOG_LEVEL``: nivel general (``INFO`` por defecto).
+- ``LOG_NIVELES``: niveles por módulo, p. ej. ``bot.handlers.admin_cobros=WARNING,httpx=WARNING``.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+from bot.metrics import handler_actual, update_actual
+
+FORMATO_TEXTO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Módulos de terceros que en INFO registran cada request
+NIVELES_POR_DEFECTO = {'httpx': 'WARNING'}
+
+_listener = None
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con el handler y el update en curso cuando los hay."""
+
+    def format(self, record):
+        datos = {
+            'fecha': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+        }
+        for campo in ('handler', 'update_id'):
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                datos[campo] = valor
+        if record.exc_text:
+            datos['excepcion'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+class ColaLogs(logging.handlers.QueueHandler):
+    """Encola los registros ya resueltos: el mensaje, la excepción y el contexto de la tarea actual.
+
+    Lo que depende del hilo que registra (contextvars, la traza de la excepción) se resuelve
+    aquí; el formato final y la escritura quedan para el hilo del listener."""
+
+    def prepare(self, record):
+        registro = logging.makeLogRecord(record.__dict__)
+        registro.msg = record.getMessage()
+        registro.args = None
+        if record.exc_info:
+            registro.exc_text = logging.Formatter().formatException(record.exc_info)
+        registro.exc_info = None
+        if getattr(record, 'handler', None) is None and handler_actual.get() != 'sin_handler':
+            registro.handler = handler_actual.get()
+        if getattr(record, 'update_id', None) is None:
+            registro.update_id = update_actual.get()
+        return registro
+
+def _niveles_por_modulo(valor):
+    niveles = dict(NIVELES_POR_DEFECTO)
+    for par in filter(None, (parte.strip() for parte in (valor or '').split(','))):
+        modulo, _, nivel = par.partition('=')
+        niveles[modulo.strip()] = nivel.strip().upper()
+    return niveles
+
+def configurar_logging():
+    """Instala la cola de logs en el logger raíz (una sola vez por proceso) y aplica los niveles."""
+    global _listener
+    if _listener is not None:
+        return
+    salida = logging.StreamHandler(sys.stderr)
+    if os.environ.get('LOG_FORMAT', 'json').lower() == 'texto':
+        salida.setFormatter(logging.Formatter(FORMATO_TEXTO))
+    else:
+        salida.setFormatter(FormatoJSON())
+    cola = queue.SimpleQueue()
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(ColaLogs(cola))
+    raiz.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+    for modulo, nivel in _niveles_por_modulo(os.environ.get('LOG_NIVELES')).items():
+        logging.getLogger(modulo).setLevel(nivel)
+    _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    # Al salir se vacía la cola antes de terminar el proceso
+    atexit.register(_listener.stop)
@@ -0,0 +1,239 @@
+"""Métricas del bot en memoria (contadores e histogramas) expuestas en formato Prometheus.
+
+No depende de Flask ni de python-telegram-bot: ``bot.db`` lo usa para medir las consultas.
+Cada worker de Gunicorn tiene su propio registro; Prometheus agrega por instancia."""
+
+import contextvars
+import functools
+import logging
+import sqlite3
+import threading
+import time
+
+from bot import query_profiler
+
+logger = logging.getLogger(__name__)
+
+# Límites (en segundos) de los histogramas de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Límites del histograma de consultas por update
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Handler y update que se están procesando en la tarea actual; las consultas a la BD se atribuyen a ellos
+handler_actual = contextvars.ContextVar('handler_actual', default='sin_handler')
+update_actual = contextvars.ContextVar('update_actual', default=None)
+# Consultas hechas por el handler en curso (una lista de un elemento, para poder sumar desde el cursor)
+consultas_handler = contextvars.ContextVar('consultas_handler', default=None)
+
+_lock = threading.Lock()
+_contadores = {} # (nombre, etiquetas) -> valor
+_histogramas = {} # (nombre, etiquetas) -> [conteos por bucket, suma, total]
+_gauges = {} # nombre -> (ayuda, función que devuelve el valor)
+_ayudas = {}
+_buckets = {} # nombre del histograma -> límites
+
+def _etiquetas(etiquetas):
+    return tuple(sorted(etiquetas.items()))
+
+def incrementar(nombre, ayuda, valor=1, **etiquetas):
+    """Suma ``valor`` al contador ``nombre`` con las etiquetas dadas."""
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        _ayudas.setdefault(nombre, ('counter', ayuda))
+        _contadores[clave] = _contadores.get(clave, 0) + valor
+
+def observar(nombre, ayuda, valor, buckets=BUCKETS_LATENCIA, **etiquetas):
+    """Registra una observación en el histograma ``nombre``."""
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        _ayudas.setdefault(nombre, ('histogram', ayuda))
+        buckets = _buckets.setdefault(nombre, buckets)
+        histograma = _histogramas.get(clave)
+        if histograma is None:
+            histograma = _histogramas[clave] = [[0] * len(buckets), 0.0, 0]
+        for i, limite in enumerate(buckets):
+            if valor <= limite:
+                histograma[0][i] += 1
+        histograma[1] += valor
+        histograma[2] += 1
+
+def registrar_gauge(nombre, ayuda, funcion):
+    """Registra un gauge cuyo valor se calcula con ``funcion`` al exponer las métricas."""
+    with _lock:
+        _gauges[nombre] = (ayuda, funcion)
+
+def instrumentar(callback, nombre=None):
+    """Envuelve un callback async de handler para medir invocaciones, latencia, errores y uso de la BD."""
+    nombre = nombre or getattr(callback, '__name__', repr(callback))
+
+    @functools.wraps(callback)
+    async def envoltura(update, context):
+        token = handler_actual.set(nombre)
+        token_update = update_actual.set(getattr(update, 'update_id', None))
+        consultas = [0]
+        token_consultas = consultas_handler.set(consultas)
+        inicio = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            incrementar('bot_handler_errores_total', "Errores no capturados por handler.", handler=nombre)
+            raise
+        finally:
+            handler_actual.reset(token)
+            update_actual.reset(token_update)
+            consultas_handler.reset(token_consultas)
+            incrementar('bot_handler_invocaciones_total', "Invocaciones por handler.", handler=nombre)
+            observar('bot_handler_latencia_segundos', "Latencia de los handlers.", time.perf_counter() - inicio, handler=nombre)
+            observar('bot_db_consultas_por_update', "Consultas SQL por invocación de handler.", consultas[0],
+                     buckets=BUCKETS_CONSULTAS, handler=nombre)
+
+    envoltura.metricas_instrumentado = True
+    return envoltura
+
+def instrumentar_handlers(handlers):
+    """Instrumenta in situ el callback de cada handler de la lista (y de los ConversationHandler anidados)."""
+    for handler in handlers:
+        if hasattr(handler, 'entry_points'): # ConversationHandler
+            instrumentar_handlers(handler.entry_points)
+            for handlers_estado in handler.states.values():
+                instrumentar_handlers(handlers_estado)
+            instrumentar_handlers(handler.fallbacks)
+        elif hasattr(handler, 'rutas'): # RouterCallbacks: cada acción tiene su propio callback
+            for accion, (callback, tipos) in handler.rutas.items():
+                if not getattr(callback, 'metricas_instrumentado', False):
+                    handler.rutas[accion] = (instrumentar(callback), tipos)
+        elif not getattr(handler.callback, 'metricas_instrumentado', False):
+            handler.callback = instrumentar(handler.callback)
+
+def registrar_consulta(segundos):
+    """Registra una consulta a la BD atribuida al handler actual."""
+    nombre = handler_actual.get()
+    incrementar('bot_db_consultas_total', "Consultas SQL por handler.", handler=nombre)
+    incrementar('bot_db_segundos_total', "Tiempo en consultas SQL por handler.", segundos, handler=nombre)
+    consultas = consultas_handler.get()
+    if consultas is not None:
+        consultas[0] += 1
+
+def registrar_llamada_api(metodo, segundos, error=False):
+    """Registra una llamada saliente a la API de Telegram."""
+    incrementar('bot_telegram_api_llamadas_total', "Llamadas a la API de Telegram por método.", metodo=metodo)
+    observar('bot_telegram_api_latencia_segundos', "Latencia de la API de Telegram por método.", segundos, metodo=metodo)
+    if error:
+        incrementar('bot_telegram_api_errores_total', "Errores de la API de Telegram por método.", metodo=metodo)
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor de SQLite que mide cada consulta y la atribuye al handler en curso.
+
+    Con el perfilador activo (ver ``bot.query_profiler``) también registra el texto de cada
+    sentencia, el tiempo de sus fetch y las filas devueltas."""
+
+    _sentencia = None # [sql, segundos acumulados, filas, ya registrada como lenta] (solo con el perfilador)
+
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._medir(sql, time.perf_counter() - inicio)
+
+    def executemany(self, sql, secuencia):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, secuencia)
+        finally:
+            self._medir(sql, time.perf_counter() - inicio)
+
+    def _medir(self, sql, segundos):
+        registrar_consulta(segundos)
+        if query_profiler.ACTIVO:
+            filas = max(self.rowcount, 0) # Filas modificadas; las de un SELECT se cuentan al hacer fetch
+            self._sentencia = [sql, segundos, filas, False]
+            query_profiler.registrar(sql, segundos, filas)
+            self._revisar_lenta()
+
+    def _medir_fetch(self, segundos, filas):
+        sentencia = self._sentencia
+        sentencia[1] += segundos
+        sentencia[2] += filas
+        query_profiler.registrar(sentencia[0], segundos, filas, ejecucion=False)
+        self._revisar_lenta()
+
+    def _revisar_lenta(self):
+        sql, segundos, filas, registrada = self._sentencia
+        if not registrada and segundos > query_profiler.UMBRAL_LENTA:
+            self._sentencia[3] = True
+            incrementar('bot_db_consultas_lentas_total', "Consultas SQL más lentas que el umbral del perfilador.", handler=handler_actual.get())
+            query_profiler.registrar_lenta(sql, segundos, filas, handler_actual.get(), update_actual.get())
+
+    def fetchone(self):
+        if self._sentencia is None:
+            return super().fetchone()
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        self._medir_fetch(time.perf_counter() - inicio, fila is not None)
+        return fila
+
+    def fetchmany(self, size=None):
+        if self._sentencia is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        inicio = time.perf_counter()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self._medir_fetch(time.perf_counter() - inicio, len(filas))
+        return filas
+
+    def fetchall(self):
+        if self._sentencia is None:
+            return super().fetchall()
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        self._medir_fetch(time.perf_counter() - inicio, len(filas))
+        return filas
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _formatear_etiquetas(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    texto = ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in pares)
+    return '{' + texto + '}'
+
+def exponer():
+    """Devuelve todas las métricas en formato de texto de Prometheus."""
+    lineas = []
+    with _lock:
+        contadores = dict(_contadores)
+        histogramas = {clave: (list(h[0]), h[1], h[2]) for clave, h in _histogramas.items()}
+        gauges = dict(_gauges)
+        ayudas = dict(_ayudas)
+        buckets = dict(_buckets)
+
+    for nombre, (ayuda, funcion) in sorted(gauges.items()):
+        try:
+            valor = funcion()
+        except Exception:
+            # Un gauge que falla no debe dejar sin /metrics al resto
+            logger.exception("Error al calcular el gauge %s.", nombre)
+            continue
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} gauge")
+        lineas.append(f"{nombre} {valor}")
+
+    for nombre, (tipo, ayuda) in sorted(ayudas.items()):
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        if tipo == 'counter':
+            for (n, etiquetas), valor in sorted(contadores.items()):
+                if n == nombre:
+                    lineas.append(f"{nombre}{_formatear_etiquetas(etiquetas)} {valor}")
+        else:
+            for (n, etiquetas), (conteos, suma, total) in sorted(histogramas.items()):
+                if n != nombre:
+                    continue
+                for limite, conteo in zip(buckets.get(nombre, BUCKETS_LATENCIA), conteos):
+                    lineas.append(f"{nombre}_bucket{_formatear_etiquetas(etiquetas, [('le', limite)])} {conteo}")
+                lineas.append(f"{nombre}_bucket{_formatear_etiquetas(etiquetas, [('le', '+Inf')])} {total}")
+                lineas.append(f"{nombre}_sum{_formatear_etiquetas(etiquetas)} {suma}")
+                lineas.append(f"{nombre}_count{_formatear_etiquetas(etiquetas)} {total}")
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,237 @@
+"""Persistencia de python-telegram-bot en SQLite, compartida entre los workers de Gunicorn.
+
+Guarda los estados de conversación, ``user_data`` y ``chat_data`` en la base de datos (modo WAL),
+para que cada paso de una conversación pueda llegar a cualquier worker."""
+
+import asyncio
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+
+from telegram import Update
+from telegram.ext import BasePersistence, ConversationHandler, PersistenceInput
+
+from bot.db import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+_TABLAS = ('persistencia_user_data', 'persistencia_chat_data')
+
+class SQLitePersistence(BasePersistence):
+    """BasePersistence sobre SQLite con escrituras agrupadas y lectura bajo demanda.
+
+    Las escrituras se acumulan y se vuelcan en una sola transacción al final de cada
+    ronda de ``Application.update_persistence``. Antes de usar los datos de un usuario,
+    chat o conversación se releen de la BD solo si otro proceso hizo commit desde la
+    última lectura (``PRAGMA data_version``)."""
+
+    def __init__(self, ruta=DB_PATH, update_interval=60):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.ruta = ruta
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pendientes = {} # (tabla, clave) -> datos serializados, o None para borrar
+        self._volcado_programado = False
+        self._vistas = {} # (tabla, clave) -> data_version de la última lectura
+
+    def _conexion(self):
+        """Abre la conexión (y crea las tablas) la primera vez que se usa."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.ruta, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            for tabla in _TABLAS:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {tabla} (id INTEGER PRIMARY KEY, datos BLOB NOT NULL)")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS persistencia_conversaciones (
+                    nombre TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    estado BLOB NOT NULL,
+                    PRIMARY KEY (nombre, clave)
+                )
+            ''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _data_version(self):
+        return self._conexion().execute("PRAGMA data_version").fetchone()[0]
+
+    def _leer(self, tabla, clave):
+        """Devuelve (hay_cambios, datos) para una fila; hay_cambios es False si no hace falta releer."""
+        if (tabla, clave) in self._pendientes:
+            return False, None
+        with self._lock:
+            version = self._data_version()
+            if self._vistas.get((tabla, clave)) == version:
+                return False, None
+            if tabla == 'persistencia_conversaciones':
+                nombre, clave_conv = clave
+                fila = self._conn.execute(
+                    "SELECT estado FROM persistencia_conversaciones WHERE nombre = ? AND clave = ?",
+                    (nombre, clave_conv),
+                ).fetchone()
+            else:
+                fila = self._conn.execute(f"SELECT datos FROM {tabla} WHERE id = ?", (clave,)).fetchone()
+            self._vistas[(tabla, clave)] = version
+        return True, pickle.loads(fila[0]) if fila else None
+
+    def _leer_todo(self, tabla):
+        with self._lock:
+            filas = self._conexion().execute(f"SELECT id, datos FROM {tabla}").fetchall()
+        return {id_: pickle.loads(datos) for id_, datos in filas}
+
+    def _encolar(self, tabla, clave, datos):
+        """Agrega una escritura al lote pendiente y programa el volcado al terminar la ronda actual."""
+        self._pendientes[(tabla, clave)] = None if datos is None else pickle.dumps(datos)
+        if not self._volcado_programado:
+            self._volcado_programado = True
+            # update_persistence lanza todas las escrituras con asyncio.gather; el volcado
+            # se ejecuta cuando todas ellas ya se encolaron.
+            asyncio.get_running_loop().call_soon(self._volcar)
+
+    def _volcar(self):
+        """Escribe en una sola transacción todas las escrituras pendientes."""
+        self._volcado_programado = False
+        if not self._pendientes:
+            return
+        pendientes, self._pendientes = self._pendientes, {}
+        with self._lock:
+            conn = self._conexion()
+            try:
+                with conn:
+                    for (tabla, clave), datos in pendientes.items():
+                        if tabla == 'persistencia_conversaciones':
+                            nombre, clave_conv = clave
+                            if datos is None:
+                                conn.execute("DELETE FROM persistencia_conversaciones WHERE nombre = ? AND clave = ?", (nombre, clave_conv))
+                            else:
+                                conn.execute(
+                                    "INSERT OR REPLACE INTO persistencia_conversaciones (nombre, clave, estado) VALUES (?, ?, ?)",
+                                    (nombre, clave_conv, datos),
+                                )
+                        elif datos is None:
+                            conn.execute(f"DELETE FROM {tabla} WHERE id = ?", (clave,))
+                        else:
+                            conn.execute(f"INSERT OR REPLACE INTO {tabla} (id, datos) VALUES (?, ?)", (clave, datos))
+            except sqlite3.Error as e:
+                # Se reintenta en la siguiente ronda sin pisar escrituras más nuevas
+                for clave, datos in pendientes.items():
+                    self._pendientes.setdefault(clave, datos)
+                logger.error("Error al volcar la persistencia (%s escrituras): %s", len(pendientes), e)
+                return
+            # Lo que acabamos de escribir es lo último que hay en la BD
+            version = self._data_version()
+            for clave in pendientes:
+                self._vistas[clave] = version
+
+    # --- Carga inicial ---
+    async def get_user_data(self):
+        return self._leer_todo('persistencia_user_data')
+
+    async def get_chat_data(self):
+        return self._leer_todo('persistencia_chat_data')
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        with self._lock:
+            filas = self._conexion().execute(
+                "SELECT clave, estado FROM persistencia_conversaciones WHERE nombre = ?", (name,)
+            ).fetchall()
+        return {tuple(json.loads(clave)): pickle.loads(estado) for clave, estado in filas}
+
+    # --- Escrituras (agrupadas) ---
+    async def update_conversation(self, name, key, new_state):
+        self._encolar('persistencia_conversaciones', (name, json.dumps(list(key))), new_state)
+
+    async def update_user_data(self, user_id, data):
+        self._encolar('persistencia_user_data', user_id, data)
+
+    async def update_chat_data(self, chat_id, data):
+        self._encolar('persistencia_chat_data', chat_id, data)
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_user_data(self, user_id):
+        self._encolar('persistencia_user_data', user_id, None)
+
+    async def drop_chat_data(self, chat_id):
+        self._encolar('persistencia_chat_data', chat_id, None)
+
+    # --- Lecturas bajo demanda ---
+    async def refresh_user_data(self, user_id, user_data):
+        hay_cambios, datos = self._leer('persistencia_user_data', user_id)
+        if hay_cambios:
+            user_data.clear()
+            user_data.update(datos or {})
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        hay_cambios, datos = self._leer('persistencia_chat_data', chat_id)
+        if hay_cambios:
+            chat_data.clear()
+            chat_data.update(datos or {})
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    def olvidar_usuario(self, user_id):
+        """Descarta la última lectura del usuario para que la próxima vez se relea de la BD."""
+        self._vistas.pop(('persistencia_user_data', user_id), None)
+
+    def leer_conversacion(self, nombre, clave):
+        """Devuelve (hay_cambios, estado) del estado guardado de una conversación."""
+        return self._leer('persistencia_conversaciones', (nombre, json.dumps(list(clave))))
+
+    async def flush(self):
+        self._volcar()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+class ConversationHandlerCompartido(ConversationHandler):
+    """ConversationHandler que relee el estado de la conversación de la persistencia antes de cada update.
+
+    PTB solo carga los estados al arrancar; con varios workers otro proceso puede haber
+    avanzado la conversación desde entonces."""
+
+    def check_update(self, update):
+        persistencia = getattr(self, '_persistencia_compartida', None)
+        if persistencia is not None and isinstance(update, Update) and update.effective_chat and update.effective_user:
+            clave = self._get_key(update)
+            hay_cambios, estado = persistencia.leer_conversacion(self.name, clave)
+            if hay_cambios:
+                # Se escribe sin marcar la clave, para no volver a persistir lo que se acaba de leer
+                if estado is None or estado == self.END:
+                    self._conversations.data.pop(clave, None)
+                else:
+                    self._conversations.data[clave] = estado
+        return super().check_update(update)
+
+    async def _initialize_persistence(self, application):
+        if isinstance(application.persistence, SQLitePersistence):
+            self._persistencia_compartida = application.persistence
+        return await super()._initialize_persistence(application)
+
+async def volcar_persistencia(update, context):
+    """Persiste los datos del update recién procesado sin esperar al intervalo periódico."""
+    application = context.application
+    application.mark_data_for_update_persistence(
+        chat_ids=update.effective_chat.id if update.effective_chat else None,
+        user_ids=update.effective_user.id if update.effective_user else None,
+    )
+    await application.update_persistence()
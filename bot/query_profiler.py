@@ -0,0 +1,82 @@
+"""Perfilador de consultas SQL (opcional): log de consultas lentas y las sentencias más costosas.
+
+Se activa con ``SQL_PROFILER=1``. ``bot.metrics.CursorMedido`` le pasa cada sentencia con su
+duración, las filas devueltas o modificadas, el handler y el update en curso. Las sentencias
+se agrupan por su texto normalizado (los parámetros van aparte, así que no se guardan datos de
+usuarios). Las que superan ``SQL_LENTA_MS`` se registran en el log y en una lista de las últimas.
+El administrador las consulta con /consultas."""
+
+import collections
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+ACTIVO = os.environ.get('SQL_PROFILER', '0') not in ('', '0', 'false', 'no')
+UMBRAL_LENTA = float(os.environ.get('SQL_LENTA_MS', '100')) / 1000
+MAX_SENTENCIAS = 500 # Sentencias distintas que se acumulan; las nuevas se ignoran al llegar al límite
+MAX_LENTAS = 50
+
+_lock = threading.Lock()
+_sentencias = {} # sql normalizado -> [ejecuciones, segundos, segundos máx., filas]
+_lentas = collections.deque(maxlen=MAX_LENTAS) # (fecha, segundos, filas, handler, update_id, sql)
+
+def normalizar(sql):
+    return ' '.join(sql.split())
+
+def registrar(sql, segundos, filas, ejecucion=True):
+    """Acumula una ejecución (o el tiempo y las filas de un fetch, con ``ejecucion=False``)."""
+    clave = normalizar(sql)
+    with _lock:
+        datos = _sentencias.get(clave)
+        if datos is None:
+            if len(_sentencias) >= MAX_SENTENCIAS:
+                return
+            datos = _sentencias[clave] = [0, 0.0, 0.0, 0]
+        if ejecucion:
+            datos[0] += 1
+        datos[1] += segundos
+        datos[2] = max(datos[2], segundos)
+        datos[3] += filas
+
+def registrar_lenta(sql, segundos, filas, handler, update_id):
+    """Registra en el log y en la lista de lentas una sentencia que superó el umbral."""
+    sql = normalizar(sql)
+    with _lock:
+        _lentas.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), segundos, filas, handler, update_id, sql))
+    logger.warning("Consulta lenta (%.1f ms, %s filas) en %s, update %s: %s", segundos * 1000, filas, handler, update_id, sql[:300])
+
+def top(n=10, orden='segundos'):
+    """Las ``n`` sentencias con más tiempo total (o más ``ejecuciones``/``filas``)."""
+    indice = {'ejecuciones': 0, 'segundos': 1, 'maximo': 2, 'filas': 3}[orden]
+    with _lock:
+        filas = [(sql, *datos) for sql, datos in _sentencias.items()]
+    return sorted(filas, key=lambda fila: fila[indice + 1], reverse=True)[:n]
+
+def lentas(n=10):
+    with _lock:
+        return list(_lentas)[-n:][::-1]
+
+def reiniciar():
+    with _lock:
+        _sentencias.clear()
+        _lentas.clear()
+
+def texto_resumen(n=10):
+    """Texto (sin escapar) con las sentencias más costosas y las últimas lentas de este worker."""
+    if not ACTIVO:
+        return "El perfilador de consultas está desactivado. Actívalo con SQL_PROFILER=1."
+    texto = f"Consultas con más tiempo total (worker {os.getpid()}):\n\n"
+    for sql, ejecuciones, segundos, maximo, filas in top(n):
+        texto += (
+            f"- {segundos * 1000:.0f} ms en {ejecuciones} ejecuciones "
+            f"(máx. {maximo * 1000:.1f} ms, {filas} filas): {sql[:120]}\n"
+        )
+    ultimas = lentas(5)
+    if ultimas:
+        texto += f"\nÚltimas consultas de más de {UMBRAL_LENTA * 1000:.0f} ms:\n"
+        for fecha, segundos, filas, handler, update_id, sql in ultimas:
+            texto += f"- {fecha} {segundos * 1000:.0f} ms en {handler} (update {update_id}): {sql[:120]}\n"
+    return texto
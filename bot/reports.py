@@ -0,0 +1,263 @@
+"""Motor de resúmenes contables: totales y detalles por período calculados en SQL y cacheados.
+
+Las consultas usan ``shards.lectura()``: una conexión de solo lectura y una foto consistente de la base."""
+
+import csv
+import importlib.util
+import io
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from bot import shards
+from bot.formatting import escape_markdown_v2
+
+logger = logging.getLogger(__name__)
+
+_cache_resumenes = {} # (shard, year, month) -> (version, resumen)
+_cache_reportes = OrderedDict() # (shard, desde, hasta, formato, version) -> (nombre_archivo, contenido)
+_cache_lock = threading.Lock()
+MAX_REPORTES_CACHEADOS = 32
+
+COLUMNAS_REPORTE = ("Mes", "Propiedad", "Ingresos", "Gastos", "Balance")
+
+def rango_mes(year, month):
+    """Devuelve las fechas (inicio, fin) del mes como texto ISO, con fin exclusivo."""
+    siguiente = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01", f"{siguiente[0]:04d}-{siguiente[1]:02d}-01"
+
+def _version_contable(cursor):
+    fila = cursor.execute("SELECT version FROM versiones_cache WHERE clave = 'contabilidad'").fetchone()
+    return fila[0] if fila else 0
+
+def _calcular_resumen(cursor, year, month):
+    """Calcula el resumen de un mes con dos consultas: detalles y agregados."""
+    inicio, fin = rango_mes(year, month)
+    cursor.execute('''
+        SELECT 'ingreso', p.fecha_pago, p.monto_pagado, COALESCE(i.nombre, 'ID: ' || p.chat_id), NULL
+        FROM pagos p LEFT JOIN inquilinos i ON i.chat_id = p.chat_id
+        WHERE p.confirmado = 1 AND p.fecha_pago >= ? AND p.fecha_pago < ?
+        UNION ALL
+        SELECT 'gasto', f.fecha, f.monto, COALESCE(pr.nombre, 'ID: ' || f.propiedad_id), f.tipo_servicio
+        FROM facturas f LEFT JOIN propiedades pr ON pr.id = f.propiedad_id
+        WHERE f.fecha >= ? AND f.fecha < ?
+    ''', (inicio, fin, inicio, fin))
+    ingresos, gastos = [], []
+    for tipo, fecha, monto, nombre, servicio in cursor.fetchall():
+        if tipo == 'ingreso':
+            ingresos.append((fecha, monto, nombre))
+        else:
+            gastos.append((fecha, monto, servicio, nombre))
+
+    cursor.execute('''
+        SELECT 'inquilino', COALESCE(i.nombre, 'ID: ' || p.chat_id), NULL, SUM(p.monto_pagado)
+        FROM pagos p LEFT JOIN inquilinos i ON i.chat_id = p.chat_id
+        WHERE p.confirmado = 1 AND p.fecha_pago >= ? AND p.fecha_pago < ?
+        GROUP BY p.chat_id
+        UNION ALL
+        SELECT 'propiedad', COALESCE(pr.nombre, 'ID: ' || f.propiedad_id), f.tipo_servicio, SUM(f.monto)
+        FROM facturas f LEFT JOIN propiedades pr ON pr.id = f.propiedad_id
+        WHERE f.fecha >= ? AND f.fecha < ?
+        GROUP BY f.propiedad_id, f.tipo_servicio
+    ''', (inicio, fin, inicio, fin))
+    por_inquilino, por_propiedad_servicio = {}, {}
+    por_propiedad, por_servicio = {}, {}
+    for tipo, nombre, servicio, monto in cursor.fetchall():
+        if tipo == 'inquilino':
+            por_inquilino[nombre] = por_inquilino.get(nombre, 0) + monto
+        else:
+            por_propiedad_servicio[(nombre, servicio)] = monto
+            por_propiedad[nombre] = por_propiedad.get(nombre, 0) + monto
+            por_servicio[servicio] = por_servicio.get(servicio, 0) + monto
+
+    total_ingresos = sum(por_inquilino.values())
+    total_gastos = sum(por_servicio.values())
+    return {
+        'year': year,
+        'month': month,
+        'total_ingresos': total_ingresos,
+        'total_gastos': total_gastos,
+        'balance': total_ingresos - total_gastos,
+        'ingresos': ingresos,
+        'gastos': gastos,
+        'por_inquilino': por_inquilino,
+        'por_propiedad': por_propiedad,
+        'por_servicio': por_servicio,
+        'por_propiedad_servicio': por_propiedad_servicio,
+    }
+
+def resumen_contable(year, month):
+    """Devuelve el resumen contable del mes, recalculándolo solo si cambiaron pagos o facturas."""
+    clave = (shards.actual().nombre, year, month)
+    with shards.lectura() as lector:
+        # La versión y los datos salen de la misma foto: un pago confirmado a mitad no se mezcla
+        version = _version_contable(lector)
+        with _cache_lock:
+            cacheado = _cache_resumenes.get(clave)
+        if cacheado and cacheado[0] == version:
+            return cacheado[1]
+        resumen = _calcular_resumen(lector, year, month)
+    with _cache_lock:
+        _cache_resumenes[clave] = (version, resumen)
+    return resumen
+
+def texto_resumen_contable(fecha=None):
+    """Arma el texto del resumen contable del mes de ``fecha`` (por defecto, el mes actual)."""
+    fecha = fecha or datetime.now()
+    resumen = resumen_contable(fecha.year, fecha.month)
+    month_name = fecha.strftime("%B") # Nombre del mes
+
+    summary_text = (
+        f"📊 *Resumen Contable ({escape_markdown_v2(month_name.capitalize())} {fecha.year})* 📊\n\n"
+        f"*Ingresos (Pagos Confirmados):* {resumen['total_ingresos']:.2f} Bs.\n"
+    )
+    if resumen['ingresos']:
+        for fecha_pago, monto, nombre_inquilino in resumen['ingresos']:
+            summary_text += f"  - {fecha_pago}: {monto:.2f} Bs. (de {escape_markdown_v2(nombre_inquilino)})\n"
+    else:
+        summary_text += "  _No hay ingresos registrados este mes._\n"
+
+    summary_text += f"\n*Gastos (Facturas Registradas):* {resumen['total_gastos']:.2f} Bs.\n"
+    if resumen['gastos']:
+        for fecha_factura, monto, tipo_servicio, nombre_propiedad in resumen['gastos']:
+            summary_text += f"  - {fecha_factura}: {monto:.2f} Bs. ({escape_markdown_v2(tipo_servicio.capitalize())} para {escape_markdown_v2(nombre_propiedad)})\n"
+    else:
+        summary_text += "  _No hay gastos registrados este mes._\n"
+
+    summary_text += f"\n*Balance del Mes:* {resumen['balance']:.2f} Bs.\n\n"
+    summary_text += "Este resumen incluye todos los pagos confirmados y facturas registradas para el mes actual."
+    return summary_text
+
+# --- Reportes de varios meses (desde la tabla resumen_mensual) ---
+
+def _filas_reporte(cursor, desde, hasta):
+    """Devuelve las filas (mes, propiedad, ingresos, gastos, balance) entre dos meses 'YYYY-MM', inclusive."""
+    filas = cursor.execute('''
+        SELECT r.mes, COALESCE(p.nombre, CASE WHEN r.propiedad_id = 0 THEN 'Sin propiedad' ELSE 'ID: ' || r.propiedad_id END),
+               r.ingresos, r.gastos, r.ingresos - r.gastos
+        FROM resumen_mensual r LEFT JOIN propiedades p ON p.id = r.propiedad_id
+        WHERE r.mes BETWEEN ? AND ?
+        ORDER BY r.mes, 2
+    ''', (desde, hasta)).fetchall()
+    total_ingresos = sum(fila[2] for fila in filas)
+    total_gastos = sum(fila[3] for fila in filas)
+    filas.append(("Total", "", total_ingresos, total_gastos, total_ingresos - total_gastos))
+    return filas
+
+def _a_csv(filas):
+    salida = io.StringIO()
+    writer = csv.writer(salida)
+    writer.writerow(COLUMNAS_REPORTE)
+    for mes, propiedad, ingresos, gastos, balance in filas:
+        writer.writerow((mes, propiedad, f"{ingresos:.2f}", f"{gastos:.2f}", f"{balance:.2f}"))
+    return salida.getvalue().encode('utf-8-sig') # BOM para que Excel detecte UTF-8
+
+def _a_xlsx(filas):
+    import openpyxl # Opcional: solo se importa si se pide un XLSX
+
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.title = "Reporte"
+    hoja.append(COLUMNAS_REPORTE)
+    for fila in filas:
+        hoja.append(list(fila))
+    salida = io.BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
+
+def xlsx_disponible():
+    """Indica si openpyxl está instalado para generar reportes XLSX."""
+    return importlib.util.find_spec('openpyxl') is not None
+
+def generar_reporte_periodo(desde, hasta, formato='csv'):
+    """Genera el reporte de ingresos, gastos y balance por propiedad y mes. Devuelve (nombre_archivo, bytes).
+
+    Es bloqueante y usa una conexión de lectura: se ejecuta fuera del bucle de eventos (asyncio.to_thread)."""
+    shard = shards.actual() # asyncio.to_thread copia el contexto del update
+    with shard.lectura() as lector:
+        clave = (shard.nombre, desde, hasta, formato, _version_contable(lector))
+        with _cache_lock:
+            if clave in _cache_reportes:
+                _cache_reportes.move_to_end(clave)
+                return _cache_reportes[clave]
+        filas = _filas_reporte(lector, desde, hasta)
+
+    contenido = _a_xlsx(filas) if formato == 'xlsx' else _a_csv(filas)
+    resultado = (f"reporte_{desde}_{hasta}.{formato}", contenido)
+    with _cache_lock:
+        _cache_reportes[clave] = resultado
+        while len(_cache_reportes) > MAX_REPORTES_CACHEADOS:
+            _cache_reportes.popitem(last=False)
+    logger.info("Reporte %s..%s (%s) generado con %s filas.", desde, hasta, formato, len(filas) - 1)
+    return resultado
+
+# --- Antigüedad de la deuda ---
+
+def antiguedad_deuda(fecha_referencia=None):
+    """Reparte el saldo de cada inquilino moroso por antigüedad (0-29, 30-59, 60-89 y 90+ días) en una sola consulta.
+
+    Los pagos cubren primero los cargos más antiguos, así que el saldo pendiente corresponde a los
+    cargos más recientes: se recorren del más nuevo al más viejo con una suma acumulada (ventana).
+    Solo se miran los cargos posteriores al último pago completo. El saldo que no se explica con
+    cargos registrados (p. ej. anterior al historial) se informa como 'sin_fecha'."""
+    fecha_referencia = (fecha_referencia or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+    with shards.lectura() as cursor:
+        cursor.execute('''
+            WITH pendientes AS (
+                SELECT c.chat_id, c.fecha, c.monto, i.saldo,
+                       SUM(c.monto) OVER (
+                           PARTITION BY c.chat_id ORDER BY c.fecha DESC, c.id DESC
+                           ROWS UNBOUNDED PRECEDING
+                       ) AS acumulado
+                FROM inquilinos i JOIN cargos c ON c.chat_id = i.chat_id
+                WHERE i.saldo > 0 AND c.fecha > COALESCE(i.fecha_ultimo_pago_completo, '')
+            ),
+            asignados AS (
+                SELECT chat_id, MAX(0, MIN(monto, saldo - (acumulado - monto))) AS pendiente,
+                       julianday(?) - julianday(fecha) AS dias
+                FROM pendientes
+            )
+            SELECT i.chat_id, i.nombre, i.ci, p.nombre, i.saldo,
+                   COALESCE(SUM(CASE WHEN a.dias < 30 THEN a.pendiente END), 0),
+                   COALESCE(SUM(CASE WHEN a.dias >= 30 AND a.dias < 60 THEN a.pendiente END), 0),
+                   COALESCE(SUM(CASE WHEN a.dias >= 60 AND a.dias < 90 THEN a.pendiente END), 0),
+                   COALESCE(SUM(CASE WHEN a.dias >= 90 THEN a.pendiente END), 0),
+                   i.saldo - COALESCE(SUM(a.pendiente), 0),
+                   i.fecha_ultimo_pago_completo
+            FROM inquilinos i
+            LEFT JOIN propiedades p ON p.id = i.propiedad_id
+            LEFT JOIN asignados a ON a.chat_id = i.chat_id
+            WHERE i.saldo > 0
+            GROUP BY i.chat_id
+            ORDER BY p.nombre, i.nombre
+        ''', (fecha_referencia,))
+        columnas = ('chat_id', 'nombre', 'ci', 'propiedad', 'saldo', 'dias_0_29', 'dias_30_59',
+                    'dias_60_89', 'dias_90_mas', 'sin_fecha', 'fecha_ultimo_pago_completo')
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+def texto_antiguedad_deuda():
+    """Arma el texto del reporte de morosos con la antigüedad de la deuda, por propiedad."""
+    morosos = antiguedad_deuda()
+    if not morosos:
+        return None
+    subtotales = {}
+    for moroso in morosos:
+        subtotales[moroso['propiedad']] = subtotales.get(moroso['propiedad'], 0) + moroso['saldo']
+    texto = "Inquilinos morosos (antigüedad de la deuda):\n\n"
+    propiedad_actual = object()
+    for moroso in morosos:
+        if moroso['propiedad'] != propiedad_actual:
+            propiedad_actual = moroso['propiedad']
+            texto += f"*{escape_markdown_v2(propiedad_actual or 'Sin propiedad')}* (total: {subtotales[propiedad_actual]:.2f} Bs.)\n"
+        texto += f"- {escape_markdown_v2(moroso['nombre'])} (CI: {escape_markdown_v2(moroso['ci'])}) debe: *{moroso['saldo']:.2f} Bs.*\n"
+        texto += (
+            f"    0-29 días: {moroso['dias_0_29']:.2f} | 30-59: {moroso['dias_30_59']:.2f} | "
+            f"60-89: {moroso['dias_60_89']:.2f} | 90+: {moroso['dias_90_mas']:.2f}"
+        )
+        if moroso['sin_fecha'] > 0.005:
+            texto += f" | sin fecha: {moroso['sin_fecha']:.2f}"
+        texto += "\n"
+        if moroso['fecha_ultimo_pago_completo']:
+            texto += f"    Último pago completo: {moroso['fecha_ultimo_pago_completo'][:10]}\n"
+    return texto
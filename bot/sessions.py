@@ -0,0 +1,143 @@
+"""Vencimiento de los flujos abandonados y límite de memoria de ``user_data``.
+
+Cada flujo guarda sus datos en ``user_data`` con un prefijo propio. Si el usuario deja de
+responder durante más que el tiempo del flujo, sus claves se borran y la conversación termina.
+Un barrido periódico hace lo mismo con los usuarios inactivos y saca de memoria los datos que
+ya no se usan (la persistencia en SQLite los vuelve a leer si el usuario regresa)."""
+
+import asyncio
+import logging
+import pickle
+import time
+
+from telegram.ext import ConversationHandler
+
+from bot import metrics
+from bot.formatting import escape_markdown_v2
+
+logger = logging.getLogger(__name__)
+
+CLAVE_ACTIVIDAD = 'ultima_actividad'
+INTERVALO_BARRIDO = 10 * 60 # Segundos entre barridos
+INACTIVIDAD_MEMORIA = 60 * 60 # Segundos sin actividad tras los que los datos salen de memoria
+
+_bytes_user_data = 0 # Medido en cada barrido, en el bucle: /metrics corre en otro hilo y no serializa
+
+# Flujo -> (prefijos de sus claves en user_data, minutos de inactividad permitidos)
+FLUJOS = {
+    'registro_inquilino': (('reginqui_', 'reg_fecha', 'nombre_manual', 'nombre'), 30),
+    'modificar': (('mod_inq_', 'mod_prop_', 'eliminar_chat_id', 'propiedad_a_eliminar_id'), 15),
+    'propiedades': (('nueva_propiedad_', 'nuevo_medidor_', 'medidor_propiedad_id'), 15),
+    'factura': (('factura_', 'awaiting_kwh_input'), 15),
+    'lectura': (('lectura_',), 15),
+    'aviso': (('notice_',), 15),
+    'cobro_mensual': (('charge_',), 15),
+    'confirmar_pago': (('pago_a_confirmar_id', 'pago_info_confirm'), 10),
+    'resolver_queja': (('queja_a_resolver_id',), 10),
+    'amortizar': (('monto_amortizar',), 30),
+    'busqueda_quejas': (('busqueda_quejas',), 60),
+}
+
+def limpiar_flujos_vencidos(user_data, ahora=None):
+    """Borra las claves de los flujos inactivos por más de su tiempo. Devuelve los flujos vencidos."""
+    ahora = ahora or time.time()
+    inactivo = _inactivo(user_data, ahora)
+    vencidos = []
+    for flujo, (prefijos, minutos) in FLUJOS.items():
+        if inactivo <= minutos * 60:
+            continue
+        claves = [clave for clave in user_data if clave.startswith(prefijos)]
+        for clave in claves:
+            del user_data[clave]
+        if claves:
+            vencidos.append(flujo)
+    return vencidos
+
+def _inactivo(user_data, ahora):
+    return ahora - user_data.get(CLAVE_ACTIVIDAD, ahora)
+
+def _conversaciones_de(conversation_handler, user_id):
+    return [clave for clave in conversation_handler._conversations if clave[-1] == user_id]
+
+def _terminar_conversaciones(conversation_handler, user_id):
+    """Termina las conversaciones del usuario; PTB persiste el cambio de estado."""
+    conversaciones = _conversaciones_de(conversation_handler, user_id)
+    for clave in conversaciones:
+        conversation_handler._update_state(ConversationHandler.END, clave)
+    return conversaciones
+
+async def vencer_flujos(update, context):
+    """Antes de los handlers: vence los flujos abandonados del usuario y registra su actividad."""
+    user = update.effective_user
+    if user is None:
+        return
+    from bot.handlers import conv_handler # Import diferido: bot.handlers registra este handler
+
+    ahora = time.time()
+    vencidos = limpiar_flujos_vencidos(context.user_data, ahora)
+    # Un menú abierto sin datos de flujo también vence tras INACTIVIDAD_MEMORIA
+    if vencidos or _inactivo(context.user_data, ahora) > INACTIVIDAD_MEMORIA:
+        conversaciones = _terminar_conversaciones(conv_handler, user.id)
+        if vencidos:
+            logger.info("Flujos vencidos por inactividad para el usuario %s: %s", user.id, ', '.join(vencidos))
+            metrics.incrementar('bot_flujos_vencidos_total', "Flujos terminados por inactividad.", len(vencidos))
+        if conversaciones and update.effective_chat:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=escape_markdown_v2("La operación anterior expiró por inactividad. Usa /start para volver al menú."),
+                parse_mode='MarkdownV2'
+            )
+    context.user_data[CLAVE_ACTIVIDAD] = ahora
+
+def barrer(application, ahora=None):
+    """Vence los flujos de los usuarios inactivos y saca de memoria sus datos ya persistidos."""
+    from bot.handlers import conv_handler
+    global _bytes_user_data
+
+    ahora = ahora or time.time()
+    vencidos = liberados = 0
+    for user_id, datos in list(application.user_data.items()):
+        if limpiar_flujos_vencidos(datos, ahora):
+            vencidos += 1
+            _terminar_conversaciones(conv_handler, user_id)
+            application.mark_data_for_update_persistence(user_ids=user_id)
+        elif ahora - datos.get(CLAVE_ACTIVIDAD, 0) > INACTIVIDAD_MEMORIA:
+            if _terminar_conversaciones(conv_handler, user_id) or user_id in application._user_ids_to_be_updated_in_persistence:
+                continue # Se libera en el próximo barrido, cuando ya no quede nada por persistir
+            # PTB no tiene una API para sacar datos solo de memoria; la persistencia los relee al volver
+            application._user_data.pop(user_id, None)
+            olvidar = getattr(application.persistence, 'olvidar_usuario', None)
+            if olvidar:
+                olvidar(user_id)
+            liberados += 1
+    _bytes_user_data = sum(len(pickle.dumps(datos)) for datos in application.user_data.values())
+    if vencidos or liberados:
+        logger.info("Barrido de sesiones: %s usuarios con flujos vencidos, %s liberados de memoria.", vencidos, liberados)
+    return vencidos, liberados
+
+async def barrer_sesiones(application, intervalo=INTERVALO_BARRIDO):
+    """Barre las sesiones cada ``intervalo`` segundos (en cada worker: la memoria es de cada proceso)."""
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            barrer(application)
+            await application.update_persistence()
+        except Exception:
+            logger.exception("Error en el barrido de sesiones.")
+
+def registrar_gauges(application):
+    """Expone en /metrics el tamaño de los datos de usuario y conversaciones en memoria."""
+    from bot.handlers import conv_handler
+
+    metrics.registrar_gauge(
+        'bot_user_data_usuarios', "Usuarios con user_data cargado en memoria.",
+        lambda: len(application.user_data),
+    )
+    metrics.registrar_gauge(
+        'bot_user_data_bytes', "Tamaño aproximado (serializado) de user_data en memoria, medido en el último barrido.",
+        lambda: _bytes_user_data,
+    )
+    metrics.registrar_gauge(
+        'bot_conversaciones_activas', "Conversaciones con estado en memoria.",
+        lambda: len(conv_handler._conversations),
+    )
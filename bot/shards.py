@@ -0,0 +1,266 @@
+"""Modo multi-propietario: cada grupo de administradores tiene su propia base SQLite (shard).
+
+Se activa con ``SHARDS``, p. ej. ``SHARDS="ana:111,222;beto:333"``: el shard ``ana`` lo administran
+los chats 111 y 222 y vive en ``SHARDS_DIR/ana.db``. Sin ``SHARDS`` hay un único shard sobre
+``DB_PATH`` y todo funciona como siempre.
+
+``bot.db`` expone ``conn`` y ``cursor`` como proxies que resuelven el shard del update en curso
+(``shard_actual``), así que las funciones de la BD y los handlers no cambian. Cada update se
+enruta por el chat que lo envía: los administradores por la configuración y los inquilinos por
+la tabla ``rutas_shards`` de la base central (``DB_PATH``), que se mantiene en memoria. Un
+inquilino nuevo queda en el shard del administrador que lo registra, o en el del enlace
+``/start <shard>`` con el que entró; los chats sin ruta (y los administradores de ``ADMIN_IDS``
+que no están en ningún grupo) usan el primer shard. La base central guarda además la
+persistencia, la deduplicación y los datos de botones, que son globales.
+
+Cada shard usa WAL. Los reportes leen con ``Shard.lectura()``: conexiones aparte de solo lectura
+(``query_only``) que fijan una foto de la base al empezar, así no esperan a las escrituras de los
+handlers (ni las hacen esperar) y todas sus consultas ven los mismos datos."""
+
+import contextlib
+import contextvars
+import logging
+import os
+import queue
+import sqlite3
+import threading
+
+from bot.metrics import CursorMedido
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get('DB_PATH', 'inquilinos.db')
+SHARD_UNICO = 'principal'
+MAX_LECTORES = int(os.environ.get('DB_LECTORES', '4')) # Conexiones de lectura ociosas que se guardan por shard
+
+def _leer_configuracion(valor):
+    """Interpreta ``SHARDS``: devuelve {nombre: [admin_ids]} en el orden dado."""
+    shards = {}
+    vistos = set()
+    for parte in filter(None, (p.strip() for p in (valor or '').split(';'))):
+        nombre, _, admins = parte.partition(':')
+        nombre = nombre.strip()
+        if not nombre.isidentifier():
+            raise ValueError(f"Nombre de shard inválido en SHARDS: {nombre!r}")
+        ids = [int(admin_id) for admin_id in admins.split(',') if admin_id.strip()]
+        repetidos = vistos.intersection(ids)
+        if repetidos:
+            raise ValueError(f"Administradores en más de un shard: {sorted(repetidos)}")
+        vistos.update(ids)
+        shards[nombre] = ids
+    return shards
+
+CONFIGURACION = _leer_configuracion(os.environ.get('SHARDS'))
+MULTI = bool(CONFIGURACION)
+SHARDS_DIR = os.environ.get('SHARDS_DIR') or os.path.dirname(os.path.abspath(DB_PATH))
+
+class Shard:
+    """Una base de datos de un propietario, con su conexión y cursor abiertos al primer uso y sus conexiones de lectura."""
+
+    def __init__(self, nombre, ruta, admins=()):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.admins = list(admins)
+        self._conn = None
+        self._cursores = threading.local() # Un cursor por hilo: las tareas en asyncio.to_thread no pisan los resultados del bucle
+        self._lock = threading.Lock()
+        self._lectores = queue.LifoQueue(maxsize=MAX_LECTORES)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.ruta, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL") # Los lectores no bloquean las escrituras
+                    self._conn = conn
+        return self._conn
+
+    @property
+    def cursor(self):
+        cursor = getattr(self._cursores, 'cursor', None)
+        if cursor is None:
+            cursor = self._cursores.cursor = self.conn.cursor(factory=CursorMedido) # Mide cada consulta para /metrics
+        return cursor
+
+    def _abrir_lector(self):
+        self.conn # La conexión principal deja la base en WAL antes de abrir lectores
+        conn = sqlite3.connect(self.ruta, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextlib.contextmanager
+    def lectura(self):
+        """Cursor de solo lectura dentro de una transacción: todas sus consultas ven la misma foto de la base.
+
+        Solo ve lo ya confirmado. Las conexiones se reutilizan entre llamadas (de a una por hilo a la vez)."""
+        try:
+            conn = self._lectores.get_nowait()
+        except queue.Empty:
+            conn = self._abrir_lector()
+        conn.execute("BEGIN")
+        cursor = conn.cursor(factory=CursorMedido)
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            conn.rollback()
+            try:
+                self._lectores.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextlib.contextmanager
+    def escritura(self):
+        """Cursor en su propia conexión dentro de una transacción BEGIN IMMEDIATE, confirmada al salir.
+
+        Para tareas fuera del bucle: no comparte la transacción de la conexión principal y, al tomar el
+        bloqueo de escritura al empezar, nadie escribe entre lo que lee y lo que escribe."""
+        self.conn # La conexión principal deja la base en WAL
+        conn = sqlite3.connect(self.ruta, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=5000")
+        cursor = conn.cursor(factory=CursorMedido)
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+if MULTI:
+    SHARDS = {nombre: Shard(nombre, os.path.join(SHARDS_DIR, f"{nombre}.db"), admins) for nombre, admins in CONFIGURACION.items()}
+else:
+    SHARDS = {SHARD_UNICO: Shard(SHARD_UNICO, DB_PATH)}
+SHARD_POR_DEFECTO = next(iter(SHARDS.values())) # Para updates de chats sin ruta y tareas de fondo
+_shard_de_admin = {admin_id: shard for shard in SHARDS.values() for admin_id in shard.admins}
+
+# Shard del update o tarea en curso; None equivale al shard por defecto
+shard_actual = contextvars.ContextVar('shard_actual', default=None)
+
+def actual():
+    return shard_actual.get() or SHARD_POR_DEFECTO
+
+def lectura():
+    """Cursor de solo lectura sobre el shard en curso (ver ``Shard.lectura``)."""
+    return actual().lectura()
+
+def admins_de_shards():
+    return list(_shard_de_admin)
+
+# --- Rutas chat_id -> shard ---
+
+_rutas = {} # chat_id -> nombre del shard (cargadas de la base central)
+_rutas_lock = threading.Lock()
+_conn_rutas = None
+
+def _conexion_rutas():
+    global _conn_rutas
+    if _conn_rutas is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("CREATE TABLE IF NOT EXISTS rutas_shards (chat_id INTEGER PRIMARY KEY, shard TEXT NOT NULL)")
+        conn.commit()
+        _rutas.update(conn.execute("SELECT chat_id, shard FROM rutas_shards").fetchall())
+        _conn_rutas = conn
+    return _conn_rutas
+
+def shard_de(chat_id):
+    """Shard de un chat: el de su grupo si es administrador, el de su ruta si es inquilino, o None."""
+    if not MULTI:
+        return SHARD_POR_DEFECTO
+    if chat_id in _shard_de_admin:
+        return _shard_de_admin[chat_id]
+    with _rutas_lock:
+        conn = _conexion_rutas()
+        nombre = _rutas.get(chat_id)
+        if nombre is None:
+            # La ruta pudo crearla otro worker después de cargar el mapa
+            fila = conn.execute("SELECT shard FROM rutas_shards WHERE chat_id = ?", (chat_id,)).fetchone()
+            if fila:
+                nombre = _rutas[chat_id] = fila[0]
+    return SHARDS.get(nombre)
+
+def asignar(chat_id, shard=None):
+    """Guarda la ruta de ``chat_id`` al shard dado (por defecto, el del update en curso)."""
+    if not MULTI or chat_id in _shard_de_admin:
+        return
+    nombre = (shard or actual()).nombre
+    with _rutas_lock:
+        if _rutas.get(chat_id) == nombre:
+            return
+        conn = _conexion_rutas()
+        with conn:
+            conn.execute(
+                "INSERT INTO rutas_shards (chat_id, shard) VALUES (?, ?) ON CONFLICT(chat_id) DO UPDATE SET shard = excluded.shard",
+                (chat_id, nombre),
+            )
+        _rutas[chat_id] = nombre
+    logger.info("Chat %s asignado al shard %s.", chat_id, nombre)
+
+def olvidar(chat_id):
+    """Borra la ruta de un inquilino eliminado."""
+    if not MULTI:
+        return
+    with _rutas_lock:
+        conn = _conexion_rutas()
+        with conn:
+            conn.execute("DELETE FROM rutas_shards WHERE chat_id = ?", (chat_id,))
+        _rutas.pop(chat_id, None)
+
+@contextlib.contextmanager
+def usar(shard):
+    """Ejecuta el bloque sobre ``shard`` (un Shard o su nombre)."""
+    token = shard_actual.set(SHARDS[shard] if isinstance(shard, str) else shard)
+    try:
+        yield
+    finally:
+        shard_actual.reset(token)
+
+def en_cada_shard(funcion, *args, **kwargs):
+    """Ejecuta ``funcion`` una vez por shard (crear tablas, reconciliaciones nocturnas)."""
+    for shard in SHARDS.values():
+        with usar(shard):
+            funcion(*args, **kwargs)
+
+async def enrutar_update(update, context):
+    """Fija el shard del update según el chat que lo envía (se registra antes que los demás handlers)."""
+    usuario = update.effective_user
+    shard = shard_de(usuario.id) if usuario else None
+    if shard is None and MULTI and update.message and update.message.text:
+        # Enlace de invitación del propietario: t.me/<bot>?start=<shard>
+        partes = update.message.text.split()
+        if len(partes) == 2 and partes[0] == '/start':
+            shard = SHARDS.get(partes[1])
+            if shard:
+                # La ruta se guarda ya: el registro termina varios updates después
+                asignar(usuario.id, shard)
+    shard_actual.set(shard)
+
+# --- Proxies que usa bot.db ---
+
+class ConexionEnrutada:
+    """Se comporta como la conexión del shard en curso."""
+
+    def __getattr__(self, nombre):
+        return getattr(actual().conn, nombre)
+
+    def __enter__(self):
+        return actual().conn.__enter__()
+
+    def __exit__(self, *excepcion):
+        return actual().conn.__exit__(*excepcion)
+
+class CursorEnrutado:
+    """Se comporta como el cursor del shard en curso."""
+
+    def __getattr__(self, nombre):
+        return getattr(actual().cursor, nombre)
+
+    def __iter__(self):
+        return iter(actual().cursor)
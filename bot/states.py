@@ -0,0 +1,29 @@
+"""Estados de las conversaciones del bot."""
+
+# --- Estados de conversación ---
+(
+    REGISTRAR_NOMBRE, REGISTRAR_CI,
+    ADMIN_REG_FECHA, ADMIN_REG_ALQUILER, ADMIN_REG_TIPO_ALQ, ADMIN_REG_NUM_PERSONAS,
+    ADMIN_REG_INQ_MEDIDOR_LUZ, ADMIN_REG_INQ_MEDIDOR_AGUA, ADMIN_REG_INQ_MEDIDOR_GAS,
+    INQ_AMORTIZAR_MONTO, INQ_AMORTIZAR_COMPROBANTE,
+    INQ_ENVIAR_QUEJA,
+    ADMIN_REG_FACTURA_PROPIEDAD, ADMIN_REG_FACTURA_SERVICIO_TIPO, ADMIN_REG_FACTURA_MONTO,
+    ADMIN_REG_LECTURA_PROPIEDAD, ADMIN_REG_LECTURA_MEDIDOR_SELECT, ADMIN_REG_LECTURA_VALOR,
+    NOMBRE, # Usado para el flujo de 'nuevo_inquilino' del admin
+    ADMIN_REG_INQUILINO_SELECT,
+    ADMIN_ELIMINAR_INQUILINO_SELECT, ADMIN_ELIMINAR_INQUILINO_CONFIRM,
+    ADMIN_PROPIEDADES_MENU,
+    ADMIN_ADD_PROPIEDAD_NOMBRE, ADMIN_ADD_PROPIEDAD_DIRECCION, ADMIN_ADD_PROPIEDAD_SSID, ADMIN_ADD_PROPIEDAD_WIFI,
+    ADMIN_DEL_PROPIEDAD_SELECT, ADMIN_DEL_PROPIEDAD_CONFIRM,
+    ADMIN_REG_INQUILINO_PROPIEDAD, # Asignar propiedad a inquilino
+    ADMIN_ADD_MEDIDOR_PROPIEDAD_SELECT, ADMIN_ADD_MEDIDOR_NOMBRE, ADMIN_ADD_MEDIDOR_TIPO,
+    ADMIN_SEND_NOTICE_SCOPE, ADMIN_SEND_NOTICE_PROPERTY_SELECT, ADMIN_SEND_NOTICE_INQUILINO_SELECT, ADMIN_SEND_NOTICE_MESSAGE,
+    ADMIN_CONFIRM_PAGO_SELECT, ADMIN_CONFIRM_PAGO_CONFIRM,
+    ADMIN_MARK_QUEJA_RESOLVED_SELECT, ADMIN_MARK_QUEJA_RESOLVED_CONFIRM,
+    ADMIN_MODIFICAR_INQUILINO_SELECT, ADMIN_MODIFICAR_INQUILINO_FIELD, ADMIN_MODIFICAR_INQUILINO_VALUE,
+    ADMIN_GENERAR_COBRO_MENSUAL_SCOPE, ADMIN_GENERAR_COBRO_MENSUAL_PROPERTY_SELECT, ADMIN_GENERAR_COBRO_MENSUAL_CONFIRM,
+    # Nuevos estados para submenús de administrador
+    ADMIN_MENU_INQUILINOS, ADMIN_MENU_FACTURACION, ADMIN_MENU_COMUNICACION,
+    ADMIN_REG_FACTURA_KWH,
+    ADMIN_MODIFICAR_PROPIEDAD_SELECT, ADMIN_MODIFICAR_PROPIEDAD_FIELD, ADMIN_MODIFICAR_PROPIEDAD_VALUE # Nuevos estados para modificar propiedad
+) = range(54) # Actualizado a 54 para incluir los nuevos estados de modificación de propiedad
@@ -0,0 +1,64 @@
+"""Tareas periódicas del bot (reconciliaciones nocturnas, limpiezas).
+
+Cada worker programa las tareas, pero la ejecución se reclama en la BD: solo un proceso
+la corre por período, aunque haya varios workers o instancias."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from bot.callback_store import almacen_callbacks
+from bot.db import conn, cursor, reconciliar_pyg
+from bot.sessions import barrer_sesiones
+from bot.shards import en_cada_shard
+
+logger = logging.getLogger(__name__)
+
+HORA_TAREAS_NOCTURNAS = 3 # Hora local a la que corren las tareas diarias
+_tareas = set() # Referencias a las tareas en curso para que no las libere el recolector
+
+def reclamar_ejecucion(nombre, periodo):
+    """Marca la tarea como ejecutada en ``periodo``. Devuelve False si otro proceso ya la reclamó."""
+    cursor.execute(
+        "INSERT INTO tareas_programadas(nombre, ultimo_periodo) VALUES (?, ?) "
+        "ON CONFLICT(nombre) DO UPDATE SET ultimo_periodo = excluded.ultimo_periodo "
+        "WHERE tareas_programadas.ultimo_periodo < excluded.ultimo_periodo",
+        (nombre, periodo)
+    )
+    reclamada = cursor.rowcount > 0
+    conn.commit()
+    return reclamada
+
+def segundos_hasta(hora, ahora=None):
+    """Segundos que faltan hasta la próxima vez que el reloj marque ``hora``:00."""
+    ahora = ahora or datetime.now()
+    proxima = ahora.replace(hour=hora, minute=0, second=0, microsecond=0)
+    if proxima <= ahora:
+        proxima += timedelta(days=1)
+    return (proxima - ahora).total_seconds()
+
+async def ejecutar_cada_noche(nombre, funcion):
+    """Ejecuta ``funcion`` una vez por día a HORA_TAREAS_NOCTURNAS, en un solo proceso."""
+    while True:
+        await asyncio.sleep(segundos_hasta(HORA_TAREAS_NOCTURNAS))
+        try:
+            if reclamar_ejecucion(nombre, datetime.now().strftime("%Y-%m-%d")):
+                logger.info("Ejecutando tarea nocturna '%s'.", nombre)
+                # En un hilo: las reconstrucciones recorren tablas enteras y no deben frenar el bucle
+                await asyncio.to_thread(funcion)
+        except Exception:
+            logger.exception("Error en la tarea nocturna '%s'.", nombre)
+
+def programar(corrutina):
+    """Lanza una tarea de fondo en el bucle actual y guarda su referencia."""
+    tarea = asyncio.get_running_loop().create_task(corrutina)
+    _tareas.add(tarea)
+    tarea.add_done_callback(_tareas.discard)
+    return tarea
+
+async def iniciar_tareas(application):
+    """Programa las tareas periódicas en el bucle de la aplicación (post_init en polling, _iniciar_aplicacion en el webhook)."""
+    programar(ejecutar_cada_noche('reconciliacion_pyg', lambda: en_cada_shard(reconciliar_pyg)))
+    programar(ejecutar_cada_noche('purga_datos_callback', almacen_callbacks.purgar))
+    # La memoria es de cada proceso: el barrido de sesiones corre en todos los workers
+    programar(barrer_sesiones(application))
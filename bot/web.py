@@ -0,0 +1,263 @@
+"""Aplicación web (Flask) que recibe los webhooks de Telegram y paso de despliegue."""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl # Solo disponible en Linux/macOS (Render); en Windows se omite el bloqueo de despliegue
+except ImportError:
+    fcntl = None
+
+import httpx
+from flask import Flask, Response, request
+from telegram import BotCommand, Update
+from telegram.ext import ApplicationBuilder
+from telegram.request import HTTPXRequest
+
+from bot import INICIO_ARRANQUE
+from bot.config import (
+    DEPLOY_LOCK_PATH,
+    TELEGRAM_API_URL,
+    TELEGRAM_HTTP2,
+    TELEGRAM_KEEPALIVE,
+    TELEGRAM_POOL_CONEXIONES,
+    TELEGRAM_POOL_GET_UPDATES,
+    TELEGRAM_POOL_TIMEOUT,
+    TOKEN,
+    WEBHOOK_PATH,
+)
+from bot.db import crear_tablas
+from bot.dedup import DeduplicadorUpdates
+from bot import metrics
+from bot.handlers import registrar_handlers
+from bot.persistence import SQLitePersistence
+from bot.sessions import registrar_gauges
+from bot.shards import en_cada_shard
+from bot.tasks import iniciar_tareas
+
+logger = logging.getLogger(__name__)
+
+app = Flask(__name__)
+
+class RequestMedido(HTTPXRequest):
+    """Cliente HTTP de Telegram que cuenta y mide cada llamada saliente a la API.
+
+    Además de la latencia y los errores por método, registra las llamadas que no consiguieron
+    una conexión del pool y las que Telegram limitó (429), y cuántas hay en vuelo."""
+
+    def __init__(self, nombre, keepalive=None, **kwargs):
+        self.nombre = nombre
+        self.keepalive = keepalive
+        self.en_vuelo = 0
+        super().__init__(**kwargs)
+
+    def _build_client(self):
+        if self.keepalive is not None:
+            limites = self._client_kwargs['limits']
+            self._client_kwargs['limits'] = httpx.Limits(
+                max_connections=limites.max_connections,
+                max_keepalive_connections=limites.max_keepalive_connections,
+                keepalive_expiry=self.keepalive,
+            )
+        return super()._build_client()
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        metodo_api = url.rsplit('/', 1)[-1]
+        inicio = time.perf_counter()
+        error = False
+        self.en_vuelo += 1
+        try:
+            codigo, contenido = await super().do_request(url, method, request_data=request_data, **kwargs)
+            error = codigo >= 400
+            if codigo == 429:
+                metrics.incrementar('bot_telegram_api_limitadas_total', "Llamadas rechazadas por Telegram con 429.", metodo=metodo_api)
+            return codigo, contenido
+        except Exception as e:
+            error = True
+            if isinstance(e.__cause__, httpx.PoolTimeout):
+                metrics.incrementar(
+                    'bot_telegram_api_pool_agotado_total', "Llamadas no enviadas por falta de conexiones libres en el pool.",
+                    pool=self.nombre, metodo=metodo_api,
+                )
+            raise
+        finally:
+            self.en_vuelo -= 1
+            metrics.registrar_llamada_api(metodo_api, time.perf_counter() - inicio, error=error)
+
+def crear_request(nombre, conexiones):
+    """RequestMedido con la configuración del pool de bot.config; sin HTTP/2 si falta httpx[http2]."""
+    opciones = dict(connection_pool_size=conexiones, pool_timeout=TELEGRAM_POOL_TIMEOUT, keepalive=TELEGRAM_KEEPALIVE)
+    if TELEGRAM_HTTP2:
+        try:
+            return RequestMedido(nombre, http_version='2', **opciones)
+        except RuntimeError as e:
+            logger.warning("HTTP/2 no disponible (%s); se usa HTTP/1.1.", e)
+    return RequestMedido(nombre, **opciones)
+
+# --- Configuración de los handlers de la aplicación de Telegram ---
+request_api = crear_request('api', TELEGRAM_POOL_CONEXIONES)
+constructor = (
+    ApplicationBuilder().token(TOKEN)
+    .request(request_api)
+    .get_updates_request(crear_request('get_updates', TELEGRAM_POOL_GET_UPDATES))
+    .persistence(SQLitePersistence())
+    .post_init(iniciar_tareas)
+)
+if TELEGRAM_API_URL:
+    constructor.base_url(f"{TELEGRAM_API_URL.rstrip('/')}/bot").base_file_url(f"{TELEGRAM_API_URL.rstrip('/')}/file/bot")
+application = constructor.build()
+registrar_handlers(application)
+deduplicador = DeduplicadorUpdates()
+metrics.registrar_gauge(
+    'bot_update_queue_pendientes', "Updates encolados pendientes de procesar.",
+    lambda: application.update_queue.qsize(),
+)
+metrics.registrar_gauge(
+    'bot_telegram_api_en_vuelo', "Llamadas a la API de Telegram en curso (el pool admite TELEGRAM_POOL_CONEXIONES).",
+    lambda: request_api.en_vuelo,
+)
+registrar_gauges(application)
+
+# --- Funciones para webhooks ---
+def obtener_webhook_url():
+    """Construye la URL del webhook a partir del hostname externo de Render."""
+    # La URL de tu servicio en Render.com será algo como https://your-service-name.onrender.com
+    # Render.com expone el puerto 80 por defecto, pero el PORT de la variable de entorno es para Flask
+    # La URL base será proporcionada por Render.com en la variable de entorno RENDER_EXTERNAL_HOSTNAME
+    external_hostname = os.environ.get("RENDER_EXTERNAL_HOSTNAME")
+    if not external_hostname:
+        return None
+    return f"https://{external_hostname}{WEBHOOK_PATH}"
+
+async def setup_webhook():
+    """Configura el webhook para el bot, solo si Telegram no lo tiene ya registrado."""
+    webhook_url = obtener_webhook_url()
+    if not webhook_url:
+        logger.error("RENDER_EXTERNAL_HOSTNAME no está configurado. No se puede establecer el webhook.")
+        return
+
+    webhook_info = await application.bot.get_webhook_info()
+    if webhook_info.url == webhook_url:
+        logger.info("Webhook ya registrado en: %s. No se vuelve a establecer.", webhook_url)
+        return
+    await application.bot.set_webhook(url=webhook_url)
+    logger.info("Webhook establecido en: %s", webhook_url)
+
+# --- Arranque del worker ---
+# Cada worker de Gunicorn importa este módulo (a través de 'bot:app'). El arranque del worker se mantiene ligero:
+# no hay llamadas de red ni creación de tablas al importar (eso es el paso de despliegue).
+# La aplicación de Telegram se inicializa una sola vez por worker, en un bucle de eventos
+# propio que se levanta al recibir la primera actualización.
+_loop_worker = None
+_loop_worker_lock = threading.Lock()
+_primera_actualizacion_registrada = False
+
+async def _iniciar_aplicacion():
+    """Inicializa y arranca la aplicación de Telegram y sus tareas periódicas dentro del bucle del worker."""
+    await application.initialize()
+    await application.start()
+    # post_init solo lo ejecutan run_polling/run_webhook: con el webhook de Flask las tareas se lanzan aquí
+    await iniciar_tareas(application)
+
+def obtener_loop_worker():
+    """Devuelve el bucle de eventos del worker, creándolo e inicializando la aplicación la primera vez."""
+    global _loop_worker
+    with _loop_worker_lock:
+        if _loop_worker is None:
+            inicio = time.perf_counter()
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="telegram-loop", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(_iniciar_aplicacion(), loop).result()
+            _loop_worker = loop
+            logger.info("Aplicación de Telegram inicializada en el worker %s en %.1f ms.", os.getpid(), (time.perf_counter() - inicio) * 1000)
+    return _loop_worker
+
+@app.route(WEBHOOK_PATH, methods=['POST'])
+def telegram_webhook():
+    """Maneja las actualizaciones de Telegram recibidas por el webhook."""
+    global _primera_actualizacion_registrada
+    loop = obtener_loop_worker()
+
+    update_json = request.get_json(force=True)
+    update = Update.de_json(update_json, application.bot)
+    if deduplicador.es_duplicado(update.update_id):
+        # Reenvío de Telegram de un update ya recibido: se confirma sin procesarlo otra vez
+        return "ok"
+
+    # La actualización se encola y la procesa la aplicación en el bucle del worker.
+    # Así se responde a Telegram de inmediato y se evitan timeouts y reenvíos.
+    asyncio.run_coroutine_threadsafe(application.update_queue.put(update), loop).result()
+
+    if not _primera_actualizacion_registrada:
+        _primera_actualizacion_registrada = True
+        logger.info("Primera actualización recibida por el worker %s a los %.1f ms del arranque.", os.getpid(), (time.perf_counter() - INICIO_ARRANQUE) * 1000)
+    return "ok"
+
+@app.route('/')
+def index():
+    """Ruta de inicio para verificar que el servicio está corriendo."""
+    return f"Bot de Telegram activo y esperando webhooks. Arranque del worker: {TIEMPO_ARRANQUE_MS:.1f} ms."
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expone las métricas del worker en formato de texto de Prometheus."""
+    return Response(metrics.exponer(), mimetype='text/plain; version=0.0.4')
+
+# --- Configuración de comandos persistentes del bot ---
+BOT_COMMANDS = [
+    BotCommand("start", "Iniciar o ir al menú principal"),
+    BotCommand("cancelar", "Cancelar operación actual"),
+]
+
+async def set_default_commands(application_instance):
+    """Establece los comandos por defecto para el bot (botón de menú), solo si han cambiado."""
+    actuales = await application_instance.bot.get_my_commands()
+    if [(c.command, c.description) for c in actuales] == [(c.command, c.description) for c in BOT_COMMANDS]:
+        logger.info("Comandos por defecto del bot ya configurados. No se vuelven a establecer.")
+        return
+    await application_instance.bot.set_my_commands(BOT_COMMANDS)
+    logger.info("Comandos por defecto del bot configurados.")
+
+# --- Paso de despliegue (una sola vez por instancia) ---
+async def ejecutar_despliegue():
+    """Crea las tablas y registra comandos y webhook. Protegido por un archivo de bloqueo."""
+    inicio = time.perf_counter()
+    with open(DEPLOY_LOCK_PATH, 'a+') as lock_file:
+        if fcntl:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                logger.info("Otro proceso está ejecutando el despliegue. Se omite en este proceso.")
+                return False
+        else:
+            logger.warning("fcntl no disponible: el despliegue se ejecuta sin bloqueo.")
+
+        en_cada_shard(crear_tablas)
+
+        # El archivo de bloqueo guarda la URL del último webhook registrado con éxito: si coincide,
+        # los comandos no se vuelven a enviar. El webhook se verifica siempre con getWebhookInfo
+        # (Telegram pudo perderlo o alguien pudo cambiarlo); un error corta el despliegue.
+        lock_file.seek(0)
+        ultimo_webhook = lock_file.read().strip()
+        webhook_url = obtener_webhook_url()
+        async with application.bot:
+            if webhook_url and ultimo_webhook == webhook_url:
+                logger.info("Comandos ya configurados en esta instancia. Se verifica solo el webhook.")
+            else:
+                await set_default_commands(application)
+            await setup_webhook()
+        if webhook_url and ultimo_webhook != webhook_url:
+            lock_file.seek(0)
+            lock_file.truncate()
+            lock_file.write(webhook_url)
+    logger.info("Paso de despliegue completado en %.1f ms.", (time.perf_counter() - inicio) * 1000)
+    return True
+
+TIEMPO_ARRANQUE_MS = (time.perf_counter() - INICIO_ARRANQUE) * 1000
+
+# Esto se ejecuta cuando Gunicorn importa 'bot:app' en cada worker.
+# El webhook y los comandos los configura el paso de despliegue (ver gunicorn.conf.py).
+logger.info("Worker %s listo en %.1f ms (importación del módulo).", os.getpid(), TIEMPO_ARRANQUE_MS)
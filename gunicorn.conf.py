@@ -0,0 +1,20 @@
+# Configuración de Gunicorn (se carga automáticamente desde el directorio de trabajo).
+import subprocess
+import sys
+import time
+
+
+def on_starting(server):
+    """Ejecuta el paso de despliegue una sola vez, en el proceso maestro, antes de levantar los workers."""
+    # Se ejecuta en un proceso aparte para que el maestro no importe el bot
+    # (y los workers no hereden conexiones abiertas al hacer fork).
+    inicio = time.perf_counter()
+    resultado = subprocess.run([sys.executable, "-m", "bot", "deploy"])
+    server.log.info(
+        "Paso de despliegue terminado (código %s) en %.1f ms.",
+        resultado.returncode, (time.perf_counter() - inicio) * 1000,
+    )
+    if resultado.returncode != 0:
+        # Migración o registro del webhook fallidos: no se levantan workers sobre un esquema a medias
+        server.log.error("El paso de despliegue falló; se cancela el arranque.")
+        sys.exit(resultado.returncode)
@@ -0,0 +1,181 @@
+"""Benchmarks de los caminos pesados del bot sobre un dataset sintético.
+
+Corre los handlers y consultas más caros contra una copia de la base generada con
+tools/generar_dataset.py, con la API falsa de tools/fake_telegram.py. Guarda los tiempos
+en JSON para comparar entre commits; con --comparar sale con código 1 si alguna mediana
+empeoró más que la tolerancia.
+
+Uso: python tools/benchmark.py datos.db [--rondas 5] [--salida resultados.json]
+     [--comparar anterior.json] [--tolerancia 0.2] [--solo nombre1,nombre2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_ID = 1
+
+def preparar_entorno(dataset):
+    """Copia el dataset a un archivo temporal (los cobros lo modifican) y apunta el bot a la copia."""
+    copia = os.path.join(tempfile.mkdtemp(prefix="benchmark_"), "datos.db")
+    shutil.copyfile(dataset, copia)
+    os.environ["DB_PATH"] = copia
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:abc")
+    os.environ["ADMIN_IDS"] = str(ADMIN_ID)
+    sys.path.insert(0, RAIZ)
+    return copia
+
+def update_callback(bot, chat_id, datos):
+    from telegram import Update
+
+    return Update.de_json({
+        'update_id': 1,
+        'callback_query': {
+            'id': '1', 'chat_instance': '1', 'data': datos,
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Benchmark'},
+            'message': {'message_id': 1, 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': 'menu'},
+        },
+    }, bot)
+
+def definir_benchmarks(application):
+    """Devuelve {nombre: (preparar, ejecutar)}; ``ejecutar`` es una corrutina sin argumentos."""
+    from telegram.ext import CallbackContext
+
+    from bot import db, reports
+    from bot.handlers.admin import admin_show_accounting_summary
+    from bot.handlers.admin_cobros import admin_generar_cobro_mensual_confirm
+    from bot.handlers.tenant import ver_saldo_y_pagos
+
+    db.cursor.execute(
+        "SELECT chat_id FROM inquilinos WHERE tipo_alquiler = 'prorrateo' AND medidor_asignado_luz_id IS NOT NULL ORDER BY chat_id LIMIT 1"
+    )
+    inquilino = db.cursor.fetchone()[0]
+    db.cursor.execute("SELECT propiedad_id FROM inquilinos GROUP BY propiedad_id ORDER BY COUNT(*) DESC LIMIT 1")
+    propiedad = db.cursor.fetchone()[0]
+
+    def handler(callback, chat_id, datos, user_data=None):
+        async def ejecutar():
+            update = update_callback(application.bot, chat_id, datos)
+            context = CallbackContext.from_update(update, application)
+            context.user_data.update(user_data or {})
+            await callback(update, context)
+        return ejecutar
+
+    async def en_corrutina(funcion):
+        funcion()
+
+    return {
+        'cobro_mensual_propiedad': (None, handler(
+            admin_generar_cobro_mensual_confirm, ADMIN_ID, 'charge_confirm_property',
+            {'charge_scope': 'property', 'charge_target_id': propiedad},
+        )),
+        'cobro_mensual_todos': (None, handler(
+            admin_generar_cobro_mensual_confirm, ADMIN_ID, 'charge_confirm_all', {'charge_scope': 'all'},
+        )),
+        'ver_saldo_y_pagos': (None, handler(ver_saldo_y_pagos, inquilino, 'ver_saldo_y_pagos')),
+        # Sin la caché del resumen, para medir el cálculo
+        'resumen_contable': (reports._cache_resumenes.clear, handler(admin_show_accounting_summary, ADMIN_ID, 'admin_resumen_contable')),
+        'reporte_morosos': (None, lambda: en_corrutina(reports.texto_antiguedad_deuda)),
+        'pagos_pendientes': (None, lambda: en_corrutina(db.obtener_pagos_pendientes)),
+    }
+
+async def correr(rondas, solo):
+    from telegram.ext import ApplicationBuilder
+
+    from tools.fake_telegram import BotAPIFalsa
+
+    request = BotAPIFalsa()
+    application = ApplicationBuilder().token(os.environ["TELEGRAM_BOT_TOKEN"]).request(request).build()
+    resultados = {}
+    async with application:
+        for nombre, (preparar, ejecutar) in definir_benchmarks(application).items():
+            if solo and nombre not in solo:
+                continue
+            tiempos = []
+            llamadas_antes = len(request.llamadas)
+            for _ in range(rondas):
+                if preparar:
+                    preparar()
+                inicio = time.perf_counter()
+                await ejecutar()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            resultados[nombre] = {
+                'rondas': rondas,
+                'min_ms': round(min(tiempos), 3),
+                'mediana_ms': round(statistics.median(tiempos), 3),
+                'media_ms': round(statistics.mean(tiempos), 3),
+                'max_ms': round(max(tiempos), 3),
+                'llamadas_api_por_ronda': (len(request.llamadas) - llamadas_antes) / rondas,
+            }
+            print(f"{nombre:28} mediana {resultados[nombre]['mediana_ms']:10.2f} ms  (min {resultados[nombre]['min_ms']:.2f}, max {resultados[nombre]['max_ms']:.2f})")
+    return resultados
+
+def resumen_dataset():
+    from bot import db
+
+    tablas = ('propiedades', 'inquilinos', 'medidores', 'lecturas', 'facturas', 'cargos', 'pagos', 'quejas')
+    return {tabla: db.cursor.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0] for tabla in tablas}
+
+def commit_actual():
+    resultado = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=RAIZ)
+    return resultado.stdout.strip() or None
+
+def comparar(resultados, anterior, tolerancia):
+    """Imprime la variación de cada mediana respecto a ``anterior``; devuelve los nombres que empeoraron."""
+    regresiones = []
+    for nombre, datos in resultados.items():
+        previo = anterior.get('resultados', {}).get(nombre)
+        if not previo or not previo['mediana_ms']:
+            continue
+        variacion = datos['mediana_ms'] / previo['mediana_ms'] - 1
+        marca = "  <-- regresión" if variacion > tolerancia else ""
+        print(f"{nombre:28} {previo['mediana_ms']:10.2f} -> {datos['mediana_ms']:10.2f} ms ({variacion:+.0%}){marca}")
+        if variacion > tolerancia:
+            regresiones.append(nombre)
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dataset", help="Base generada con tools/generar_dataset.py (no se modifica)")
+    parser.add_argument("--rondas", type=int, default=5)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento máximo de la mediana (0.2 = 20%%)")
+    parser.add_argument("--solo", help="Benchmarks a correr, separados por comas")
+    args = parser.parse_args()
+
+    copia = preparar_entorno(args.dataset)
+    try:
+        dataset = resumen_dataset()
+        resultados = asyncio.run(correr(args.rondas, set(args.solo.split(',')) if args.solo else None))
+    finally:
+        shutil.rmtree(os.path.dirname(copia), ignore_errors=True)
+
+    informe = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'dataset': dataset,
+        'resultados': resultados,
+    }
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            regresiones = comparar(resultados, json.load(archivo), args.tolerancia)
+        if regresiones:
+            sys.exit(f"Regresiones: {', '.join(regresiones)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Comprueba el tiempo de importación del worker y que los módulos offline no carguen Flask ni Telegram.
+
+Uso: python tools/check_import_time.py [--budget-ms 800]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def entorno():
+    """Entorno mínimo para importar el bot sin credenciales reales."""
+    env = dict(os.environ)
+    env.setdefault("TELEGRAM_BOT_TOKEN", "123:abc")
+    env.setdefault("ADMIN_IDS", "1")
+    env["PYTHONPATH"] = RAIZ + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def medir_importacion(modulo):
+    """Devuelve el tiempo acumulado (ms) de importar el módulo según -X importtime."""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, env=entorno(), cwd=RAIZ,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr)
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:"):
+            continue
+        partes = [p.strip() for p in linea[len("import time:"):].split("|")]
+        if len(partes) == 3 and partes[2] == modulo:
+            return int(partes[1]) / 1000
+    raise RuntimeError(f"No se encontró {modulo} en la salida de importtime")
+
+def modulos_cargados(modulo):
+    """Devuelve el conjunto de módulos de primer nivel cargados tras importar el módulo."""
+    codigo = f"import sys, {modulo}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    resultado = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, env=entorno(), cwd=RAIZ, check=True)
+    return set(resultado.stdout.split())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=800.0, help="Presupuesto para importar bot.web")
+    args = parser.parse_args()
+
+    errores = []
+    ms = medir_importacion("bot.web")
+    print(f"import bot.web: {ms:.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    if ms > args.budget_ms:
+        errores.append(f"bot.web tarda {ms:.1f} ms en importar")
+
+    for modulo in ("bot.db", "bot.billing"):
+        pesados = modulos_cargados(modulo) & {"flask", "telegram"}
+        print(f"import {modulo}: carga {', '.join(sorted(pesados)) or 'nada pesado'}")
+        if pesados:
+            errores.append(f"{modulo} no debería importar {', '.join(sorted(pesados))}")
+
+    for modulo in ("bot.handlers.admin_inquilinos", "bot.handlers.admin_propiedades", "bot.handlers.admin_cobros"):
+        codigo = f"import sys, bot.web; sys.exit({modulo!r} in sys.modules)"
+        if subprocess.run([sys.executable, "-c", codigo], env=entorno(), cwd=RAIZ, capture_output=True).returncode:
+            errores.append(f"{modulo} se importa al arrancar el worker")
+
+    for error in errores:
+        print(f"ERROR: {error}")
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Cuenta las consultas SQL de cada handler y falla si supera su presupuesto o si crece con los datos.
+
+Cada handler de ``PRESUPUESTOS`` se invoca una vez (con las cachés vacías) contra dos carteras
+sintéticas de tamaño distinto, cada una en su propio proceso (bot.db abre la conexión al
+importarse). Las consultas se cuentan con el mismo contador por invocación que alimenta
+bot_db_consultas_por_update en /metrics. Un handler falla si hace más consultas que su
+presupuesto, o si en la cartera grande hace más que en la chica: eso es un N+1.
+
+Uso: python tools/check_query_budget.py [--escala 4] [--solo nombre1,nombre2] [--detalle]
+"""
+
+import argparse
+import collections
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_ID = 1
+CARTERA_BASE = {'propiedades': 3, 'inquilinos': 60, 'lecturas': 600}
+
+Presupuesto = collections.namedtuple('Presupuesto', 'modulo callback quien datos maximo user_data por_fila filas')
+Presupuesto.__new__.__defaults__ = (None, 0, None)
+
+# ``maximo`` es el presupuesto fijo; los handlers que escriben una fila por inquilino declaran
+# ``por_fila`` consultas extra por cada fila que devuelve la consulta ``filas``.
+PRESUPUESTOS = {
+    'ver_propiedades': Presupuesto('bot.handlers.admin_propiedades', 'admin_ver_propiedades_callback', 'admin', 'admin_ver_propiedades', maximo=2),
+    'menu_ver_propiedades': Presupuesto('bot.handlers.common', 'menu_callback', 'admin', 'admin_ver_propiedades', maximo=2),
+    'menu_morosos': Presupuesto('bot.handlers.common', 'menu_callback', 'admin', 'admin_morosos', maximo=2),
+    'resumen_contable': Presupuesto('bot.handlers.admin', 'admin_show_accounting_summary', 'admin', 'admin_resumen_contable', maximo=8),
+    'confirmar_pagos': Presupuesto('bot.handlers.admin', 'handle_admin_confirmar_pagos_callback', 'admin', 'admin_confirmar_pagos', maximo=2),
+    'quejas': Presupuesto('bot.handlers.admin', 'handle_admin_quejas_callback', 'admin', 'admin_quejas', maximo=2),
+    'modificar_inquilino': Presupuesto('bot.handlers.admin_inquilinos', 'handle_admin_modificar_inquilino_callback', 'admin', 'admin_modificar_inquilino', maximo=2),
+    'ver_saldo_y_pagos': Presupuesto('bot.handlers.tenant', 'ver_saldo_y_pagos', 'inquilino', 'ver_saldo_y_pagos', maximo=13),
+    'ver_mi_propiedad': Presupuesto('bot.handlers.tenant', 'ver_mi_propiedad', 'inquilino', 'ver_mi_propiedad', maximo=6),
+    # Por inquilino: saldo y cargo; los que tienen medidor de luz propio cuentan doble (sus dos lecturas)
+    'cobro_mensual_propiedad': Presupuesto(
+        'bot.handlers.admin_cobros', 'admin_generar_cobro_mensual_confirm', 'admin', 'charge_confirm_property',
+        maximo=12, user_data={'charge_scope': 'property', 'charge_target_id': 1}, por_fila=2,
+        filas=(
+            "SELECT COUNT(*) + SUM(tipo_alquiler = 'prorrateo' AND medidor_asignado_luz_id IS NOT NULL) "
+            "FROM inquilinos WHERE propiedad_id = 1 AND fecha_ingreso IS NOT NULL"
+        ),
+    ),
+}
+
+def entorno(ruta):
+    env = dict(os.environ)
+    env["DB_PATH"] = ruta
+    env.setdefault("TELEGRAM_BOT_TOKEN", "123:abc")
+    env["ADMIN_IDS"] = str(ADMIN_ID)
+    env["PYTHONPATH"] = RAIZ + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def limpiar_caches():
+    """Vacía las cachés en memoria para contar las consultas del camino en frío."""
+    from bot import keyboards, reports
+    from bot.handlers import editing
+
+    reports._cache_resumenes.clear()
+    reports._cache_reportes.clear()
+    keyboards._cache_catalogo.clear()
+    editing._ultimas_ediciones.clear()
+
+async def contar_consultas(nombres):
+    """Invoca cada handler sobre la base de DB_PATH y devuelve {nombre: [consultas, filas]}."""
+    import importlib
+
+    from telegram.ext import ApplicationBuilder, CallbackContext
+
+    from bot import db, metrics
+    from tools.benchmark import update_callback
+    from tools.fake_telegram import BotAPIFalsa
+
+    # Un inquilino de prorrateo con medidor propio (el camino más caro), el que tiene más pagos
+    db.cursor.execute(
+        "SELECT p.chat_id FROM pagos p JOIN inquilinos i ON i.chat_id = p.chat_id "
+        "WHERE i.tipo_alquiler = 'prorrateo' AND i.medidor_asignado_luz_id IS NOT NULL "
+        "GROUP BY p.chat_id ORDER BY COUNT(*) DESC, p.chat_id LIMIT 1"
+    )
+    inquilino = db.cursor.fetchone()[0]
+    application = ApplicationBuilder().token(os.environ["TELEGRAM_BOT_TOKEN"]).request(BotAPIFalsa()).build()
+    conteos = {}
+    async with application:
+        for nombre in nombres:
+            presupuesto = PRESUPUESTOS[nombre]
+            filas = db.cursor.execute(presupuesto.filas).fetchone()[0] if presupuesto.filas else 0
+            callback = getattr(importlib.import_module(presupuesto.modulo), presupuesto.callback)
+            update = update_callback(application.bot, ADMIN_ID if presupuesto.quien == 'admin' else inquilino, presupuesto.datos)
+            context = CallbackContext.from_update(update, application)
+            context.user_data.update(presupuesto.user_data or {})
+            limpiar_caches()
+            consultas = [0]
+            token = metrics.consultas_handler.set(consultas)
+            try:
+                await callback(update, context)
+            finally:
+                metrics.consultas_handler.reset(token)
+            conteos[nombre] = [consultas[0], filas]
+    return conteos
+
+def medir_en_proceso(escala, nombres):
+    """Genera la cartera de ``escala`` en la base de DB_PATH y cuenta las consultas (corre en el proceso hijo)."""
+    import asyncio
+
+    sys.path.insert(0, RAIZ)
+    from bot import db
+    from tools.generar_dataset import generar
+
+    db.crear_tablas()
+    generar(db.cursor, anios=1, azar=random.Random(1), **{clave: valor * escala for clave, valor in CARTERA_BASE.items()})
+    db.reconstruir_resumen_mensual()
+    db.conn.commit()
+    db.reconciliar_pyg()
+    db.cursor.execute("ANALYZE")
+    db.conn.commit()
+    print(json.dumps(asyncio.run(contar_consultas(nombres))))
+
+def medir(escala, nombres):
+    """Cuenta las consultas en un proceso nuevo con una cartera de ``escala`` veces la base."""
+    with tempfile.TemporaryDirectory(prefix="presupuesto_") as directorio:
+        resultado = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--medir", str(escala), "--solo", ",".join(nombres)],
+            capture_output=True, text=True, env=entorno(os.path.join(directorio, "datos.db")), cwd=RAIZ,
+        )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr)
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", type=int, default=4, help="Cuántas veces más grande es la cartera grande")
+    parser.add_argument("--solo", help="Handlers a revisar, separados por comas")
+    parser.add_argument("--detalle", action="store_true", help="Muestra también los handlers que pasan")
+    parser.add_argument("--medir", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    nombres = args.solo.split(',') if args.solo else list(PRESUPUESTOS)
+    desconocidos = [nombre for nombre in nombres if nombre not in PRESUPUESTOS]
+    if desconocidos:
+        sys.exit(f"Handlers desconocidos: {', '.join(desconocidos)}")
+    if args.medir:
+        medir_en_proceso(args.medir, nombres)
+        return 0
+
+    chica, grande = medir(1, nombres), medir(args.escala, nombres)
+    errores = []
+    for nombre in nombres:
+        presupuesto = PRESUPUESTOS[nombre]
+        # Descontadas las consultas declaradas por fila, lo que queda no debe crecer con los datos
+        fijas = {escala: consultas - presupuesto.por_fila * filas for escala, (consultas, filas) in (('chica', chica[nombre]), ('grande', grande[nombre]))}
+        excedido = max(fijas.values()) > presupuesto.maximo
+        crece = fijas['grande'] > fijas['chica']
+        if excedido:
+            errores.append(f"{nombre} hace {max(fijas.values())} consultas fijas (presupuesto {presupuesto.maximo})")
+        if crece:
+            errores.append(f"{nombre} pasa de {fijas['chica']} a {fijas['grande']} consultas fijas con {args.escala}x datos (¿N+1?)")
+        if args.detalle or excedido or crece:
+            por_fila = f" + {presupuesto.por_fila} por fila" if presupuesto.por_fila else ""
+            print(f"{nombre:25} {chica[nombre][0]:5} -> {grande[nombre][0]:5} consultas (presupuesto {presupuesto.maximo}{por_fila})")
+
+    for error in errores:
+        print(f"ERROR: {error}")
+    if not errores:
+        print(f"{len(nombres)} handlers dentro de su presupuesto de consultas.")
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
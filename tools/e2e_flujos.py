@@ -0,0 +1,294 @@
+"""Corre conversaciones completas contra la API falsa y mide latencia y llamadas por flujo.
+
+Los flujos (registro de inquilino, amortizar con comprobante, cobro mensual de una propiedad)
+pasan por ``Application.process_update`` con los mismos handlers y persistencia que producción.
+Sin --dataset se genera una cartera chica en un archivo temporal.
+
+Después se verifican los reenvíos por el camino del webhook (``bot.web``, con la Bot API falsa
+por HTTP): un update repetido confirma el pago y genera el cobro una sola vez, y los updates con
+ids más bajos que los ya vistos (Telegram reinicia la numeración) se procesan. También que el
+arranque del worker lanzó las tareas de fondo y que el barrido de sesiones libera y mide ``user_data``.
+
+Uso: python tools/e2e_flujos.py [--dataset datos.db] [--latencia-ms 0] [--tasa-errores 0]
+     [--repeticiones 3] [--salida resultados.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_ID = 1
+
+def preparar_base(dataset):
+    """Apunta el bot a una copia de ``dataset`` o a una cartera chica generada. Devuelve el directorio temporal."""
+    directorio = tempfile.mkdtemp(prefix="e2e_")
+    ruta = os.path.join(directorio, "datos.db")
+    os.environ["DB_PATH"] = ruta
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:abc")
+    os.environ["ADMIN_IDS"] = str(ADMIN_ID)
+    sys.path.insert(0, RAIZ)
+    if dataset:
+        shutil.copyfile(dataset, ruta)
+    from bot import db
+
+    db.crear_tablas()
+    if not dataset:
+        from tools.generar_dataset import generar
+
+        generar(db.cursor, propiedades=5, inquilinos=200, lecturas=5000, anios=1, azar=random.Random(1))
+        db.reconstruir_resumen_mensual()
+        db.conn.commit()
+        db.reconciliar_pyg()
+    return directorio
+
+def iniciar_stub():
+    """Bot API falsa por HTTP para bot.web, que lee TELEGRAM_API_URL al importarse."""
+    from tools.loadtest import crear_stub
+
+    servidor = crear_stub(0, 0)
+    threading.Thread(target=servidor.serve_forever, name="stub-api", daemon=True).start()
+    os.environ["TELEGRAM_API_URL"] = f"http://127.0.0.1:{servidor.server_address[1]}"
+    return servidor
+
+def flujos(simulador, repeticion):
+    """Devuelve {nombre: [funciones que arman cada update]}, con un usuario nuevo por repetición donde hace falta."""
+    from bot import db
+
+    db.cursor.execute(
+        "SELECT chat_id FROM inquilinos WHERE fecha_ingreso IS NOT NULL ORDER BY chat_id LIMIT 1 OFFSET ?", (repeticion,)
+    )
+    inquilino = simulador.usuario(db.cursor.fetchone()[0], "Inquilino")
+    db.cursor.execute("SELECT propiedad_id FROM inquilinos WHERE propiedad_id IS NOT NULL GROUP BY propiedad_id ORDER BY COUNT(*) LIMIT 1")
+    propiedad_id = db.cursor.fetchone()[0]
+    nuevo = simulador.usuario(900_000 + repeticion, "Nuevo")
+    admin = simulador.usuario(ADMIN_ID, "Admin")
+    # Cada update se arma justo antes de enviarlo: los botones van sobre el último mensaje del bot
+    return {
+        'registro': [
+            lambda: nuevo.comando("/start"),
+            lambda: nuevo.mensaje(f"Persona Nueva {repeticion}"),
+            lambda: nuevo.mensaje(str(8_000_000 + repeticion)),
+        ],
+        'amortizar': [
+            lambda: inquilino.comando("/start"),
+            lambda: inquilino.boton("amortizar"),
+            lambda: inquilino.mensaje("150"),
+            lambda: inquilino.foto(),
+        ],
+        'cobro_mensual': [
+            lambda: admin.comando("/start"),
+            lambda: admin.boton("admin_menu_comunicacion"),
+            lambda: admin.boton("admin_generar_cobro_mensual"),
+            lambda: admin.boton("charge_scope_property"),
+            lambda: admin.boton(f"chargeprop_{propiedad_id}"),
+            lambda: admin.boton("charge_confirm_property"),
+        ],
+    }
+
+async def correr(latencia, tasa_errores, repeticiones):
+    from telegram.ext import ApplicationBuilder
+
+    from bot.handlers import registrar_handlers
+    from bot.persistence import SQLitePersistence
+    from tools.fake_telegram import BotAPIFalsa, Simulador
+
+    api = BotAPIFalsa(latencia=latencia, tasa_errores={'*': tasa_errores} if tasa_errores else None, semilla=1)
+    application = (
+        ApplicationBuilder().token(os.environ["TELEGRAM_BOT_TOKEN"])
+        .request(api).get_updates_request(BotAPIFalsa())
+        .persistence(SQLitePersistence())
+        .build()
+    )
+    registrar_handlers(application)
+    simulador = Simulador(application, api)
+    resultados = {}
+    async with application:
+        for repeticion in range(repeticiones):
+            for nombre, pasos in flujos(simulador, repeticion).items():
+                resultados.setdefault(nombre, []).append([await simulador.enviar(armar()) for armar in pasos])
+    return resumir(resultados)
+
+def resumir(resultados):
+    """Latencia total (ms), llamadas a la API por método y errores de cada flujo."""
+    resumen = {}
+    for nombre, corridas in resultados.items():
+        totales = [sum(paso.segundos for paso in pasos) * 1000 for pasos in corridas]
+        llamadas = {}
+        for paso in corridas[-1]:
+            for metodo, cantidad in paso.llamadas.items():
+                llamadas[metodo] = llamadas.get(metodo, 0) + cantidad
+        resumen[nombre] = {
+            'repeticiones': len(corridas),
+            'mediana_ms': round(statistics.median(totales), 3),
+            'max_ms': round(max(totales), 3),
+            'pasos_ms': [round(paso.segundos * 1000, 3) for paso in corridas[-1]],
+            'llamadas_api': llamadas,
+            'errores': sum(len(paso.errores) for pasos in corridas for paso in pasos),
+        }
+        print(f"{nombre:15} mediana {resumen[nombre]['mediana_ms']:9.2f} ms  llamadas {llamadas}  errores {resumen[nombre]['errores']}")
+    return resumen
+
+# --- Reenvíos por el webhook ---
+
+def _esperar(condicion, segundos=10):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.05)
+    return False
+
+def _boton(user_id, datos, update_id):
+    chat = {'id': user_id, 'type': 'private'}
+    return {'update_id': update_id, 'callback_query': {
+        'id': str(update_id), 'chat_instance': str(user_id), 'from': {'id': user_id, 'is_bot': False, 'first_name': 'Admin'},
+        'data': datos, 'message': {'message_id': 1, 'date': 0, 'chat': chat, 'text': 'menú'},
+    }}
+
+def _comando(user_id, texto, update_id):
+    chat = {'id': user_id, 'type': 'private'}
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': int(time.time()), 'chat': chat, 'from': {'id': user_id, 'is_bot': False, 'first_name': 'Admin'},
+        'text': texto, 'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(texto.split(' ', 1)[0])}],
+    }}
+
+def verificar_reenvios():
+    """Envía updates repetidos y con ids más bajos a /webhook. Devuelve la lista de fallas."""
+    from bot import db, metrics, shards, web
+    from bot.handlers.router import datos_guardados
+
+    cliente = web.app.test_client()
+    lectura = sqlite3.connect(os.environ["DB_PATH"])
+    fallas = []
+
+    def enviar(update, veces=1):
+        for _ in range(veces):
+            if cliente.post('/webhook', json=update).status_code != 200:
+                fallas.append(f"/webhook no respondió 200 al update {update['update_id']}")
+
+    def cola_vacia():
+        # La aplicación toma los updates de la cola de a uno; se deja terminar al último
+        vacia = _esperar(web.application.update_queue.empty)
+        time.sleep(0.5)
+        return vacia
+
+    def pago_pendiente(chat_id):
+        db.cursor.execute(
+            "INSERT INTO pagos(chat_id, fecha_pago, monto_pagado, saldo_restante, comprobante, confirmado) VALUES (?, date('now'), 100, 0, 'e2e', 0)",
+            (chat_id,),
+        )
+        db.conn.commit()
+        return db.cursor.lastrowid
+
+    def confirmado(pago_id):
+        return lectura.execute("SELECT confirmado FROM pagos WHERE id = ?", (pago_id,)).fetchone()[0] == 1
+
+    chat_id, saldo = lectura.execute(
+        "SELECT chat_id, saldo FROM inquilinos WHERE fecha_ingreso IS NOT NULL ORDER BY chat_id DESC LIMIT 1"
+    ).fetchone()
+    duplicados_antes = metrics._contadores.get(('bot_updates_duplicados_total', ()), 0)
+
+    # 1. Confirmar un pago desde la notificación, con el update reenviado
+    pago_id = pago_pendiente(chat_id)
+    enviar(_boton(ADMIN_ID, datos_guardados('pago_directo', pago_id, shards.actual().nombre), 10_000_000), veces=2)
+    if not _esperar(lambda: confirmado(pago_id)):
+        fallas.append("el pago reenviado no se confirmó")
+    cola_vacia()
+    saldo_final = lectura.execute("SELECT saldo FROM inquilinos WHERE chat_id = ?", (chat_id,)).fetchone()[0]
+    if abs(saldo_final - (saldo - 100)) > 0.001:
+        fallas.append(f"el saldo pasó de {saldo:.2f} a {saldo_final:.2f} (se esperaba un solo pago de 100)")
+
+    # 2. Cobro mensual de una propiedad, con la confirmación reenviada
+    propiedad_id = lectura.execute("SELECT propiedad_id FROM inquilinos WHERE propiedad_id IS NOT NULL LIMIT 1").fetchone()[0]
+    ultimo_cargo = lectura.execute("SELECT COALESCE(MAX(id), 0) FROM cargos").fetchone()[0]
+    pasos = ['admin_menu_comunicacion', 'admin_generar_cobro_mensual', 'charge_scope_property', f'chargeprop_{propiedad_id}']
+    enviar(_comando(ADMIN_ID, '/start', 10_000_001))
+    for n, datos in enumerate(pasos, start=10_000_002):
+        enviar(_boton(ADMIN_ID, datos, n))
+    enviar(_boton(ADMIN_ID, 'charge_confirm_property', 10_000_010), veces=2)
+    if not _esperar(lambda: lectura.execute("SELECT COUNT(*) FROM cargos WHERE id > ?", (ultimo_cargo,)).fetchone()[0] > 0):
+        fallas.append("el cobro mensual reenviado no generó cargos")
+    cola_vacia()
+    repetidos = lectura.execute(
+        "SELECT COUNT(*) FROM (SELECT chat_id FROM cargos WHERE id > ? GROUP BY chat_id HAVING COUNT(*) > 1)", (ultimo_cargo,)
+    ).fetchone()[0]
+    if repetidos:
+        fallas.append(f"el cobro mensual se aplicó dos veces a {repetidos} inquilinos")
+
+    # 3. Ids por debajo del máximo visto (numeración reiniciada): se procesan
+    pago_bajo = pago_pendiente(chat_id)
+    enviar(_comando(ADMIN_ID, '/start', 5))
+    enviar(_boton(ADMIN_ID, datos_guardados('pago_directo', pago_bajo, shards.actual().nombre), 6))
+    if not _esperar(lambda: confirmado(pago_bajo)):
+        fallas.append("un update con id más bajo que los anteriores no se procesó")
+
+    duplicados = metrics._contadores.get(('bot_updates_duplicados_total', ()), 0) - duplicados_antes
+    if duplicados != 2:
+        fallas.append(f"se descartaron {duplicados} updates repetidos (se esperaban 2)")
+    lectura.close()
+    print(f"{'reenvíos':15} {'ok' if not fallas else 'FALLA'}: {len(fallas)} fallas, {duplicados} updates repetidos descartados")
+    for falla in fallas:
+        print(f"ERROR: {falla}")
+    return fallas
+
+def verificar_tareas_webhook():
+    """Comprueba las tareas de fondo del worker del webhook y un barrido de sesiones. Devuelve la lista de fallas."""
+    from bot import sessions, tasks, web
+
+    fallas = []
+    loop = web.obtener_loop_worker()
+    lanzadas = sorted(tarea.get_coro().__name__ for tarea in tasks._tareas if not tarea.done())
+    if lanzadas != ['barrer_sesiones', 'ejecutar_cada_noche', 'ejecutar_cada_noche']:
+        fallas.append(f"tareas de fondo en el worker: {lanzadas}")
+
+    async def barrer_con_inactivo():
+        # Un usuario sin actividad hace más que INACTIVIDAD_MEMORIA, sin nada pendiente de persistir
+        web.application._user_data[ADMIN_ID + 1] = {sessions.CLAVE_ACTIVIDAD: time.time() - sessions.INACTIVIDAD_MEMORIA - 1}
+        sessions.barrer(web.application)
+        return ADMIN_ID + 1 in web.application.user_data
+
+    if asyncio.run_coroutine_threadsafe(barrer_con_inactivo(), loop).result(timeout=10):
+        fallas.append("el barrido no sacó de memoria al usuario inactivo")
+    metricas = web.app.test_client().get('/metrics').get_data(as_text=True)
+    medidos = [linea.split()[1] for linea in metricas.splitlines() if linea.startswith('bot_user_data_bytes ')]
+    if not medidos or float(medidos[0]) <= 0:
+        fallas.append(f"bot_user_data_bytes no refleja user_data tras el barrido: {medidos}")
+    print(f"{'tareas webhook':15} {'ok' if not fallas else 'FALLA'}: {len(fallas)} fallas, tareas {', '.join(lanzadas)}")
+    for falla in fallas:
+        print(f"ERROR: {falla}")
+    return fallas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", help="Base generada con tools/generar_dataset.py (se usa una copia)")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Latencia simulada de cada llamada a la API")
+    parser.add_argument("--tasa-errores", type=float, default=0.0, help="Probabilidad de error 400 en cada llamada")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    directorio = preparar_base(args.dataset)
+    stub = iniciar_stub()
+    try:
+        resumen = asyncio.run(correr(args.latencia_ms / 1000, args.tasa_errores, args.repeticiones))
+        fallas = verificar_reenvios() + verificar_tareas_webhook()
+    finally:
+        stub.shutdown()
+        shutil.rmtree(directorio, ignore_errors=True)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resumen, archivo, indent=2, ensure_ascii=False)
+    return 1 if fallas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
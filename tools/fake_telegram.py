@@ -0,0 +1,228 @@
+"""API de Telegram falsa, en proceso, para correr los handlers de punta a punta sin red.
+
+``BotAPIFalsa`` reemplaza la capa HTTP de python-telegram-bot: registra cada llamada (método,
+parámetros, duración), responde con objetos plausibles y permite simular latencia y errores.
+``Usuario`` arma los updates de un usuario (comandos, texto, fotos, botones) y ``Simulador``
+los procesa con ``Application.process_update`` midiendo latencia y llamadas por paso.
+
+Ejemplo::
+
+    api = BotAPIFalsa(latencia=0.05)
+    simulador = Simulador(application, api)
+    inquilino = simulador.usuario(5001, "Ana")
+    await simulador.enviar(inquilino.comando("/start"))
+    await simulador.enviar(inquilino.boton("amortizar"))
+"""
+
+import asyncio
+import collections
+import itertools
+import json
+import random
+import time
+
+from telegram import Update
+from telegram.request import BaseRequest
+
+# Respuesta de los métodos que devuelven el mensaje enviado o editado
+METODOS_CON_MENSAJE = {
+    'sendMessage', 'editMessageText', 'sendPhoto', 'sendDocument', 'editMessageReplyMarkup', 'editMessageCaption',
+}
+
+Llamada = collections.namedtuple('Llamada', 'metodo parametros segundos error')
+
+class BotAPIFalsa(BaseRequest):
+    """Capa de requests que contesta como la Bot API y registra las llamadas.
+
+    ``latencia`` es un número de segundos o un dict {método: segundos} (clave ``'*'`` por
+    defecto). ``tasa_errores`` es un dict {método: probabilidad} de responder con un error 400
+    (o 429 si se indica en ``errores_429``). ``fallar(metodo, veces)`` fuerza errores puntuales."""
+
+    def __init__(self, latencia=0.0, tasa_errores=None, errores_429=False, semilla=None, username='prueba_bot'):
+        super().__init__()
+        self.latencia = latencia
+        self.tasa_errores = dict(tasa_errores or {})
+        self.errores_429 = errores_429
+        self.username = username
+        self.llamadas = []
+        self._azar = random.Random(semilla)
+        self._fallas_forzadas = collections.Counter()
+        self._ids_mensaje = itertools.count(1000)
+        self.ultimo_mensaje = {} # chat_id -> último mensaje enviado por el bot
+        self.webhook_url = ''
+        self.comandos = []
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def fallar(self, metodo, veces=1):
+        """Hace que las próximas ``veces`` llamadas a ``metodo`` respondan con error."""
+        self._fallas_forzadas[metodo] += veces
+
+    def contar(self, metodo=None):
+        return sum(1 for llamada in self.llamadas if metodo is None or llamada.metodo == metodo)
+
+    def por_metodo(self, desde=0):
+        """Cantidad de llamadas por método a partir de la posición ``desde`` del registro."""
+        return dict(collections.Counter(llamada.metodo for llamada in self.llamadas[desde:]))
+
+    def reiniciar(self):
+        self.llamadas.clear()
+
+    def _latencia(self, metodo):
+        if isinstance(self.latencia, dict):
+            return self.latencia.get(metodo, self.latencia.get('*', 0.0))
+        return self.latencia
+
+    def _debe_fallar(self, metodo):
+        if self._fallas_forzadas[metodo]:
+            self._fallas_forzadas[metodo] -= 1
+            return True
+        if metodo == 'getMe': # Sin getMe la aplicación no arranca: solo falla si se pide explícitamente
+            return self.tasa_errores.get(metodo, 0.0) > self._azar.random()
+        tasa = self.tasa_errores.get(metodo, self.tasa_errores.get('*', 0.0))
+        return tasa > 0 and self._azar.random() < tasa
+
+    def _mensaje(self, parametros):
+        chat_id = int(parametros.get('chat_id', 0))
+        mensaje = {
+            'message_id': parametros.get('message_id') or next(self._ids_mensaje),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': 1, 'is_bot': True, 'first_name': 'Bot', 'username': self.username},
+        }
+        if 'text' in parametros:
+            mensaje['text'] = parametros['text']
+        if 'photo' in parametros:
+            mensaje['photo'] = [{'file_id': str(parametros['photo']), 'file_unique_id': 'u', 'width': 1, 'height': 1}]
+        if 'document' in parametros:
+            mensaje['document'] = {'file_id': 'documento', 'file_unique_id': 'd'}
+        if 'caption' in parametros:
+            mensaje['caption'] = parametros['caption']
+        if parametros.get('reply_markup'):
+            mensaje['reply_markup'] = parametros['reply_markup']
+        self.ultimo_mensaje[chat_id] = mensaje
+        return mensaje
+
+    def _resultado(self, metodo, parametros):
+        if metodo == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'Bot', 'username': self.username}
+        if metodo in METODOS_CON_MENSAJE:
+            return self._mensaje(parametros)
+        if metodo == 'getWebhookInfo':
+            return {'url': self.webhook_url, 'has_custom_certificate': False, 'pending_update_count': 0}
+        if metodo == 'setWebhook':
+            self.webhook_url = parametros.get('url', '')
+        elif metodo == 'getMyCommands':
+            return self.comandos
+        elif metodo == 'setMyCommands':
+            comandos = parametros.get('commands', [])
+            self.comandos = json.loads(comandos) if isinstance(comandos, str) else comandos
+        return True
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        metodo = url.rsplit('/', 1)[-1]
+        parametros = request_data.parameters if request_data else {}
+        inicio = time.perf_counter()
+        espera = self._latencia(metodo)
+        if espera:
+            await asyncio.sleep(espera)
+        if self._debe_fallar(metodo):
+            if self.errores_429:
+                codigo, cuerpo = 429, {'ok': False, 'error_code': 429, 'description': 'Too Many Requests: retry after 1', 'parameters': {'retry_after': 1}}
+            else:
+                codigo, cuerpo = 400, {'ok': False, 'error_code': 400, 'description': f'Bad Request: error simulado en {metodo}'}
+        else:
+            codigo, cuerpo = 200, {'ok': True, 'result': self._resultado(metodo, parametros)}
+        self.llamadas.append(Llamada(metodo, parametros, time.perf_counter() - inicio, codigo != 200))
+        return codigo, json.dumps(cuerpo).encode()
+
+class Usuario:
+    """Arma los updates (como dicts de la Bot API) que manda un usuario en su chat privado."""
+
+    def __init__(self, simulador, user_id, nombre):
+        self.simulador = simulador
+        self.id = user_id
+        self.nombre = nombre
+
+    def _remitente(self):
+        return {'id': self.id, 'is_bot': False, 'first_name': self.nombre}
+
+    def _mensaje(self, **contenido):
+        return {
+            'update_id': self.simulador.siguiente_update_id(),
+            'message': {
+                'message_id': self.simulador.siguiente_update_id(), 'date': int(time.time()),
+                'chat': {'id': self.id, 'type': 'private'}, 'from': self._remitente(), **contenido,
+            },
+        }
+
+    def comando(self, texto):
+        """``/comando [argumentos]``."""
+        longitud = len(texto.split(' ', 1)[0])
+        return self._mensaje(text=texto, entities=[{'type': 'bot_command', 'offset': 0, 'length': longitud}])
+
+    def mensaje(self, texto):
+        return self._mensaje(text=texto)
+
+    def foto(self, file_id='comprobante'):
+        return self._mensaje(photo=[{'file_id': file_id, 'file_unique_id': file_id, 'width': 800, 'height': 600}])
+
+    def boton(self, datos):
+        """Pulsa un botón con ``datos`` en el último mensaje que el bot mandó a este chat."""
+        mensaje = self.simulador.api.ultimo_mensaje.get(self.id) or {
+            'message_id': 1, 'date': 0, 'chat': {'id': self.id, 'type': 'private'}, 'text': 'menú',
+        }
+        return {
+            'update_id': self.simulador.siguiente_update_id(),
+            'callback_query': {
+                'id': str(self.simulador.siguiente_update_id()), 'chat_instance': str(self.id),
+                'from': self._remitente(), 'data': datos, 'message': mensaje,
+            },
+        }
+
+Paso = collections.namedtuple('Paso', 'descripcion segundos llamadas errores')
+
+class Simulador:
+    """Procesa updates en la aplicación y mide cada paso (latencia, llamadas a la API, errores)."""
+
+    def __init__(self, application, api):
+        self.application = application
+        self.api = api
+        self.errores = []
+        self._update_ids = itertools.count(1)
+        application.add_error_handler(self._registrar_error)
+
+    async def _registrar_error(self, update, context):
+        self.errores.append(context.error)
+
+    def siguiente_update_id(self):
+        return next(self._update_ids)
+
+    def usuario(self, user_id, nombre='Usuario'):
+        return Usuario(self, user_id, nombre)
+
+    async def enviar(self, datos_update, descripcion=None):
+        """Procesa un update y devuelve el ``Paso`` medido."""
+        desde, errores_antes = len(self.api.llamadas), len(self.errores)
+        inicio = time.perf_counter()
+        await self.application.process_update(Update.de_json(datos_update, self.application.bot))
+        segundos = time.perf_counter() - inicio
+        descripcion = descripcion or _describir(datos_update)
+        return Paso(descripcion, segundos, self.api.por_metodo(desde), self.errores[errores_antes:])
+
+    async def conversar(self, pasos):
+        """Envía una lista de updates en orden; devuelve la lista de ``Paso``."""
+        return [await self.enviar(datos) for datos in pasos]
+
+def _describir(datos_update):
+    if 'callback_query' in datos_update:
+        return f"botón {datos_update['callback_query']['data']}"
+    mensaje = datos_update.get('message', {})
+    if 'photo' in mensaje:
+        return "foto"
+    return repr(mensaje.get('text', ''))
@@ -0,0 +1,204 @@
+"""Genera una base de datos sintética con una cartera grande, para benchmarks y pruebas de carga.
+
+Crea propiedades con sus medidores, inquilinos (parte con medidor de luz individual), lecturas,
+facturas mensuales por servicio, cargos y pagos de varios años, y algunas quejas. Los saldos,
+el resumen mensual y el P&L quedan consistentes con los movimientos generados.
+
+Uso: python tools/generar_dataset.py datos.db [--propiedades 50] [--inquilinos 5000]
+     [--lecturas 200000] [--anios 3] [--semilla 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRIMER_CHAT_ID = 10_000_000
+NOMBRES = ("Ana", "Luis", "María", "Carlos", "Lucía", "Jorge", "Sofía", "Diego", "Valeria", "Andrés", "Camila", "Mateo")
+APELLIDOS = ("Pérez", "Gómez", "Rojas", "Vargas", "Mamani", "Quispe", "Flores", "Choque", "Gutiérrez", "Torrez")
+QUEJAS = (
+    "La ducha no calienta", "Hay una gotera en el baño", "El wifi se corta por las noches",
+    "Ruido en el departamento de arriba", "La puerta del garaje no cierra", "Falta limpieza en las gradas",
+)
+
+def meses(desde, cantidad):
+    """Primer día de cada uno de ``cantidad`` meses a partir de ``desde``."""
+    año, mes = desde.year, desde.month
+    for _ in range(cantidad):
+        yield date(año, mes, 1)
+        año, mes = (año + 1, 1) if mes == 12 else (año, mes + 1)
+
+def generar(cursor, propiedades, inquilinos, lecturas, anios, azar):
+    """Inserta el dataset con el cursor dado (sin commit). Devuelve la cantidad de filas por tabla."""
+    hoy = date.today()
+    inicio = date(hoy.year - anios, hoy.month, 1)
+    calendario = list(meses(inicio, anios * 12 + 1)) # Incluye el mes actual
+    filas = {}
+
+    # Propiedades con un medidor principal de agua y de gas
+    medidores_agua, medidores_gas = {}, {}
+    for p in range(1, propiedades + 1):
+        cursor.execute(
+            "INSERT INTO propiedades(nombre, direccion, wifi_ssid, wifi_password) VALUES (?, ?, ?, ?)",
+            (f"Edificio {p}", f"Calle {azar.randint(1, 300)} #{azar.randint(100, 999)}", f"wifi_{p}", f"clave{p:04d}"),
+        )
+        propiedad_id = cursor.lastrowid
+        for tipo, destino in (('agua', medidores_agua), ('gas', medidores_gas)):
+            cursor.execute(
+                "INSERT INTO medidores(propiedad_id, nombre_medidor, tipo_servicio) VALUES (?, ?, ?)",
+                (propiedad_id, f"{tipo.capitalize()} principal", tipo),
+            )
+            destino[propiedad_id] = cursor.lastrowid
+    ids_propiedades = list(medidores_agua)
+    filas['propiedades'] = propiedades
+
+    # Inquilinos; la mitad con medidor de luz individual
+    datos_inquilinos = []
+    medidores_luz = []
+    for n in range(inquilinos):
+        chat_id = PRIMER_CHAT_ID + n
+        propiedad_id = azar.choice(ids_propiedades)
+        medidor_luz = None
+        if n % 2 == 0:
+            cursor.execute(
+                "INSERT INTO medidores(propiedad_id, nombre_medidor, tipo_servicio) VALUES (?, ?, 'luz')",
+                (propiedad_id, f"Luz depto {n}"),
+            )
+            medidor_luz = cursor.lastrowid
+            medidores_luz.append((medidor_luz, propiedad_id))
+        ingreso = azar.choice(calendario[:-1]) + timedelta(days=azar.randint(0, 27))
+        datos_inquilinos.append({
+            'chat_id': chat_id, 'propiedad_id': propiedad_id, 'ingreso': ingreso,
+            'alquiler': float(azar.choice((800, 1000, 1200, 1500, 1800, 2500))),
+            'tipo': 'prorrateo' if azar.random() < 0.7 else 'todo',
+            'personas': azar.randint(1, 4), 'luz': medidor_luz,
+            'moroso': azar.random() < 0.08, # Dejan de pagar los últimos meses
+        })
+    cursor.executemany(
+        "INSERT INTO inquilinos(chat_id, nombre, ci, fecha_ingreso, monto_alquiler, tipo_alquiler, saldo, propiedad_id, "
+        "medidor_asignado_luz_id, medidor_asignado_agua_id, medidor_asignado_gas_id, num_personas) "
+        "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?)",
+        (
+            (i['chat_id'], f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {i['chat_id']}", str(4_000_000 + i['chat_id'] % 5_000_000),
+             i['ingreso'].isoformat(), i['alquiler'], i['tipo'], i['propiedad_id'], i['luz'],
+             medidores_agua[i['propiedad_id']], medidores_gas[i['propiedad_id']], i['personas'])
+            for i in datos_inquilinos
+        ),
+    )
+    filas['inquilinos'] = inquilinos
+    filas['medidores'] = len(medidores_luz) + 2 * propiedades
+
+    # Lecturas de los medidores de luz, repartidas en el período y siempre crecientes
+    dias = (hoy - inicio).days or 1
+    por_medidor = max(1, lecturas // max(1, len(medidores_luz)))
+    def filas_lecturas():
+        for medidor_id, _ in medidores_luz:
+            valor = azar.uniform(0, 5000)
+            for k in range(por_medidor):
+                valor += azar.uniform(20, 200)
+                yield medidor_id, (inicio + timedelta(days=dias * k // por_medidor)).isoformat(), round(valor, 1)
+    cursor.executemany("INSERT INTO lecturas(medidor_id, fecha, lectura) VALUES (?, ?, ?)", filas_lecturas())
+    filas['lecturas'] = por_medidor * len(medidores_luz)
+
+    # Facturas mensuales por propiedad y servicio
+    def filas_facturas():
+        for mes in calendario:
+            fecha = (mes + timedelta(days=azar.randint(0, 9))).isoformat()
+            for propiedad_id in ids_propiedades:
+                yield 'luz', fecha, round(azar.uniform(800, 3000), 2), propiedad_id, None, round(azar.uniform(2000, 9000), 1)
+                yield 'agua', fecha, round(azar.uniform(200, 900), 2), propiedad_id, medidores_agua[propiedad_id], 0
+                yield 'gas', fecha, round(azar.uniform(100, 500), 2), propiedad_id, medidores_gas[propiedad_id], 0
+                yield 'internet_tv', fecha, 350.0, propiedad_id, None, 0
+    cursor.executemany(
+        "INSERT INTO facturas(tipo_servicio, fecha, monto, propiedad_id, medidor_id, total_kwh) VALUES (?, ?, ?, ?, ?, ?)",
+        filas_facturas(),
+    )
+    filas['facturas'] = 4 * len(calendario) * propiedades
+
+    # Cargos mensuales y pagos; el mes actual queda con pagos pendientes de confirmar
+    cargos, pagos, saldos = [], [], []
+    for i in datos_inquilinos:
+        saldo = 0.0
+        ultimo_completo = None
+        for mes in calendario:
+            if mes < date(i['ingreso'].year, i['ingreso'].month, 1):
+                continue
+            servicios = round(azar.uniform(80, 400), 2) if i['tipo'] == 'prorrateo' else 0.0
+            monto = i['alquiler'] + servicios
+            cargos.append((i['chat_id'], f"{mes.isoformat()} 08:00:00", monto, f"Cobro mensual {mes:%Y-%m}", i['propiedad_id'], i['alquiler']))
+            saldo += monto
+            if i['moroso'] and mes >= calendario[-4]:
+                continue
+            actual = mes == calendario[-1]
+            pago = monto if azar.random() < 0.9 else round(monto * azar.uniform(0.4, 0.9), 2)
+            fecha_pago = (mes + timedelta(days=azar.randint(1, 20))).isoformat()
+            confirmado = 0 if actual and azar.random() < 0.5 else 1
+            if confirmado:
+                saldo = round(saldo - pago, 2)
+                if saldo <= 0:
+                    ultimo_completo = f"{fecha_pago} 12:00:00"
+            pagos.append((i['chat_id'], fecha_pago, pago, saldo, f"comprobante_{i['chat_id']}_{mes:%Y%m}.jpg", confirmado))
+        saldos.append((saldo, ultimo_completo, i['chat_id']))
+    cursor.executemany(
+        "INSERT INTO cargos(chat_id, fecha, monto, concepto, propiedad_id, monto_alquiler) VALUES (?, ?, ?, ?, ?, ?)", cargos
+    )
+    # Los pagos se confirman después de insertarlos, como en el bot, para que los triggers del P&L los cuenten
+    primer_pago = cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM pagos").fetchone()[0]
+    cursor.executemany(
+        "INSERT INTO pagos(chat_id, fecha_pago, monto_pagado, saldo_restante, comprobante, confirmado) VALUES (?, ?, ?, ?, ?, 0)",
+        (pago[:5] for pago in pagos),
+    )
+    cursor.executemany(
+        "UPDATE pagos SET confirmado = 1 WHERE id = ?",
+        ((primer_pago + n,) for n, pago in enumerate(pagos) if pago[5]),
+    )
+    cursor.executemany("UPDATE inquilinos SET saldo = ?, fecha_ultimo_pago_completo = ? WHERE chat_id = ?", saldos)
+    filas['cargos'] = len(cargos)
+    filas['pagos'] = len(pagos)
+
+    # Quejas, algunas sin resolver
+    quejas = [
+        (azar.choice(datos_inquilinos)['chat_id'], f"{azar.choice(calendario):%Y-%m}-{azar.randint(1, 28):02d} {azar.randint(7, 22):02d}:00",
+         azar.choice(QUEJAS), int(azar.random() < 0.8))
+        for _ in range(max(1, inquilinos // 5))
+    ]
+    cursor.executemany("INSERT INTO quejas(chat_id, fecha, texto, resuelto) VALUES (?, ?, ?, ?)", quejas)
+    filas['quejas'] = len(quejas)
+    return filas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("destino", help="Archivo SQLite a crear (no debe existir)")
+    parser.add_argument("--propiedades", type=int, default=50)
+    parser.add_argument("--inquilinos", type=int, default=5000)
+    parser.add_argument("--lecturas", type=int, default=200_000)
+    parser.add_argument("--anios", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+
+    if os.path.exists(args.destino):
+        sys.exit(f"{args.destino} ya existe; bórralo o elige otro destino.")
+    # bot.db abre la conexión al importarse, con la ruta de DB_PATH
+    os.environ["DB_PATH"] = args.destino
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:abc")
+    os.environ.setdefault("ADMIN_IDS", "1")
+    sys.path.insert(0, RAIZ)
+    from bot import db
+
+    inicio = time.perf_counter()
+    db.crear_tablas()
+    filas = generar(db.cursor, args.propiedades, args.inquilinos, args.lecturas, args.anios, random.Random(args.semilla))
+    db.reconstruir_resumen_mensual()
+    db.conn.commit()
+    db.reconciliar_pyg()
+    db.cursor.execute("ANALYZE")
+    db.conn.commit()
+    print(f"{args.destino} generado en {time.perf_counter() - inicio:.1f} s:")
+    for tabla, cantidad in filas.items():
+        print(f"  {tabla}: {cantidad}")
+
+if __name__ == "__main__":
+    main()
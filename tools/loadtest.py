@@ -0,0 +1,250 @@
+"""Prueba de carga del webhook: envía updates por HTTP a un servidor local y mide la respuesta.
+
+Dos subcomandos:
+
+  stub   Levanta una Bot API falsa (respuestas de tools/fake_telegram.py) para que el bot no
+         llame a Telegram. El servidor se arranca apuntando a ella:
+             python tools/loadtest.py stub --puerto 8081 --latencia-ms 80
+             TELEGRAM_API_URL=http://127.0.0.1:8081 gunicorn bot:app -w 2 --threads 4
+
+  carga  Envía updates (grabados en un archivo JSONL o sintéticos) a /webhook a una tasa y
+         concurrencia dadas. Reporta p50/p95/p99, rendimiento, tasa de errores y respuestas
+         lentas (Telegram reenvía los updates cuya respuesta tarda demasiado):
+             python tools/loadtest.py carga --base-url http://127.0.0.1:8000 --tasa 50 \\
+                 --duracion 30 --concurrencia 20 --stub-url http://127.0.0.1:8081
+
+Requiere httpx (ya instalado como dependencia de python-telegram-bot).
+"""
+
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from tools.fake_telegram import BotAPIFalsa # noqa: E402
+
+# --- Bot API falsa por HTTP ---
+
+def _parametros(cuerpo, tipo_contenido):
+    """Parámetros de una llamada a la Bot API (form-urlencoded o JSON); los objetos vienen como JSON."""
+    if tipo_contenido.startswith('application/json'):
+        return json.loads(cuerpo or b'{}')
+    parametros = {}
+    for clave, valor in urllib.parse.parse_qsl(cuerpo.decode('utf-8', 'replace')):
+        if valor[:1] in '{[':
+            try:
+                valor = json.loads(valor)
+            except ValueError:
+                pass
+        parametros[clave] = valor
+    return parametros
+
+def crear_stub(puerto, latencia):
+    """Servidor HTTP que contesta como la Bot API. ``GET /_stats`` devuelve las llamadas por método."""
+    respuestas = BotAPIFalsa()
+    llamadas = collections.Counter()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, codigo, cuerpo):
+            datos = json.dumps(cuerpo).encode()
+            self.send_response(codigo)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if self.path == '/_stats':
+                with lock:
+                    self._responder(200, dict(llamadas))
+            else:
+                self.do_POST()
+
+        def do_POST(self):
+            metodo = self.path.rstrip('/').rsplit('/', 1)[-1]
+            longitud = int(self.headers.get('Content-Length') or 0)
+            parametros = _parametros(self.rfile.read(longitud), self.headers.get('Content-Type', ''))
+            if latencia:
+                time.sleep(latencia)
+            with lock:
+                llamadas[metodo] += 1
+                resultado = respuestas._resultado(metodo, parametros)
+            self._responder(200, {'ok': True, 'result': resultado})
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer(('127.0.0.1', puerto), Handler)
+
+# --- Generador de carga ---
+
+def updates_sinteticos(usuarios, admin_id):
+    """Mezcla de /start, navegación de menús de inquilino y de administrador, con update_id únicos."""
+    ids = itertools.count(int(time.time()) * 1000)
+    azar = random.Random(1)
+    botones_inquilino = ('ver_saldo', 'ver_mi_propiedad', 'menu_inquilino')
+    botones_admin = ('admin_menu_inquilinos', 'admin_menu_facturacion', 'admin_menu_comunicacion', 'admin_resumen_contable', 'menu_admin')
+    while True:
+        update_id = next(ids)
+        es_admin = azar.random() < 0.1
+        user_id = admin_id if es_admin else 10_000_000 + azar.randrange(usuarios)
+        remitente = {'id': user_id, 'is_bot': False, 'first_name': 'Carga'}
+        chat = {'id': user_id, 'type': 'private'}
+        if azar.random() < 0.3:
+            yield {'update_id': update_id, 'message': {
+                'message_id': update_id, 'date': int(time.time()), 'chat': chat, 'from': remitente, 'text': '/start',
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+            }}
+        else:
+            yield {'update_id': update_id, 'callback_query': {
+                'id': str(update_id), 'chat_instance': str(user_id), 'from': remitente,
+                'data': azar.choice(botones_admin if es_admin else botones_inquilino),
+                'message': {'message_id': 1, 'date': int(time.time()), 'chat': chat, 'text': 'menú'},
+            }}
+
+def updates_grabados(ruta):
+    """Updates de un archivo JSONL, en bucle; el update_id se renueva para no chocar con la deduplicación."""
+    with open(ruta, encoding='utf-8') as archivo:
+        grabados = [json.loads(linea) for linea in archivo if linea.strip()]
+    if not grabados:
+        sys.exit(f"{ruta} no tiene updates.")
+    ids = itertools.count(int(time.time()) * 1000)
+    for update in itertools.cycle(grabados):
+        yield {**update, 'update_id': next(ids)}
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+async def generar_carga(base_url, updates, tasa, duracion, concurrencia, umbral_lento, timeout):
+    """Envía updates a ``tasa`` por segundo durante ``duracion`` segundos (modelo abierto, con tope de concurrencia)."""
+    latencias, codigos, excepciones = [], collections.Counter(), collections.Counter()
+    semaforo = asyncio.Semaphore(concurrencia)
+    descartados = 0
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=timeout) as cliente:
+        async def enviar(update):
+            try:
+                inicio = time.perf_counter()
+                respuesta = await cliente.post('/webhook', json=update)
+                latencias.append(time.perf_counter() - inicio)
+                codigos[respuesta.status_code] += 1
+            except httpx.HTTPError as e:
+                excepciones[type(e).__name__] += 1
+            finally:
+                semaforo.release()
+
+        tareas = []
+        inicio = time.perf_counter()
+        for n in itertools.count():
+            objetivo = inicio + n / tasa
+            if objetivo - inicio >= duracion:
+                break
+            espera = objetivo - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            if semaforo.locked():
+                # Con la concurrencia agotada, el update se cuenta como descartado en vez de atrasar la tasa
+                descartados += 1
+                continue
+            await semaforo.acquire()
+            tareas.append(asyncio.create_task(enviar(next(updates))))
+        await asyncio.gather(*tareas)
+        total = time.perf_counter() - inicio
+
+    enviados = len(tareas)
+    errores = sum(cantidad for codigo, cantidad in codigos.items() if codigo >= 400) + sum(excepciones.values())
+    return {
+        'enviados': enviados,
+        'descartados_por_concurrencia': descartados,
+        'duracion_s': round(total, 3),
+        'rendimiento_rps': round(len(latencias) / total, 2) if total else 0.0,
+        'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+        'media_ms': round(statistics.mean(latencias) * 1000, 2) if latencias else 0.0,
+        'max_ms': round(max(latencias, default=0) * 1000, 2),
+        'tasa_errores': round(errores / enviados, 4) if enviados else 0.0,
+        'respuestas_lentas': sum(1 for latencia in latencias if latencia > umbral_lento),
+        'codigos': dict(codigos),
+        'excepciones': dict(excepciones),
+    }
+
+async def estadisticas_stub(stub_url):
+    if not stub_url:
+        return None
+    async with httpx.AsyncClient(timeout=5) as cliente:
+        return (await cliente.get(f"{stub_url.rstrip('/')}/_stats")).json()
+
+def restar(despues, antes):
+    return {metodo: cantidad - (antes or {}).get(metodo, 0) for metodo, cantidad in despues.items() if cantidad - (antes or {}).get(metodo, 0)}
+
+async def carga(args):
+    updates = updates_grabados(args.updates) if args.updates else updates_sinteticos(args.usuarios, args.admin_id)
+    antes = await estadisticas_stub(args.stub_url)
+    resultado = await generar_carga(
+        args.base_url, updates, args.tasa, args.duracion, args.concurrencia, args.umbral_lento_ms / 1000, args.timeout,
+    )
+    if args.stub_url:
+        # Los updates se procesan después de responder al webhook: se espera a que se vacíe la cola
+        await asyncio.sleep(args.espera_final)
+        resultado['llamadas_api'] = restar(await estadisticas_stub(args.stub_url), antes)
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    subcomandos = parser.add_subparsers(dest='subcomando', required=True)
+
+    stub = subcomandos.add_parser('stub', help="Bot API falsa por HTTP")
+    stub.add_argument("--puerto", type=int, default=8081)
+    stub.add_argument("--latencia-ms", type=float, default=0.0)
+
+    carga_parser = subcomandos.add_parser('carga', help="Envía updates al webhook y mide")
+    carga_parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="URL del servidor del bot")
+    carga_parser.add_argument("--tasa", type=float, default=20.0, help="Updates por segundo")
+    carga_parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de carga")
+    carga_parser.add_argument("--concurrencia", type=int, default=20, help="Requests en vuelo como máximo")
+    carga_parser.add_argument("--updates", help="Archivo JSONL con updates grabados (por defecto, sintéticos)")
+    carga_parser.add_argument("--usuarios", type=int, default=5000, help="Usuarios distintos en los updates sintéticos")
+    carga_parser.add_argument("--admin-id", type=int, default=1)
+    carga_parser.add_argument("--umbral-lento-ms", type=float, default=1000.0, help="Respuestas más lentas que esto se cuentan como lentas")
+    carga_parser.add_argument("--timeout", type=float, default=60.0)
+    carga_parser.add_argument("--stub-url", help="URL del stub, para contar las llamadas a la API que generó la carga")
+    carga_parser.add_argument("--espera-final", type=float, default=2.0, help="Segundos a esperar antes de leer el stub")
+    carga_parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    if args.subcomando == 'stub':
+        servidor = crear_stub(args.puerto, args.latencia_ms / 1000)
+        print(f"Bot API falsa en http://127.0.0.1:{args.puerto} (Ctrl+C para terminar)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    resultado = asyncio.run(carga(args))
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()